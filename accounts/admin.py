@@ -2,6 +2,7 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from core.purge import delete_account
 from .models import Profile
 
 class ProfileInline(admin.StackedInline):
@@ -12,6 +13,14 @@ class ProfileInline(admin.StackedInline):
 class UserAdmin(BaseUserAdmin):
     inlines = (ProfileInline,)
 
+    # Deletes deactivate the user and purge their data in the background (core.purge)
+    def delete_model(self, request, obj):
+        delete_account(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            delete_account(user)
+
 
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
\ No newline at end of file
@@ -0,0 +1,66 @@
+# accounts/backends.py
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Profile
+
+
+def user_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f'accounts:auth-user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """Drops the cached User+Profile once the current transaction commits."""
+    transaction.on_commit(lambda: user_cache().delete(user_cache_key(user_id)))
+
+
+def invalidate_cached_users(user_ids):
+    """Bulk form of invalidate_cached_user, with a single cache round trip."""
+    keys = [user_cache_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: user_cache().delete_many(keys))
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    Standard model backend that loads the user's profile in the same query.
+    AuthenticationMiddleware resolves request.user through get_user(), so every
+    view and template can read request.user.profile without an extra lookup.
+
+    The loaded User+Profile pair is also cached for AUTH_USER_CACHE_TIMEOUT
+    seconds (0 disables caching) in CACHES[AUTH_USER_CACHE_ALIAS]. Saves to
+    the user or profile, including password changes, and data version bumps
+    invalidate the entry. The cache must be shared by all worker processes,
+    or the others would keep serving the old entry.
+
+    A user without a profile (created before profiles were provisioned, or by
+    a raw insert) gets one here, so request.user.profile is always there.
+    `manage.py backfill_profiles` creates them all up front instead.
+    """
+
+    def get_user(self, user_id):
+        timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        key = user_cache_key(user_id)
+
+        cache = user_cache()
+        user = cache.get(key) if timeout else None
+        if user is None:
+            UserModel = get_user_model()
+            try:
+                user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            try:
+                user.profile
+            except Profile.DoesNotExist:
+                user.profile, _ = Profile.objects.get_or_create(user=user)
+            if timeout:
+                cache.set(key, user, timeout)
+
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,189 @@
+# accounts/export.py
+"""
+Self-service export of everything stored for a user, as a ZIP archive:
+
+    profile.json        account and profile details
+    avatar.<ext>        the uploaded profile picture, if any
+    courses.csv, assignments.csv, series.csv, grades.csv, enrollments.csv,
+    attachments.csv     one row per object
+    attachments/        the attached files
+    calendar.ics        the calendar feed
+
+stream_export() builds the archive incrementally. ZipFile writes into a
+small buffer that is emptied after every EXPORT_CHUNK_SIZE table rows and
+after every block of a file, so the archive can be sent as it is built
+(accounts.views.export_data) or written to a file (`manage.py
+export_user_data`). Tables are read in pages of EXPORT_CHUNK_SIZE rows by
+primary key (core.paging), so no database cursor is held open while the
+client downloads, and files are copied from storage in blocks. Memory use
+therefore depends on the chunk size, not on how much the user has stored.
+"""
+
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import datetime
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from assignments.ical import calendar_lines
+from assignments.models import Assignment, AssignmentSeries
+from attachments.models import Attachment, Usage
+from core.paging import keyset_pages
+from courses.models import Course, Enrollment
+from grades.models import Grade
+
+from .models import Profile
+
+FILE_BLOCK_SIZE = 64 * 1024
+
+
+def tables(user):
+    """(member name, queryset, exported fields) for each table."""
+    return [
+        ('courses.csv', Course.objects.filter(owner=user),
+         ['id', 'name', 'code', 'weight', 'updated_at']),
+        ('assignments.csv', Assignment.objects.filter(owner=user),
+         ['id', 'title', 'description', 'due_date', 'completed', 'archived', 'priority', 'grade_weight',
+          'course_id', 'course__name', 'series_id', 'occurrence_date', 'created_at', 'updated_at']),
+        ('series.csv', AssignmentSeries.objects.filter(owner=user),
+         ['id', 'title', 'description', 'course_id', 'dtstart', 'frequency', 'interval', 'until', 'count']),
+        ('grades.csv', Grade.objects.filter(assignment__owner=user),
+         ['id', 'assignment_id', 'assignment__title', 'score', 'max_score', 'comment', 'graded_at']),
+        ('enrollments.csv', Enrollment.objects.filter(student=user),
+         ['course_id', 'course__name', 'course__owner__username', 'enrolled_at']),
+        ('attachments.csv', Attachment.objects.filter(owner=user),
+         ['id', 'assignment_id', 'filename', 'content_type', 'size', 'blob__sha256', 'created_at']),
+    ]
+
+
+def export_filename(user):
+    return f'homework-tracker-{user.username}-{timezone.now():%Y%m%d}.zip'
+
+
+class StreamBuffer:
+    """Write-only, unseekable file that holds what ZipFile wrote until drained."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_export(user):
+    """Yields the user's export archive as a series of byte strings."""
+    buffer = StreamBuffer()
+    # Unseekable output: member sizes and CRCs go in data descriptors after each member
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for _ in write_members(archive, user):
+            data = buffer.drain()
+            if data:
+                yield data
+    yield buffer.drain()  # The central directory
+
+
+def write_export(user, file):
+    for data in stream_export(user):
+        file.write(data)
+
+
+def write_members(archive, user):
+    """Writes each member, yielding whenever the buffer is worth draining."""
+    profile = Profile.objects.filter(user=user).first()
+    write_json(archive, 'profile.json', profile_data(user, profile))
+    yield
+
+    avatar = profile.avatar if profile else None
+    if avatar and avatar.name != Profile._meta.get_field('avatar').default and avatar.storage.exists(avatar.name):
+        extension = os.path.splitext(avatar.name)[1]
+        yield from write_file(archive, f'avatar{extension}', avatar.storage.open(avatar.name, 'rb'), avatar.size)
+
+    for name, queryset, fields in tables(user):
+        yield from write_csv(archive, name, queryset, fields)
+
+    attachments = Attachment.objects.filter(owner=user).select_related('blob')
+    for page in keyset_pages(attachments, settings.EXPORT_CHUNK_SIZE):
+        for attachment in page:
+            yield from write_file(
+                archive, f'attachments/{attachment.pk}-{attachment.filename}', attachment.blob.open(), attachment.size,
+            )
+
+    tzinfo = profile.tzinfo if profile else timezone.get_default_timezone()
+    yield from write_lines(archive, 'calendar.ics', calendar_lines(user, tzinfo, settings.EXPORT_CHUNK_SIZE))
+
+
+def profile_data(user, profile):
+    usage = Usage.objects.filter(user=user).values_list('bytes_used', flat=True).first()
+    return {
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'date_joined': user.date_joined,
+        'last_login': user.last_login,
+        'timezone': profile.timezone if profile else None,
+        'attachment_bytes': usage or 0,
+        'exported_at': timezone.now(),
+    }
+
+
+def write_json(archive, name, data):
+    archive.writestr(name, json.dumps(data, cls=DjangoJSONEncoder, indent=2))
+
+
+def cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return '' if value is None else value
+
+
+def write_csv(archive, name, queryset, fields):
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    # force_zip64: the size is not known up front and may exceed 4 GiB
+    with archive.open(name, 'w', force_zip64=True) as member:
+        text = io.TextIOWrapper(member, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        writer.writerow(fields)
+        for page in keyset_pages(queryset.values_list('pk', *fields), chunk_size, pk=itemgetter(0)):
+            writer.writerows([cell(value) for value in row[1:]] for row in page)
+            text.flush()
+            yield
+        text.flush()
+        text.detach()  # The member is closed by the with block
+    yield
+
+
+def write_lines(archive, name, lines):
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    with archive.open(name, 'w', force_zip64=True) as member:
+        for count, line in enumerate(lines, 1):
+            member.write(line.encode() + b'\r\n')
+            if count % chunk_size == 0:
+                yield
+    yield
+
+
+def write_file(archive, name, file, size):
+    """Copies an open storage file into the archive block by block, then closes it."""
+    info = zipfile.ZipInfo(name, date_time=timezone.localtime().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.file_size = size  # Lets ZipFile choose ZIP64 only when needed
+    with file, archive.open(info, 'w') as member:
+        for block in file.chunks(FILE_BLOCK_SIZE):
+            member.write(block)
+            yield
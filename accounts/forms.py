@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
-from .models import Profile
+from .models import Profile, timezone_names
 
 
 class UserRegisterForm(UserCreationForm):
@@ -28,7 +28,7 @@ class UserUpdateForm(forms.ModelForm):
 class ProfileUpdateForm(forms.ModelForm):
     class Meta:
         model = Profile
-        fields = ['avatar']
+        fields = ['avatar', 'timezone']
         labels = {
             'avatar': '',
         }
@@ -38,4 +38,8 @@ class ProfileUpdateForm(forms.ModelForm):
         self.fields['avatar'].widget = forms.FileInput(attrs={
             'class': 'form-control',
             'id': 'avatarInput'
-        })
\ No newline at end of file
+        })
+        self.fields['timezone'].widget = forms.Select(
+            choices=[(name, name) for name in timezone_names()],
+            attrs={'class': 'form-select'},
+        )
\ No newline at end of file
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+
+
+class Command(BaseCommand):
+    help = 'Creates missing profiles for existing users in bulk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of profiles inserted per query (default: 1000).',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # Materialize the ids first so inserts don't interleave with an open cursor
+        user_ids = list(
+            User.objects.filter(profile__isnull=True).values_list('id', flat=True)
+        )
+
+        created = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch_ids = user_ids[start:start + batch_size]
+            profiles = Profile.objects.filter(user_id__in=batch_ids)
+            # ignore_conflicts skips profiles created meanwhile (e.g. at login) without saying which
+            existing = profiles.count()
+            Profile.objects.bulk_create([Profile(user_id=user_id) for user_id in batch_ids], ignore_conflicts=True)
+            created += profiles.count() - existing
+
+        self.stdout.write(self.style.SUCCESS(f'Created {created} missing profile(s).'))
@@ -0,0 +1,30 @@
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.export import export_filename, write_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes a user's data export (the archive behind 'Download My Data') to a "
+        'file, e.g. for accounts too large to download interactively.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--output',
+            help='Archive path (default: homework-tracker-<username>-<date>.zip in the current directory).',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"No user named {options['username']!r}.")
+
+        path = options['output'] or export_filename(user)
+        with open(path, 'wb') as f:
+            write_export(user, f)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {path} ({os.path.getsize(path)} bytes).'))
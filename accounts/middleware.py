@@ -0,0 +1,22 @@
+# accounts/middleware.py
+from django.utils import timezone
+
+
+class TimezoneMiddleware:
+    """
+    Activates the signed-in user's timezone (Profile.timezone) for the request,
+    so form input, templates and local-date windows all use local time.
+    The profile is loaded together with the user by ProfileModelBackend.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = request.user
+        profile = getattr(user, 'profile', None) if user.is_authenticated else None
+        if profile is not None:
+            timezone.activate(profile.tzinfo)
+        else:
+            timezone.deactivate()
+        return self.get_response(request)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_delete_userprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='data_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
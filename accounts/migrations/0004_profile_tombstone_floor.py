@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_profile_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='tombstone_floor',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
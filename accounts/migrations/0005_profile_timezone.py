@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-19 12:55
+
+import accounts.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_profile_tombstone_floor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='timezone',
+            field=models.CharField(default='Asia/Shanghai', max_length=64, validators=[accounts.models.validate_timezone]),
+        ),
+    ]
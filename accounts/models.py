@@ -1,7 +1,24 @@
+import zoneinfo
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 
 
+@lru_cache(maxsize=None)
+def timezone_names():
+    """Sorted IANA timezone names; available_timezones() scans the tz database on every call."""
+    return tuple(sorted(zoneinfo.available_timezones()))
+
+
+def validate_timezone(value):
+    """Accepts IANA timezone names such as 'Europe/Berlin'."""
+    if value not in timezone_names():
+        raise ValidationError(f'"{value}" is not a known timezone.')
+
+
 class Profile(models.Model):
     """
     Extends the default Django user with a profile picture.
@@ -13,6 +30,81 @@ class Profile(models.Model):
     # Profile image stored in 'media/profile_pics/', falls back to default.jpg if none provided
     avatar = models.ImageField(upload_to='profile_pics', default='default.jpg')
 
+    # IANA timezone name; activated per request by accounts.middleware.TimezoneMiddleware
+    timezone = models.CharField(max_length=64, default=settings.TIME_ZONE, validators=[validate_timezone])
+
+    # Incremented whenever any of the user's courses, assignments or grades change.
+    # Serves as the user's sync revision (core.changes) and keys page ETags (core.conditional)
+    data_version = models.PositiveBigIntegerField(default=0, editable=False)
+
+    # Highest revision whose tombstones were compacted; older sync cursors must reset
+    tombstone_floor = models.PositiveBigIntegerField(default=0, editable=False)
+
+    # Set when the account is deleted; the user is deactivated and purged in the background
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Only ever written with targeted UPDATEs (bump_data_version, compaction, account deletion)
+    SERVER_FIELDS = ('data_version', 'tombstone_floor', 'deleted_at')
+
     def __str__(self):
         """Returns a human-readable string representation of the profile."""
-        return f"{self.user.username}'s Profile"
\ No newline at end of file
+        return f"{self.user.username}'s Profile"
+
+    def save(self, *args, **kwargs):
+        """
+        Full saves of an existing profile leave SERVER_FIELDS alone. The copy
+        being saved (the profile form's, the admin's) may have been loaded
+        with a cached request.user, and writing its counters back would undo
+        a bump made meanwhile: sync revisions would go backwards and stale
+        ETags would match again.
+        """
+        if not (args or self._state.adding or kwargs.get('force_insert')) and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.SERVER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def tzinfo(self):
+        """The profile's timezone, falling back to the site default if it is invalid."""
+        try:
+            return zoneinfo.ZoneInfo(self.timezone)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            return zoneinfo.ZoneInfo(settings.TIME_ZONE)
+
+    @classmethod
+    def bump_data_version(cls, user_id):
+        """
+        Atomically increments the user's data_version and returns the new value.
+        The UPDATE locks the profile row, so concurrent writers for the same user
+        are serialized and revisions become visible in order.
+        """
+        from .backends import invalidate_cached_user
+
+        profiles = cls.objects.filter(user_id=user_id)
+        if not profiles.update(data_version=models.F('data_version') + 1):
+            # Users from before profiles existed (see backfill_profiles)
+            cls.objects.create(user_id=user_id, data_version=1)
+        invalidate_cached_user(user_id)
+        return profiles.values_list('data_version', flat=True).get()
+
+    @classmethod
+    def bump_data_versions(cls, user_ids):
+        """
+        Bulk form of bump_data_version for writes that touch many users at once
+        (e.g. a class gradebook). Uses a fixed number of queries regardless of
+        the number of users and returns {user_id: new data_version}.
+        """
+        from .backends import invalidate_cached_users
+
+        user_ids = set(user_ids)
+        profiles = cls.objects.filter(user_id__in=user_ids)
+        profiles.update(data_version=models.F('data_version') + 1)
+        versions = dict(profiles.values_list('user_id', 'data_version'))
+        missing = user_ids - versions.keys()
+        if missing:
+            cls.objects.bulk_create([cls(user_id=user_id, data_version=1) for user_id in missing])
+            versions.update(dict.fromkeys(missing, 1))
+        invalidate_cached_users(user_ids)
+        return versions
\ No newline at end of file
@@ -1,12 +1,43 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
+from .backends import invalidate_cached_user
 from .models import Profile
 
+
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
+def create_or_update_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Provisions a profile for newly created users.
+
+    Partial saves (e.g. the last_login update on every login) never touch the
+    profile, so they are skipped without a query. Full saves read the profile
+    from the select_related cache filled by ProfileModelBackend and only hit the
+    database when it was not loaded. A user still without one gets it on their
+    next request (ProfileModelBackend.get_user); `manage.py backfill_profiles`
+    fixes them all in bulk.
+    """
     if created:
         Profile.objects.create(user=instance)
-    else:
-        if not hasattr(instance, 'profile'):
-            Profile.objects.create(user=instance)
\ No newline at end of file
+        return
+
+    if update_fields is not None:
+        return
+
+    try:
+        instance.profile
+    except Profile.DoesNotExist:
+        Profile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Covers username, password, is_active and last_login changes."""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.user_id)
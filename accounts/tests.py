@@ -1,3 +1,243 @@
-from django.test import TestCase
+import csv
+import io
+import tempfile
+import zipfile
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.factories import (
+    NETWORK_CACHE_SETTINGS, PASSWORD, CacheClearingTestCase, make_assignment, make_course, make_grade, make_user,
+)
+from .backends import user_cache_key
+from .models import Profile
+
+
+class RegisterViewTests(CacheClearingTestCase):
+
+    def test_register_creates_user_and_profile(self):
+        response = self.client.post(reverse('register'), {
+            'username': 'newstudent',
+            'password1': 'a-long-enough-pass-9',
+            'password2': 'a-long-enough-pass-9',
+        })
+
+        self.assertRedirects(response, reverse('login'))
+        self.assertTrue(Profile.objects.filter(user__username='newstudent').exists())
+
+    def test_mismatched_passwords(self):
+        response = self.client.post(reverse('register'), {
+            'username': 'newstudent', 'password1': 'a-long-enough-pass-9', 'password2': 'something-else-9',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(User.objects.filter(username='newstudent').exists())
+
+
+class LoginViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('alice')
+
+    def test_login(self):
+        response = self.client.post(reverse('login'), {'username': 'alice', 'password': PASSWORD})
+
+        self.assertRedirects(response, reverse('core:dashboard'), fetch_redirect_response=False)
+        self.assertEqual(int(self.client.session['_auth_user_id']), self.user.pk)
+
+    def test_wrong_password(self):
+        response = self.client.post(reverse('login'), {'username': 'alice', 'password': 'nope'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+class ProfileViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('alice')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_requires_login(self):
+        self.client.logout()
+        url = reverse('profile')
+        self.assertRedirects(self.client.get(url), f"{reverse('login')}?next={url}", fetch_redirect_response=False)
+
+    def test_update_username_and_timezone(self):
+        response = self.client.post(reverse('profile'), {'username': 'alicia', 'timezone': 'Europe/Berlin'})
+
+        self.assertRedirects(response, reverse('profile'))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.username, 'alicia')
+        self.assertEqual(self.user.profile.timezone, 'Europe/Berlin')
+
+    @override_settings(**NETWORK_CACHE_SETTINGS)
+    def test_saving_a_stale_copy_keeps_the_revision(self):
+        self.client.get(reverse('profile'))  # Caches request.user with its profile
+        revision = Profile.bump_data_version(self.user.pk)  # Elsewhere, before the cached copy is dropped
+
+        self.client.post(reverse('profile'), {'username': self.user.username, 'timezone': 'UTC'})
+
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual((profile.timezone, profile.data_version), ('UTC', revision))
+
+    def test_unknown_timezone_is_rejected(self):
+        response = self.client.post(reverse('profile'), {'username': 'alice', 'timezone': 'Mars/Olympus'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('timezone', response.context['p_form'].errors)
+
+    def test_timezone_is_activated(self):
+        Profile.objects.filter(user=self.user).update(timezone='America/New_York')
+
+        self.addCleanup(timezone.deactivate)
+
+        self.client.get(reverse('profile'))
+
+        # Still active: the test client runs the request in this thread
+        self.assertEqual(timezone.get_current_timezone_name(), 'America/New_York')
+
+
+class ChangePasswordViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+
+    def test_change_password_keeps_the_session(self):
+        self.client.force_login(self.user)
+
+        # The cached user is dropped on commit (accounts.backends)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('password_change'), {
+                'old_password': PASSWORD,
+                'new_password1': 'another-long-pass-7',
+                'new_password2': 'another-long-pass-7',
+            })
+
+        self.assertRedirects(response, reverse('profile'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('another-long-pass-7'))
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+
+
+@override_settings(**NETWORK_CACHE_SETTINGS)
+class CachedUserTests(CacheClearingTestCase):
+
+    def test_cached_user_is_shared_and_dropped_on_change(self):
+        user = make_user()
+        self.client.force_login(user)
+        self.client.get(reverse('profile'))
+
+        # In the cache every worker reads, so a change made by one reaches all of them
+        shared = caches[settings.CACHE_SHARED_ALIAS]
+        self.assertEqual(shared.get(user_cache_key(user.pk)).pk, user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Profile.bump_data_version(user.pk)
+        self.assertIsNone(shared.get(user_cache_key(user.pk)))
+
+
+class ProfileProvisioningTests(CacheClearingTestCase):
+
+    def make_user_without_profile(self):
+        user = make_user()
+        Profile.objects.filter(user=user).delete()
+        return User.objects.get(pk=user.pk)
+
+    def test_partial_saves_skip_the_profile(self):
+        user = self.make_user_without_profile()
+
+        with self.assertNumQueries(1):  # The UPDATE alone
+            user.save(update_fields=['last_login'])
+        self.assertFalse(Profile.objects.filter(user=user).exists())
+
+    def test_user_without_a_profile_can_log_in(self):
+        user = self.make_user_without_profile()
+
+        self.assertTrue(self.client.login(username=user.username, password=PASSWORD))
+        self.assertEqual(self.client.get(reverse('core:dashboard')).status_code, 200)
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+
+    def test_backfill_counts_the_profiles_it_creates(self):
+        missing = [self.make_user_without_profile() for _ in range(3)]
+        make_user()
+
+        out = StringIO()
+        call_command('backfill_profiles', batch_size=2, stdout=out)
+        self.assertIn('Created 3 missing profile(s).', out.getvalue())
+        self.assertEqual(Profile.objects.filter(user__in=missing).count(), 3)
+
+        out = StringIO()
+        call_command('backfill_profiles', stdout=out)
+        self.assertIn('Created 0 missing profile(s).', out.getvalue())
+
+
+class DataExportTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('alice')
+        course = make_course(cls.user, name='Chemistry')
+        for number in range(5):
+            make_grade(make_assignment(cls.user, course=course, title=f'Lab {number}'), score=70 + number)
+        make_assignment(make_user(), title='Not mine')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def export(self):
+        response = self.client.get(reverse('export_data'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('homework-tracker-alice-', response['Content-Disposition'])
+        chunks = list(response.streaming_content)
+        return zipfile.ZipFile(io.BytesIO(b''.join(chunks))), chunks
+
+    def rows(self, archive, name):
+        return list(csv.DictReader(io.TextIOWrapper(archive.open(name), encoding='utf-8')))
+
+    def test_archive_contains_the_users_data(self):
+        archive, _ = self.export()
+
+        self.assertLessEqual(
+            {'profile.json', 'courses.csv', 'assignments.csv', 'grades.csv', 'calendar.ics'}, set(archive.namelist()),
+        )
+        titles = [row['title'] for row in self.rows(archive, 'assignments.csv')]
+        self.assertEqual(titles, [f'Lab {number}' for number in range(5)])
+        self.assertEqual(self.rows(archive, 'courses.csv')[0]['name'], 'Chemistry')
+        self.assertEqual(len(self.rows(archive, 'grades.csv')), 5)
+        self.assertIn(b'SUMMARY:Lab 0', archive.read('calendar.ics'))
+        self.assertIn(b'"username": "alice"', archive.read('profile.json'))
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_archive_is_streamed_in_chunks(self):
+        archive, chunks = self.export()
+
+        self.assertGreater(len(chunks), 5)
+        self.assertIsNone(archive.testzip())
+        # Read in pages of two rows by primary key, none lost at the page boundaries
+        titles = [row['title'] for row in self.rows(archive, 'assignments.csv')]
+        self.assertEqual(titles, [f'Lab {number}' for number in range(5)])
+        self.assertEqual(archive.read('calendar.ics').count(b'BEGIN:VEVENT'), 5)
+
+    def test_avatar_is_included(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            profile = Profile.objects.get(user=self.user)
+            profile.avatar = SimpleUploadedFile('me.png', b'\x89PNG fake image')
+            profile.save()
+
+            archive, _ = self.export()
+
+        self.assertEqual(archive.read('avatar.png'), b'\x89PNG fake image')
@@ -1,14 +1,18 @@
 # accounts/views.py
 
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
 
+from core.ratelimit import ratelimit
+from .export import export_filename, stream_export
 from .forms import UserRegisterForm, UserUpdateForm, ProfileUpdateForm
 
 
+@ratelimit('register', key='ip', methods=['POST'])
 def register(request):
     """Handles user registration. On success, redirects to log in with a welcome message."""
     if request.method == 'POST':
@@ -28,13 +32,16 @@ def profile(request):
     """
     Allows logged-in users to update their basic info and profile picture.
     Both forms (user + profile) are saved together on valid submission.
+    The profile is already loaded with request.user by ProfileModelBackend.
     """
+    profile = request.user.profile
+
     if request.method == 'POST':
         u_form = UserUpdateForm(request.POST, instance=request.user)
         p_form = ProfileUpdateForm(
             request.POST,
             request.FILES,
-            instance=request.user.profile
+            instance=profile
         )
         if u_form.is_valid() and p_form.is_valid():
             u_form.save()
@@ -43,7 +50,7 @@ def profile(request):
             return redirect('profile')
     else:
         u_form = UserUpdateForm(instance=request.user)
-        p_form = ProfileUpdateForm(instance=request.user.profile)
+        p_form = ProfileUpdateForm(instance=profile)
 
     context = {
         'u_form': u_form,
@@ -68,4 +75,16 @@ def change_password(request):
     else:
         form = PasswordChangeForm(request.user)
 
-    return render(request, 'registration/password_change_form.html', {'form': form})
\ No newline at end of file
+    return render(request, 'registration/password_change_form.html', {'form': form})
+
+
+@login_required
+@ratelimit('export')
+def export_data(request):
+    """
+    Downloads everything stored for the user as a ZIP archive, streamed while
+    it is built (see accounts.export).
+    """
+    response = StreamingHttpResponse(stream_export(request.user), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(request.user)}"'
+    return response
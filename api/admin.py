@@ -0,0 +1,15 @@
+# api/admin.py
+from django.contrib import admin
+from .models import ApiToken
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    """Tokens can be reviewed and revoked here; they are issued through /api/v1/token/."""
+    list_display = ('__str__', 'user', 'created_at', 'last_used_at')
+    search_fields = ('name', 'user__username')
+    raw_id_fields = ('user',)
+    readonly_fields = ('key_hash', 'created_at', 'last_used_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,53 @@
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+def hash_key(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ApiToken(models.Model):
+    """
+    A bearer token for scripts and mobile clients, sent as
+    `Authorization: Token <key>`. Only the key's SHA-256 is stored; the key
+    itself is shown once, when the token is issued.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='api_tokens')
+    key_hash = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=100, blank=True)  # e.g. the client it was issued to
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.name or f'Token {self.pk}'
+
+    @classmethod
+    def issue(cls, user, name=''):
+        """Returns (token, key) for a new token; the key cannot be recovered later."""
+        key = secrets.token_urlsafe(32)
+        return cls.objects.create(user=user, key_hash=hash_key(key), name=name), key
+
+    @classmethod
+    def authenticate(cls, key):
+        """The token for `key`, with its user and profile loaded, or None."""
+        token = (
+            cls.objects.select_related('user__profile')
+            .filter(key_hash=hash_key(key), user__is_active=True)
+            .first()
+        )
+        if token is not None:
+            now = timezone.now()
+            # Coarse on purpose: one write per token per interval, not one per request
+            stale = now - timedelta(seconds=settings.API_TOKEN_TOUCH_INTERVAL)
+            if token.last_used_at is None or token.last_used_at < stale:
+                cls.objects.filter(pk=token.pk).update(last_used_at=now)
+                token.last_used_at = now
+        return token
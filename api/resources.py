@@ -0,0 +1,144 @@
+# api/resources.py
+"""
+Resource definitions for the JSON API.
+
+Each resource describes which model fields are exposed, how to scope rows to
+the requesting user (mirroring the ownership checks in the HTML views) and
+which ModelForm validates writes, so the API and the HTML forms share rules.
+"""
+
+from django import forms
+from django.core.exceptions import ImproperlyConfigured
+
+from assignments.forms import AssignmentForm
+from assignments.models import Assignment
+from courses.forms import CourseForm
+from core.models import Change
+from core.purge import delete_course
+from courses.models import Course
+from grades.forms import GradeForm
+from grades.models import Grade
+from grades.services import mark_completed
+
+
+class AssignmentApiForm(AssignmentForm):
+    """AssignmentForm plus the completion flag, which the HTML form toggles separately."""
+
+    class Meta(AssignmentForm.Meta):
+        fields = AssignmentForm.Meta.fields + ['completed']
+
+
+class GradeApiForm(GradeForm):
+    """GradeForm that also takes the assignment, limited to the user's own."""
+
+    assignment = forms.ModelChoiceField(queryset=Assignment.objects.none())
+
+    class Meta(GradeForm.Meta):
+        fields = ['assignment'] + GradeForm.Meta.fields
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['assignment'].queryset = Assignment.objects.filter(owner=user)
+
+
+class Resource:
+    """
+    Abstract description of an API resource. Subclasses must set `model`,
+    `form_class` and `owner_field`, the lookup from a row to the user who owns
+    it; rows are only visible to their owner.
+    """
+
+    model = None
+    form_class = None
+    owner_field = None
+    # Exposed fields; foreign keys are exposed as their id under the field name
+    fields = ()
+    # Auto-updated timestamp used for ?updated_since= delta sync
+    updated_field = None
+
+    def __init__(self):
+        for attribute in ('model', 'form_class', 'owner_field'):
+            if getattr(self, attribute) is None:
+                raise ImproperlyConfigured(f'{type(self).__name__} must set {attribute}.')
+
+    def get_queryset(self, user):
+        return self.model._default_manager.filter(**{self.owner_field: user})
+
+    def get_form(self, user, data, instance=None):
+        return self.form_class(data, instance=instance)
+
+    def save(self, form, user):
+        return form.save()
+
+    def delete(self, instance):
+        instance.delete()
+
+
+class AssignmentResource(Resource):
+    model = Assignment
+    form_class = AssignmentApiForm
+    owner_field = 'owner'
+    fields = (
+        'id', 'title', 'description', 'due_date', 'completed', 'archived', 'course',
+        'priority', 'grade_weight', 'series', 'occurrence_date', 'created_at', 'updated_at',
+    )
+    updated_field = 'updated_at'
+
+    def get_form(self, user, data, instance=None):
+        return self.form_class(data, instance=instance, user=user)
+
+    def save(self, form, user):
+        assignment = form.save(commit=False)
+        assignment.owner = user
+        if not assignment.completed:
+            assignment.archived = False  # As in assignments.views.assignment_toggle
+        assignment.save()
+        return assignment
+
+
+class CourseResource(Resource):
+    model = Course
+    form_class = CourseForm
+    owner_field = 'owner'
+    fields = ('id', 'name', 'code', 'weight', 'updated_at')
+    updated_field = 'updated_at'
+
+    def delete(self, instance):
+        delete_course(instance)  # Purged in the background, as in the HTML view
+
+    def save(self, form, user):
+        course = form.save(commit=False)
+        course.owner = user
+        course.save()
+        return course
+
+
+class GradeResource(Resource):
+    model = Grade
+    form_class = GradeApiForm
+    owner_field = 'assignment__owner'
+    fields = ('id', 'assignment', 'score', 'max_score', 'comment', 'graded_at')
+    updated_field = 'graded_at'
+
+    def get_form(self, user, data, instance=None):
+        return self.form_class(data, instance=instance, user=user)
+
+    def save(self, form, user):
+        # Same rule as grades.views.record_grade: grading completes the assignment.
+        # The assignment is written first, in the same lock order as grades.services
+        assignment = form.instance.assignment
+        if not assignment.completed:
+            mark_completed(assignment)
+        return form.save()
+
+
+ASSIGNMENTS = AssignmentResource()
+COURSES = CourseResource()
+GRADES = GradeResource()
+
+# Resources by change log object type, for /api/v1/sync/
+SYNC_RESOURCES = {
+    Change.ASSIGNMENT: ASSIGNMENTS,
+    Change.COURSE: COURSES,
+    Change.GRADE: GRADES,
+}
@@ -0,0 +1,391 @@
+import asyncio
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from assignments.models import Assignment
+from accounts.models import Profile
+from core.factories import PASSWORD, CacheClearingTestCase, make_assignment, make_course, make_grade, make_user
+from core import events as live_events
+from core.models import Change
+from courses.forms import CourseForm
+from courses.models import Course
+from grades.models import Grade
+from .models import ApiToken
+from .resources import Resource
+
+
+class ResourceTests(SimpleTestCase):
+
+    def test_incomplete_resources_are_rejected(self):
+        class Untyped(Resource):
+            form_class = CourseForm
+            owner_field = 'owner'
+
+        class Unowned(Resource):
+            model = Course
+            form_class = CourseForm
+
+        for resource in (Resource, Untyped, Unowned):
+            with self.subTest(resource=resource.__name__):
+                with self.assertRaises(ImproperlyConfigured):
+                    resource()
+
+
+class ApiTestCase(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.course = make_course(cls.user, name='Physics')
+        cls.assignments = [make_assignment(cls.user, title=f'Problem set {n}') for n in range(3)]
+        cls.other = make_user()
+        cls.others_assignment = make_assignment(cls.other, title='Not mine')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def url(self, name, *args):
+        return reverse(f'api:v1:{name}', args=args)
+
+    def post(self, url, data, **extra):
+        return self.client.post(url, json.dumps(data), content_type='application/json', **extra)
+
+    def patch(self, url, data, **extra):
+        return self.client.patch(url, json.dumps(data), content_type='application/json', **extra)
+
+
+class CollectionTests(ApiTestCase):
+
+    def test_lists_only_own_rows(self):
+        response = self.client.get(self.url('assignment_collection'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['title'] for row in response.json()['results']],
+                         [f'Problem set {n}' for n in range(3)])
+
+    def test_sparse_fields_and_cursor_pagination(self):
+        first = self.client.get(self.url('assignment_collection'), {'fields': 'title', 'limit': 2}).json()
+        self.assertEqual(set(first['results'][0]), {'id', 'title'})
+        self.assertEqual(len(first['results']), 2)
+
+        second = self.client.get(self.url('assignment_collection'), {'limit': 2, 'cursor': first['next_cursor']})
+        self.assertEqual([row['id'] for row in second.json()['results']], [self.assignments[2].pk])
+        self.assertIsNone(second.json()['next_cursor'])
+
+    def test_invalid_parameters(self):
+        for params in ({'fields': 'title,secret'}, {'cursor': '!!'}, {'limit': 'many'}, {'updated_since': 'soon'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url('assignment_collection'), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for _ in range(20):
+            make_assignment(self.user)
+        # The session, the user and one query for the page, however many rows it holds
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url('assignment_collection'), {'limit': 50})
+        self.assertEqual(len(response.json()['results']), 23)
+
+    def test_unchanged_collection_is_not_modified(self):
+        etag = self.client.get(self.url('assignment_collection'))['ETag']
+        response = self.client.get(self.url('assignment_collection'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url('assignment_collection')).status_code, 401)
+
+
+class WriteTests(ApiTestCase):
+
+    def test_create(self):
+        response = self.post(self.url('assignment_collection'), {
+            'title': 'Essay', 'due_date': timezone.now().isoformat(), 'course': self.course.pk,
+        })
+
+        self.assertEqual(response.status_code, 201)
+        assignment = Assignment.objects.get(pk=response.json()['id'])
+        self.assertEqual((assignment.owner, assignment.course), (self.user, self.course))
+
+    def test_validation_errors(self):
+        response = self.post(self.url('assignment_collection'), {'title': '', 'due_date': 'tomorrow'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'title', 'due_date'})
+
+    def test_batch_is_all_or_nothing(self):
+        response = self.post(self.url('assignment_collection'), [
+            {'id': self.assignments[0].pk, 'title': 'Renamed'},
+            {'title': 'New', 'due_date': timezone.now().isoformat()},
+            {'id': self.others_assignment.pk, 'title': 'Stolen'},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['2'])
+        self.assertEqual(Assignment.objects.get(pk=self.assignments[0].pk).title, 'Problem set 0')
+        self.assertFalse(Assignment.objects.filter(title='New').exists())
+
+    def test_batch_updates_and_creates(self):
+        response = self.post(self.url('assignment_collection'), [
+            {'id': self.assignments[0].pk, 'completed': True},
+            {'title': 'New', 'due_date': timezone.now().isoformat()},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([row['title'] for row in results], ['Problem set 0', 'New'])
+        self.assertTrue(results[0]['completed'])
+
+    def test_batch_ids_must_be_integers(self):
+        for bad_id in ('1', [1], {'pk': 1}, True):
+            with self.subTest(id=bad_id):
+                response = self.post(self.url('assignment_collection'), [{'id': bad_id, 'title': 'x'}])
+                self.assertEqual(response.status_code, 400)
+
+    def test_invalid_bodies(self):
+        response = self.client.post(self.url('assignment_collection'), 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post(self.url('assignment_collection'), ['text']).status_code, 400)
+
+    def test_detail_patch_and_delete(self):
+        url = self.url('assignment_detail', self.assignments[0].pk)
+
+        response = self.patch(url, {'title': 'Renamed'})
+        self.assertEqual(response.json()['title'], 'Renamed')
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_other_users_rows_are_not_found(self):
+        url = self.url('assignment_detail', self.others_assignment.pk)
+
+        for response in (self.client.get(url), self.patch(url, {'title': 'x'}), self.client.delete(url)):
+            self.assertEqual(response.status_code, 404)
+        self.assertTrue(Assignment.objects.filter(pk=self.others_assignment.pk).exists())
+
+    def test_grading_completes_the_assignment(self):
+        response = self.post(self.url('grade_collection'), {
+            'assignment': self.assignments[1].pk, 'score': 8, 'max_score': 10,
+        })
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Assignment.objects.get(pk=self.assignments[1].pk).completed)
+
+    def test_cannot_grade_other_users_assignments(self):
+        response = self.post(self.url('grade_collection'), {
+            'assignment': self.others_assignment.pk, 'score': 8, 'max_score': 10,
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Grade.objects.exists())
+
+    def test_regrade_through_detail(self):
+        grade = make_grade(self.assignments[2], score=50)
+        response = self.patch(self.url('grade_detail', grade.pk), {'score': 75})
+        self.assertEqual(response.json()['score'], 75)
+
+    def test_deleting_a_course_hides_it(self):
+        response = self.client.delete(self.url('course_detail', self.course.pk))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Course.objects.filter(pk=self.course.pk).exists())
+
+
+class SyncTests(ApiTestCase):
+
+    def sync(self, **params):
+        return self.client.get(self.url('sync'), params).json()
+
+    def test_first_sync_resets(self):
+        body = self.sync()
+
+        self.assertTrue(body['reset'])
+        self.assertEqual(body['revision'], Profile.objects.get(user=self.user).data_version)
+
+    def test_changes_and_tombstones_after_a_revision(self):
+        since = self.sync()['revision']
+        renamed, deleted = self.assignments[:2]
+        renamed.title = 'Renamed'
+        renamed.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+
+        body = self.sync(since=since)
+
+        self.assertFalse(body['reset'])
+        self.assertEqual([(c['id'], c['deleted']) for c in body['changes']],
+                         [(renamed.pk, False), (deleted_pk, True)])
+        self.assertEqual(body['changes'][0]['data']['title'], 'Renamed')
+        self.assertIsNone(body['changes'][1]['data'])
+        self.assertEqual(self.sync(since=body['revision'])['changes'], [])
+
+    def test_paging_resumes_from_the_last_revision(self):
+        since = self.sync()['revision']
+        for assignment in self.assignments:
+            assignment.completed = True
+            assignment.save()
+
+        first = self.sync(since=since, limit=2)
+        self.assertTrue(first['has_more'])
+        second = self.sync(since=first['revision'], limit=2)
+        self.assertFalse(second['has_more'])
+        self.assertEqual([c['id'] for c in first['changes'] + second['changes']],
+                         [a.pk for a in self.assignments])
+
+    def test_cursor_older_than_compacted_tombstones_resets(self):
+        since = self.sync()['revision']
+        self.assignments[0].delete()
+        Change.objects.filter(deleted=True).update(changed_at=timezone.now() - timedelta(days=90))
+
+        with self.captureOnCommitCallbacks(execute=True):  # Drops the cached profile
+            call_command('compact_changes', older_than=30, stdout=StringIO())
+
+        body = self.sync(since=since)
+        self.assertTrue(body['reset'])
+        self.assertEqual(body['changes'], [])
+        # A client that reset past the floor syncs normally again
+        self.assertFalse(self.sync(since=body['revision'])['reset'])
+
+    def test_other_users_changes_are_not_visible(self):
+        since = self.sync()['revision']
+        self.others_assignment.title = 'Still not mine'
+        self.others_assignment.save()
+
+        self.assertEqual(self.sync(since=since)['changes'], [])
+
+
+class EventStreamTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.async_client.force_login(self.user)
+        # Streams left open by a test must not be woken by later ones
+        broker = live_events.Broker()
+        self.enterContext(mock.patch.object(live_events, 'broker', broker))
+        self.enterContext(mock.patch.object(live_events, '_backend', live_events.LocalBackend(broker)))
+        self.since = Profile.objects.get(user=self.user).data_version
+
+    def test_pending_events_without_a_stream(self):
+        # Under WSGI the view answers at once and the browser reconnects
+        self.assignments[0].delete()
+        response = self.client.get(self.url('events'), HTTP_LAST_EVENT_ID=str(self.since))
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = response.content.decode()
+        self.assertIn(f'id: {self.since + 1}\nevent: change\n', body)
+        self.assertIn('"deleted": true', body)
+
+    @override_settings(API_MAX_PAGE_SIZE=2)
+    def test_backlog_is_sent_in_batches(self):
+        for assignment in self.assignments:
+            assignment.title += ' (revised)'
+            assignment.save()
+
+        body = self.client.get(self.url('events'), HTTP_LAST_EVENT_ID=str(self.since)).content.decode()
+        # More is pending, so the browser is told to reconnect at once
+        self.assertTrue(body.startswith('retry: 0\n'))
+        self.assertEqual(body.count('event: change'), 2)
+
+        body = self.client.get(self.url('events'), HTTP_LAST_EVENT_ID=str(self.since + 2)).content.decode()
+        self.assertTrue(body.startswith(f'retry: {settings.LIVE_EVENTS_RETRY_MS}\n'))
+        self.assertEqual(body.count('event: change'), 1)
+        self.assertIn(f'id: {self.since + 3}\n', body)
+
+    def test_cursor_below_the_tombstone_floor_resets(self):
+        self.assignments[0].delete()
+        Profile.objects.filter(user=self.user).update(tombstone_floor=self.since + 1)
+
+        body = self.client.get(self.url('events'), HTTP_LAST_EVENT_ID=str(self.since)).content.decode()
+        self.assertIn(f'id: {self.since + 1}\nevent: reset\ndata: {{"revision": {self.since + 1}}}\n', body)
+        self.assertNotIn('event: change', body)
+
+        # Resuming from the reset revision streams normally again
+        body = self.client.get(self.url('events'), HTTP_LAST_EVENT_ID=str(self.since + 1)).content.decode()
+        self.assertNotIn('event: reset', body)
+
+    @override_settings(LIVE_EVENTS_HEARTBEAT=5)
+    async def test_published_change_reaches_the_stream(self):
+        response = await self.async_client.get(self.url('events'), {'since': self.since})
+        chunks = response.streaming_content
+        self.assertTrue((await anext(chunks)).startswith(b'retry: '))
+
+        # The stream has nothing to send yet and waits to be woken
+        pending = asyncio.create_task(anext(chunks))
+        await asyncio.sleep(0.05)
+        self.assertFalse(pending.done())
+
+        assignment = await sync_to_async(make_assignment)(self.user, title='Lab report')
+        live_events.publish(self.user.pk, self.since + 1)
+
+        event = (await asyncio.wait_for(pending, 2)).decode()
+        self.assertIn(f'id: {self.since + 1}\nevent: change\n', event)
+        self.assertIn(f'"id": {assignment.pk}', event)
+        self.assertIn('"title": "Lab report"', event)
+        await chunks.aclose()
+
+    async def test_requires_authentication(self):
+        await sync_to_async(self.async_client.logout)()
+        response = await self.async_client.get(self.url('events'))
+        self.assertEqual(response.status_code, 401)
+
+
+class TokenAuthTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client(enforce_csrf_checks=True)
+
+    def obtain(self, password=PASSWORD):
+        return self.client.post(self.url('token'), {'username': self.user.username, 'password': password,
+                                                    'name': 'Phone'})
+
+    def test_token_for_username_and_password(self):
+        response = self.obtain()
+        self.assertEqual(response.status_code, 201)
+        key = response.json()['token']
+
+        # No session and no CSRF token: the token alone authenticates writes
+        response = self.post(self.url('assignment_collection'),
+                             {'title': 'From a script', 'due_date': timezone.now().isoformat()},
+                             HTTP_AUTHORIZATION=f'Token {key}')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Assignment.objects.get(title='From a script').owner, self.user)
+
+        token = ApiToken.objects.get()
+        self.assertEqual(token.name, 'Phone')
+        self.assertIsNotNone(token.last_used_at)
+        self.assertNotIn(key, token.key_hash)
+
+    def test_wrong_password_or_token(self):
+        self.assertEqual(self.obtain(password='nope').status_code, 400)
+        response = self.client.get(self.url('assignment_collection'), HTTP_AUTHORIZATION='Token nope')
+        self.assertEqual(response.status_code, 401)
+
+    def test_revoked_token_stops_working(self):
+        key = self.obtain().json()['token']
+
+        self.assertEqual(self.client.delete(self.url('token'), HTTP_AUTHORIZATION=f'Bearer {key}').status_code, 204)
+        response = self.client.get(self.url('assignment_collection'), HTTP_AUTHORIZATION=f'Token {key}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_session_writes_still_need_the_csrf_token(self):
+        self.client.force_login(self.user)
+        data = {'title': 'Essay', 'due_date': timezone.now().isoformat()}
+
+        self.assertEqual(self.post(self.url('assignment_collection'), data).status_code, 403)
+
+        self.client.get(reverse('assignments:assignment_create'))  # Sets the CSRF cookie
+        csrf_token = self.client.cookies['csrftoken'].value
+        response = self.post(self.url('assignment_collection'), data, HTTP_X_CSRFTOKEN=csrf_token)
+        self.assertEqual(response.status_code, 201)
@@ -0,0 +1,22 @@
+from django.urls import include, path
+
+from . import views
+from .resources import ASSIGNMENTS, COURSES, GRADES
+
+app_name = 'api'
+
+v1_patterns = [
+    path('assignments/', views.collection, {'resource': ASSIGNMENTS}, name='assignment_collection'),
+    path('assignments/<int:pk>/', views.detail, {'resource': ASSIGNMENTS}, name='assignment_detail'),
+    path('courses/', views.collection, {'resource': COURSES}, name='course_collection'),
+    path('courses/<int:pk>/', views.detail, {'resource': COURSES}, name='course_detail'),
+    path('grades/', views.collection, {'resource': GRADES}, name='grade_collection'),
+    path('grades/<int:pk>/', views.detail, {'resource': GRADES}, name='grade_detail'),
+    path('token/', views.token, name='token'),
+    path('sync/', views.sync, name='sync'),
+    path('events/', views.events, name='events'),
+]
+
+urlpatterns = [
+    path('v1/', include((v1_patterns, 'v1'))),
+]
@@ -0,0 +1,430 @@
+# api/views.py
+"""
+Versioned JSON API (v1) over assignments, courses and grades.
+
+Collection endpoints support:
+- ?fields=a,b        sparse fieldsets
+- ?limit=&cursor=    keyset (cursor) pagination ordered by id
+- ?updated_since=    delta sync on the resource's auto-updated timestamp
+and accept a single object or a list of objects on POST; list items that carry
+an "id" update that row, the rest are created, all in one transaction.
+
+Reads run a fixed number of queries regardless of page size, and responses are
+tagged with the same per-user ETags as the HTML pages.
+
+Clients authenticate with the browser session (unsafe methods then need the
+CSRF token, as for any form) or with `Authorization: Token <key>`, which needs
+no CSRF token. Scripts and mobile apps get a key by POSTing a username and
+password to /api/v1/token/.
+"""
+
+import base64
+import binascii
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from core import events as live_events
+from core.changes import changes_since
+from core.conditional import user_data_condition
+from core.ratelimit import ratelimit
+from .models import ApiToken, hash_key
+from .resources import SYNC_RESOURCES
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, **extra):
+        super().__init__(message)
+        self.status = status
+        self.payload = {'error': message, **extra}
+
+
+def request_token(request):
+    """The key from an `Authorization: Token <key>` (or Bearer) header, if any."""
+    scheme, _, key = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() in ('token', 'bearer') and key.strip():
+        return key.strip()
+    return None
+
+
+def authenticated_user(request):
+    """The token's user for token requests, else the session user; None if neither is valid."""
+    key = request_token(request)
+    if key is not None:
+        api_token = ApiToken.authenticate(key)
+        return api_token.user if api_token else None
+    return request.user if request.user.is_authenticated else None
+
+
+def csrf_rejected(request):
+    """Runs the CSRF check that csrf_exempt skipped, for session-authenticated requests."""
+    check = CsrfViewMiddleware(lambda request: None)
+    check.process_request(request)
+    return check.process_view(request, None, (), {}) is not None
+
+
+def api_view(view):
+    """
+    Requires a token or an authenticated session (with a valid CSRF token for
+    unsafe methods) and converts ApiError into JSON responses.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        user = authenticated_user(request)
+        if user is None:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        if request_token(request) is not None:
+            request.user = user
+        elif csrf_rejected(request):
+            return JsonResponse({'error': 'CSRF verification failed.'}, status=403)
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as exc:
+            return JsonResponse(exc.payload, status=exc.status)
+    # Token clients have no CSRF cookie; session requests are checked above
+    return csrf_exempt(wrapper)
+
+
+def encode_cursor(pk):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise ApiError(400, 'Invalid cursor.')
+
+
+def selected_fields(request, resource):
+    """Parses ?fields=; 'id' is always included so clients can address rows."""
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(resource.fields)
+    fields = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = sorted(set(fields) - set(resource.fields))
+    if unknown:
+        raise ApiError(400, 'Unknown fields.', fields=unknown)
+    return ['id'] + [name for name in fields if name != 'id']
+
+
+def parse_body(request):
+    try:
+        return json.loads(request.body or b'null')
+    except ValueError:
+        raise ApiError(400, 'Request body must be valid JSON.')
+
+
+def write_object(request, resource, data, instance=None):
+    """Validates data with the resource's form and saves it, or raises ApiError."""
+    if not isinstance(data, dict):
+        raise ApiError(400, 'Each object must be a JSON object.')
+
+    # Omitted fields keep their stored values (updates) or model defaults (creates)
+    data = {**model_to_dict(instance if instance is not None else resource.model()), **data}
+
+    form = resource.get_form(request.user, data, instance=instance)
+    if not form.is_valid():
+        return None, form.errors.get_json_data()
+    return resource.save(form, request.user), None
+
+
+@api_view
+@require_http_methods(['GET', 'HEAD', 'POST'])
+@ratelimit('bulk', methods=['POST'])
+def collection(request, resource):
+    if request.method == 'POST':
+        return create_or_update(request, resource)
+    return list_objects(request, resource)
+
+
+@user_data_condition
+def list_objects(request, resource):
+    fields = selected_fields(request, resource)
+    queryset = resource.get_queryset(request.user)
+
+    updated_since = request.GET.get('updated_since')
+    if updated_since:
+        since = parse_datetime(updated_since)
+        if since is None:
+            raise ApiError(400, 'updated_since must be an ISO 8601 datetime.')
+        queryset = queryset.filter(**{f'{resource.updated_field}__gt': since})
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = queryset.filter(pk__gt=decode_cursor(cursor))
+
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, 'limit must be an integer.')
+    limit = max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+    # One query per page: fetch a single extra row to know whether there is more
+    rows = list(queryset.order_by('pk').values(*fields)[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]['id']) if len(rows) > limit else None
+
+    return JsonResponse({'results': rows[:limit], 'next_cursor': next_cursor})
+
+
+def create_or_update(request, resource):
+    payload = parse_body(request)
+    batch = isinstance(payload, list)
+    items = payload if batch else [payload]
+
+    if len(items) > settings.API_MAX_BATCH_SIZE:
+        raise ApiError(400, f'At most {settings.API_MAX_BATCH_SIZE} objects per request.')
+
+    # Load every row being updated with one query, scoped to the user
+    ids = [item['id'] for item in items if isinstance(item, dict) and item.get('id') is not None]
+    if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise ApiError(400, '"id" must be an integer.')
+    existing = resource.get_queryset(request.user).in_bulk(ids)
+
+    saved, errors = [], {}
+    with transaction.atomic():
+        for index, item in enumerate(items):
+            instance = None
+            if isinstance(item, dict) and item.get('id') is not None:
+                instance = existing.get(item['id'])
+                if instance is None:
+                    errors[index] = {'id': [{'message': 'Not found.', 'code': 'not_found'}]}
+                    continue
+            obj, item_errors = write_object(request, resource, item, instance)
+            if item_errors:
+                errors[index] = item_errors
+            else:
+                saved.append(obj.pk)
+
+        if errors:
+            # All-or-nothing: one invalid object rejects the whole batch
+            transaction.set_rollback(True)
+
+    if errors:
+        return JsonResponse({'errors': errors if batch else errors[0]}, status=400)
+
+    results = list(resource.get_queryset(request.user).filter(pk__in=saved).values(*resource.fields))
+    results.sort(key=lambda row: saved.index(row['id']))
+    if batch:
+        return JsonResponse({'results': results}, status=200)
+    return JsonResponse(results[0], status=200 if ids else 201)
+
+
+@api_view
+@require_http_methods(['GET', 'HEAD', 'PATCH', 'PUT', 'DELETE'])
+def detail(request, resource, pk):
+    queryset = resource.get_queryset(request.user)
+
+    if request.method in ('GET', 'HEAD'):
+        return get_object(request, resource, pk)
+
+    instance = queryset.filter(pk=pk).first()
+    if instance is None:
+        raise ApiError(404, 'Not found.')
+
+    if request.method == 'DELETE':
+        resource.delete(instance)
+        return HttpResponse(status=204)
+
+    payload = parse_body(request)
+    if not isinstance(payload, dict):
+        raise ApiError(400, 'Request body must be a JSON object.')
+    payload.pop('id', None)
+    with transaction.atomic():
+        obj, errors = write_object(request, resource, payload, instance)
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+    return JsonResponse(queryset.filter(pk=obj.pk).values(*resource.fields).get())
+
+
+@user_data_condition
+def get_object(request, resource, pk):
+    fields = selected_fields(request, resource)
+    row = resource.get_queryset(request.user).filter(pk=pk).values(*fields).first()
+    if row is None:
+        raise ApiError(404, 'Not found.')
+    return JsonResponse(row)
+
+
+@csrf_exempt
+@require_http_methods(['POST', 'DELETE'])
+@ratelimit('login', key='ip', methods=['POST'])
+@ratelimit('login_account', key='username', methods=['POST'])
+def token(request):
+    """
+    POST a form-encoded username and password (and optionally a name for the
+    client) to get a new token: 201 {"token": key}. The key is not shown
+    again. DELETE with `Authorization: Token <key>` revokes that token.
+    """
+    if request.method == 'DELETE':
+        key = request_token(request)
+        deleted = ApiToken.objects.filter(key_hash=hash_key(key)).delete()[0] if key else 0
+        if not deleted:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        return HttpResponse(status=204)
+
+    user = authenticate(request, username=request.POST.get('username'), password=request.POST.get('password'))
+    if user is None:
+        return JsonResponse({'error': 'Invalid username or password.'}, status=400)
+    _, key = ApiToken.issue(user, name=request.POST.get('name', '')[:100])
+    return JsonResponse({'token': key}, status=201)
+
+
+@api_view
+@require_http_methods(['GET', 'HEAD'])
+@user_data_condition
+def sync(request):
+    """
+    Returns changes after ?since=<revision>, with current data for live objects
+    and tombstones for deleted ones. Clients start without `since`, which
+    answers reset=true plus the current revision: they then load the
+    collections in full and continue syncing from that revision. A reset is
+    also requested when the cursor predates compacted tombstones.
+    """
+    try:
+        since = int(request.GET.get('since', -1))
+        limit = int(request.GET.get('limit', settings.API_MAX_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, 'since and limit must be integers.')
+    limit = max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+    profile = request.user.profile
+    if since < 0 or since < profile.tombstone_floor:
+        return JsonResponse({
+            'reset': True,
+            'revision': profile.data_version,
+            'has_more': False,
+            'changes': [],
+        })
+
+    changes, has_more = changes_since(request.user, since, limit)
+    return JsonResponse({
+        'reset': False,
+        'revision': changes[-1].revision if changes else since,
+        'has_more': has_more,
+        'changes': serialize_changes(request.user, changes),
+    })
+
+
+def serialize_changes(user, changes):
+    """Pairs change log rows with current data, using one query per object type."""
+    live_ids = {}
+    for change in changes:
+        if not change.deleted:
+            live_ids.setdefault(change.object_type, []).append(change.object_id)
+    rows = {}
+    for object_type, ids in live_ids.items():
+        resource = SYNC_RESOURCES[object_type]
+        for row in resource.get_queryset(user).filter(pk__in=ids).values(*resource.fields):
+            rows[object_type, row['id']] = row
+
+    payload = []
+    for change in changes:
+        data = None if change.deleted else rows.get((change.object_type, change.object_id))
+        payload.append({
+            'type': change.object_type,
+            'id': change.object_id,
+            'revision': change.revision,
+            # A row can vanish after its change was read; report it as deleted
+            'deleted': data is None,
+            'data': data,
+        })
+    return payload
+
+
+def format_events(changes):
+    """Renders serialized changes as SSE messages; the event id is the revision."""
+    return ''.join(
+        f'id: {change["revision"]}\nevent: change\n'
+        f'data: {json.dumps(change, cls=DjangoJSONEncoder)}\n\n'
+        for change in changes
+    )
+
+
+def format_reset(revision):
+    """SSE message telling the client to reload its data and resume from `revision`."""
+    return f'id: {revision}\nevent: reset\ndata: {json.dumps({"revision": revision})}\n\n'
+
+
+def pending_events(user, since):
+    """
+    Returns (sse_text, new_since, has_more) for at most one page
+    (API_MAX_PAGE_SIZE) of changes after `since`, so a client that fell far
+    behind is caught up in bounded batches.
+    """
+    changes, has_more = changes_since(user, since, settings.API_MAX_PAGE_SIZE)
+    if not changes:
+        return '', since, False
+    return format_events(serialize_changes(user, changes)), changes[-1].revision, has_more
+
+
+async def events(request):
+    """
+    Server-Sent Events stream of the user's changes (assignment updated, grade
+    recorded, ...), resumable through the standard Last-Event-ID header.
+
+    Under ASGI the connection stays open and is woken by core.events. Under
+    WSGI, where a long-lived stream would pin a worker, pending events are
+    returned at once and EventSource reconnects after the retry interval.
+    """
+    user = await sync_to_async(authenticated_user)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required.'}, status=401)
+
+    profile = user.profile
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    try:
+        since = int(last_event_id) if last_event_id else profile.data_version
+    except ValueError:
+        since = profile.data_version
+
+    # As in sync(): tombstones before the floor were compacted, so a client
+    # that far behind cannot catch up from the log and must reload instead
+    reset = ''
+    if since < 0 or since < profile.tombstone_floor:
+        since = profile.data_version
+        reset = format_reset(since)
+
+    retry_ms = settings.LIVE_EVENTS_RETRY_MS
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+    if not isinstance(request, ASGIRequest):
+        text, since, has_more = await sync_to_async(pending_events)(user, since)
+        return HttpResponse(
+            # Reconnect at once while a backlog remains
+            f'retry: {0 if has_more else retry_ms}\n\n{reset}{text}',
+            content_type='text/event-stream',
+            headers=headers,
+        )
+
+    async def stream():
+        nonlocal since
+        live_events.get_backend()
+        subscription = live_events.broker.subscribe(user.pk)
+        try:
+            yield f'retry: {retry_ms}\n\n{reset}'
+            while True:
+                text, since, has_more = await sync_to_async(pending_events)(user, since)
+                if text:
+                    yield text
+                if has_more:
+                    continue
+                if not await subscription.wait(settings.LIVE_EVENTS_HEARTBEAT):
+                    yield ': keep-alive\n\n'
+        finally:
+            live_events.broker.unsubscribe(subscription)
+
+    return StreamingHttpResponse(stream(), content_type='text/event-stream', headers=headers)
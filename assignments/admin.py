@@ -1,7 +1,19 @@
 # assignments/admin.py
 from django.contrib import admin
 from django.utils import timezone
-from .models import Assignment
+from .models import STATUSES, Assignment, AssignmentSeries
+
+
+class StatusListFilter(admin.SimpleListFilter):
+    title = 'status'
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return STATUSES
+
+    def queryset(self, request, queryset):
+        return queryset.by_status(self.value()) if self.value() else queryset
+
 
 @admin.register(Assignment)
 class AssignmentAdmin(admin.ModelAdmin):
@@ -11,11 +23,15 @@ class AssignmentAdmin(admin.ModelAdmin):
         'course',
         'due_date',
         'completed',
-        'status_display',
+        'status',
+        'priority',
+        'urgency',
         'is_overdue'
     )
     list_filter = (
+        StatusListFilter,
         'completed',
+        'priority',
         'course',
         'owner',
         'due_date'
@@ -34,4 +50,27 @@ class AssignmentAdmin(admin.ModelAdmin):
         ('Dates & Status', {
             'fields': ('due_date', 'completed', 'created_at', 'is_overdue', 'status_display')
         }),
-    )
\ No newline at end of file
+        ('Urgency', {
+            'fields': ('priority', 'grade_weight')
+        }),
+    )
+
+    def get_queryset(self, request):
+        # Computed in SQL so the changelist can sort on them
+        return super().get_queryset(request).with_status().with_urgency()
+
+    @admin.display(description='Status', ordering='status_rank')
+    def status(self, obj):
+        return dict(STATUSES)[obj.status]
+
+    @admin.display(description='Urgency', ordering='urgency')
+    def urgency(self, obj):
+        return round(obj.urgency, 1)
+
+
+@admin.register(AssignmentSeries)
+class AssignmentSeriesAdmin(admin.ModelAdmin):
+    list_display = ('title', 'owner', 'course', 'dtstart', 'frequency', 'interval', 'ends_at')
+    list_filter = ('frequency', 'course', 'owner')
+    search_fields = ('title', 'description', 'owner__username')
+    readonly_fields = ('ends_at', 'created_at', 'updated_at')
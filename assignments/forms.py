@@ -1,26 +1,43 @@
 # assignments/forms.py
 
 from django import forms
-from .models import Assignment
-from courses.models import Course
+from .models import Assignment, AssignmentSeries, AssignmentTemplate
+from courses.forms import CourseChoiceField
 
 
-class AssignmentForm(forms.ModelForm):
+class CourseDirectoryMixin:
+    """
+    For model forms whose `course` is a CourseChoiceField. The choice has
+    already been checked against the user's own courses, in the course
+    directory that every worker shares, so the model-level foreign key check
+    (another query) is skipped.
+    """
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        exclude.add('course')
+        return exclude
+
+
+class AssignmentForm(CourseDirectoryMixin, forms.ModelForm):
     """
     Form for creating or updating an assignment.
-    Filters course choices to only those owned by the current user
-    and applies consistent Bootstrap styling across all fields.
+    Limits course choices to the current user's courses (from their cached
+    course directory) and applies consistent Bootstrap styling across all fields.
     """
 
+    course = CourseChoiceField(required=False, empty_label='Select a course (optional)')
+
     class Meta:
         model = Assignment
-        fields = ['title', 'description', 'due_date', 'course']
+        fields = ['title', 'description', 'due_date', 'course', 'priority', 'grade_weight']
         widgets = {
             'due_date': forms.DateTimeInput(attrs={
                 'type': 'datetime-local',
                 'class': 'form-control',
                 'placeholder': 'Select due date and time',
             }),
+            'grade_weight': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1', 'min': '0'}),
         }
 
     def __init__(self, *args, **kwargs):
@@ -31,18 +48,28 @@ class AssignmentForm(forms.ModelForm):
         # Apply consistent Bootstrap classes to all form fields
         self._add_bootstrap_classes()
 
-        # Restrict course choices to the current user's courses
-        if user:
-            self.fields['course'].queryset = Course.objects.filter(owner=user)
+        # A class copy stays in the teacher's course, which is not the student's
+        # to choose (or to offer); other assignments pick one of the user's courses
+        if self.instance.template_id:
+            del self.fields['course']
         else:
-            self.fields['course'].queryset = Course.objects.none()
-
-        # Customize the empty option label for better UX
-        self.fields['course'].empty_label = 'Select a course (optional)'
+            self.fields['course'].set_owner(user)
 
         # Autofocus the title field for faster input
         self.fields['title'].widget.attrs['autofocus'] = True
 
+        # Urgency inputs may be left out (older clients); they keep their current values
+        for name in ('priority', 'grade_weight'):
+            self.fields[name].required = False
+
+    def clean_priority(self):
+        priority = self.cleaned_data['priority']
+        return self.instance.priority if priority is None else priority
+
+    def clean_grade_weight(self):
+        weight = self.cleaned_data['grade_weight']
+        return self.instance.grade_weight if weight is None else weight
+
     def _add_bootstrap_classes(self):
         """Applies Bootstrap CSS classes and placeholders for consistent UI."""
         self.fields['title'].widget.attrs.update({
@@ -57,6 +84,74 @@ class AssignmentForm(forms.ModelForm):
         })
 
         # Use 'form-select' for <select> elements per Bootstrap 5 standards
-        self.fields['course'].widget.attrs.update({
-            'class': 'form-select',
-        })
\ No newline at end of file
+        for name in ('course', 'priority'):
+            self.fields[name].widget.attrs.update({
+                'class': 'form-select',
+            })
+
+
+class AssignmentSeriesForm(CourseDirectoryMixin, forms.ModelForm):
+    """
+    Form for a recurring assignment. A series ends either on a date (`until`)
+    or after a number of occurrences (`count`), as in an iCalendar RRULE.
+    """
+
+    course = CourseChoiceField(required=False, empty_label='Select a course (optional)')
+
+    class Meta:
+        model = AssignmentSeries
+        fields = ['title', 'description', 'course', 'dtstart', 'frequency', 'interval', 'until', 'count']
+        labels = {
+            'dtstart': 'First due date',
+            'interval': 'Repeat every',
+            'until': 'Ends on (optional)',
+            'count': 'Number of occurrences (optional)',
+        }
+        help_texts = {
+            'interval': 'E.g. 2 with a weekly frequency repeats every other week.',
+        }
+        widgets = {
+            'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
+            'dtstart': forms.DateTimeInput(attrs={'type': 'datetime-local', 'class': 'form-control'}),
+            'until': forms.DateTimeInput(attrs={'type': 'datetime-local', 'class': 'form-control'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
+        super().__init__(*args, **kwargs)
+
+        for name in ('title', 'interval', 'count'):
+            self.fields[name].widget.attrs['class'] = 'form-control'
+        for name in ('course', 'frequency'):
+            self.fields[name].widget.attrs['class'] = 'form-select'
+
+        self.fields['course'].set_owner(user)
+        self.fields['interval'].min_value = 1
+        self.fields['interval'].widget.attrs['min'] = 1
+
+    def clean(self):
+        cleaned_data = super().clean()
+        dtstart = cleaned_data.get('dtstart')
+        until = cleaned_data.get('until')
+
+        if until and cleaned_data.get('count'):
+            raise forms.ValidationError('Choose either an end date or a number of occurrences, not both.')
+        if until and dtstart and until < dtstart:
+            self.add_error('until', 'The end date must be after the first due date.')
+        if cleaned_data.get('interval') == 0:
+            self.add_error('interval', 'Must be at least 1.')
+        return cleaned_data
+
+
+class AssignmentTemplateForm(forms.ModelForm):
+    """Form for a class assignment that is published to every enrolled student."""
+
+    class Meta:
+        model = AssignmentTemplate
+        fields = ['title', 'description', 'due_date', 'max_score']
+        widgets = {
+            'title': forms.TextInput(attrs={'class': 'form-control'}),
+            'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
+            'due_date': forms.DateTimeInput(attrs={'type': 'datetime-local', 'class': 'form-control'}),
+            'max_score': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1'}),
+        }
@@ -0,0 +1,60 @@
+# assignments/fragments.py
+"""
+Per-assignment HTML fragment caching for the assignment list.
+
+Each card is cached under a key built from the assignment id, its updated_at
+stamp, the course name and the grade's id and graded_at stamp, so any save of
+the assignment, course rename or grade change (which need not touch the
+assignment, e.g. regrading a completed one) produces a new key. The active
+timezone is part of the key too, since due dates are rendered in local time. A list of N cards costs a
+single cache.get_many(); only missing cards are rendered and stored with one
+cache.set_many().
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'assignments/_card.html'
+
+
+def card_cache_key(assignment):
+    """Cache key for an assignment card; matches {% cache ... assignment_card %}."""
+    course_name = assignment.course.name if assignment.course_id else ''
+    grade = getattr(assignment, 'grade', None)
+    return make_template_fragment_key(
+        'assignment_card',
+        [
+            assignment.pk, assignment.updated_at.isoformat(), course_name,
+            grade.pk if grade else '', grade.graded_at.isoformat() if grade else '',
+            timezone.get_current_timezone_name(),
+        ],
+    )
+
+
+def render_assignment_cards(assignments, request=None):
+    """
+    Returns the rendered card HTML for each assignment, in order.
+    Assignments should be loaded with select_related('course', 'grade').
+    """
+    assignments = list(assignments)
+    keys = [card_cache_key(a) for a in assignments]
+    cached = cache.get_many(keys)
+
+    template = None
+    missing = {}
+    cards = []
+    for assignment, key in zip(assignments, keys):
+        html = cached.get(key)
+        if html is None:
+            template = template or get_template(CARD_TEMPLATE)
+            html = template.render({'a': assignment}, request)
+            missing[key] = html
+        cards.append(mark_safe(html))
+
+    if missing:
+        cache.set_many(missing, settings.FRAGMENT_CACHE_TIMEOUT)
+    return cards
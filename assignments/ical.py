@@ -0,0 +1,99 @@
+# assignments/ical.py
+"""
+iCalendar (.ics) rendering of a user's open assignments and series, shared by
+the calendar feed (assignments.views.export_calendar) and the account data
+export (accounts.export).
+
+One-off due dates use UTC timestamps for compatibility with calendar apps
+like Google Calendar. Each recurring series is a single VEVENT with an RRULE,
+anchored in the user's timezone (TZID) so occurrences keep their local time
+across DST changes, as they do in the app: completed occurrences are excluded
+with EXDATE, and materialized open ones are emitted as overrides
+(RECURRENCE-ID) of the series event.
+"""
+
+import itertools
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.utils import timezone
+
+from core.paging import keyset_pages
+from .models import Assignment, AssignmentSeries
+
+
+def calendar_lines(user, local_tz, page_size=1000):
+    """
+    Yields the lines of the user's calendar, with local times in local_tz.
+    Assignments are read page_size at a time, with no cursor held between pages.
+    """
+    utc = ZoneInfo("UTC")
+
+    yield from [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Homework Tracker//YourApp//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-TIMEZONE:{local_tz.key}",
+    ]
+
+    def utc_str(value):
+        return value.astimezone(utc).strftime("%Y%m%dT%H%M%SZ")
+
+    def local_prop(name, *values):
+        stamps = ",".join(timezone.localtime(v, local_tz).strftime("%Y%m%dT%H%M%S") for v in values)
+        return f"{name};TZID={local_tz.key}:{stamps}"
+
+    dtstamp = datetime.now(utc).strftime('%Y%m%dT%H%M%SZ')
+
+    pending = Assignment.objects.active().filter(owner=user, completed=False)
+    for assignment in itertools.chain.from_iterable(keyset_pages(pending, page_size)):
+        if not assignment.due_date:
+            continue
+
+        dt_str = utc_str(assignment.due_date)
+        if assignment.series_id:
+            identity = [
+                f"UID:series-{assignment.series_id}@homeworktracker",
+                local_prop("RECURRENCE-ID", assignment.occurrence_date),
+            ]
+        else:
+            identity = [f"UID:assignment-{assignment.id}@homeworktracker"]
+        yield from [
+            "BEGIN:VEVENT",
+            *identity,
+            f"SUMMARY:{assignment.title}",
+            f"DESCRIPTION:{assignment.description or 'No description'}",
+            f"DTSTART:{dt_str}",
+            f"DTEND:{dt_str}",
+            f"DTSTAMP:{dtstamp}",
+            "END:VEVENT"
+        ]
+
+    # Archived occurrences included: the RRULE would otherwise bring them back
+    completed_occurrences = {}
+    for series_id, occurrence_date in Assignment.objects.filter(
+        owner=user, series__isnull=False, completed=True
+    ).values_list('series_id', 'occurrence_date'):
+        completed_occurrences.setdefault(series_id, []).append(occurrence_date)
+
+    for series in AssignmentSeries.objects.filter(owner=user):
+        yield from [
+            "BEGIN:VEVENT",
+            f"UID:series-{series.id}@homeworktracker",
+            f"SUMMARY:{series.title}",
+            f"DESCRIPTION:{series.description or 'No description'}",
+            local_prop("DTSTART", series.dtstart),
+            local_prop("DTEND", series.dtstart),
+            f"RRULE:{series.rrule}",
+        ]
+        excluded = completed_occurrences.get(series.id)
+        if excluded:
+            yield local_prop("EXDATE", *sorted(excluded))
+        yield from [
+            f"DTSTAMP:{dtstamp}",
+            "END:VEVENT"
+        ]
+
+    yield "END:VCALENDAR"
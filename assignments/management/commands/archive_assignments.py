@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from assignments.models import Assignment
+from core.changes import record_bulk_changes
+from core.models import Change
+
+
+class Command(BaseCommand):
+    help = (
+        'Archives completed assignments due before the cutoff, so the dashboard, '
+        'calendar and default list only read the active set. Rows are archived '
+        'in batches, each in its own transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=settings.ASSIGNMENT_ARCHIVE_AFTER_DAYS,
+            help='Age in days (by due date) after which completed assignments are archived '
+                 f'(default: {settings.ASSIGNMENT_ARCHIVE_AFTER_DAYS}).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Assignments archived per transaction (default: 500).',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        candidates = Assignment.objects.active().filter(completed=True, due_date__lt=cutoff)
+        archived = 0
+
+        while True:
+            # Short transactions keep write locks brief on a live database
+            with transaction.atomic():
+                batch = list(candidates.order_by('pk').values_list('pk', 'owner_id')[:options['batch_size']])
+                if not batch:
+                    break
+                candidates.filter(pk__in=[pk for pk, _ in batch]).update(archived=True, updated_at=timezone.now())
+                # Bulk updates bypass the save signals; log the rows for sync and ETags
+                record_bulk_changes((owner_id, Change.ASSIGNMENT, pk) for pk, owner_id in batch)
+            archived += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} assignment(s).'))
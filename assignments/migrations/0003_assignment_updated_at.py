@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0002_assignment_course'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.27 on 2026-10-19 12:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_course_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assignments', '0003_assignment_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('dtstart', models.DateTimeField()),
+                ('frequency', models.CharField(choices=[('DAILY', 'Daily'), ('WEEKLY', 'Weekly')], default='WEEKLY', max_length=10)),
+                ('interval', models.PositiveSmallIntegerField(default=1)),
+                ('until', models.DateTimeField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(blank=True, null=True)),
+                ('ends_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['dtstart'],
+            },
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='occurrence_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assignmentseries',
+            name='course',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='assignmentseries',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='materialized', to='assignments.assignmentseries'),
+        ),
+        migrations.AddConstraint(
+            model_name='assignment',
+            constraint=models.UniqueConstraint(condition=models.Q(('series__isnull', False)), fields=('series', 'occurrence_date'), name='unique_series_occurrence'),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentseries',
+            index=models.Index(fields=['owner', 'dtstart'], name='series_owner_dtstart_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.27 on 2026-10-19 12:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_enrollment'),
+        ('assignments', '0004_assignment_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('due_date', models.DateTimeField()),
+                ('max_score', models.FloatField(default=100.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='templates', to='courses.course')),
+            ],
+            options={
+                'ordering': ['due_date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='assignments.assignmenttemplate'),
+        ),
+    ]
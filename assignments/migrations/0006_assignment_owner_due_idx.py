@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-19 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0005_assignment_template'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['owner', 'due_date'], name='assignment_owner_due_idx'),
+        ),
+    ]
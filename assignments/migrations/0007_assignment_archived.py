@@ -0,0 +1,26 @@
+# Generated by Django 4.2.27 on 2026-10-19 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0006_assignment_owner_due_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='assignment',
+            name='assignment_owner_due_idx',
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['owner', 'due_date'], name='assignment_active_due_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.27 on 2026-10-19 13:16
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0007_assignment_archived'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='grade_weight',
+            field=models.FloatField(default=1.0, help_text='How much this counts toward the course grade, relative to other assignments.', validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Low'), (2, 'Normal'), (3, 'High')], default=2),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['owner', 'completed', 'due_date'], name='assignment_status_due_idx'),
+        ),
+    ]
@@ -1,9 +1,113 @@
+from datetime import timedelta
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.core.validators import MinValueValidator
 from django.utils import timezone
 
+from core.models import ChangeTrackedModel, DirtyFieldsMixin
+
+
+PENDING = 'pending'
+OVERDUE = 'overdue'
+COMPLETED = 'completed'
+STATUSES = [(OVERDUE, 'Overdue'), (PENDING, 'Pending'), (COMPLETED, 'Completed')]
+
+# Urgency of open work by time left until the due date: (due before now + delta, score).
+# Overdue work scores highest; anything due later than the last step scores 1.
+URGENCY_STEPS = [
+    (timedelta(0), 8),
+    (timedelta(days=1), 5),
+    (timedelta(days=3), 3),
+    (timedelta(days=7), 2),
+]
+
+
+def status_expression(now):
+    """SQL for Assignment.status_display, as one of STATUSES' values."""
+    return models.Case(
+        models.When(completed=True, then=models.Value(COMPLETED)),
+        models.When(due_date__lt=now, then=models.Value(OVERDUE)),
+        default=models.Value(PENDING),
+        output_field=models.CharField(),
+    )
+
+
+def status_rank_expression(now):
+    """Sorts overdue, then pending, then completed work."""
+    return models.Case(
+        models.When(completed=True, then=models.Value(2)),
+        models.When(due_date__lt=now, then=models.Value(0)),
+        default=models.Value(1),
+        output_field=models.IntegerField(),
+    )
+
+
+def urgency_expression(now):
+    """
+    SQL for the urgency score: the time-left score from URGENCY_STEPS (0 once
+    completed) times the assignment's priority, its course's weight and its
+    grade weight.
+    """
+    time_score = models.Case(
+        models.When(completed=True, then=models.Value(0)),
+        *[models.When(due_date__lt=now + delta, then=models.Value(score)) for delta, score in URGENCY_STEPS],
+        default=models.Value(1),
+        output_field=models.IntegerField(),
+    )
+    return models.ExpressionWrapper(
+        time_score
+        * models.F('priority')
+        * Coalesce(models.F('course__weight'), 1)
+        * models.F('grade_weight'),
+        output_field=models.FloatField(),
+    )
+
+
+def grade_percentage_expression():
+    """SQL for Grade.percentage through the assignment's grade; null when ungraded."""
+    return models.Case(
+        models.When(grade__max_score=0, then=models.Value(0.0)),
+        default=models.F('grade__score') * 100.0 / models.F('grade__max_score'),
+        output_field=models.FloatField(),
+    )
+
+
+class AssignmentQuerySet(models.QuerySet):
+
+    def active(self):
+        """Excludes archived assignments; served by the partial (owner, due_date) index."""
+        return self.filter(archived=False)
 
-class Assignment(models.Model):
+    def with_status(self, now=None):
+        """Annotates `status` and `status_rank` (see status_expression)."""
+        now = now or timezone.now()
+        return self.annotate(status=status_expression(now), status_rank=status_rank_expression(now))
+
+    def with_urgency(self, now=None):
+        """Annotates the `urgency` score (see urgency_expression)."""
+        return self.annotate(urgency=urgency_expression(now or timezone.now()))
+
+    def with_grade_percentage(self):
+        return self.annotate(grade_percentage=grade_percentage_expression())
+
+    def by_status(self, status, now=None):
+        """
+        Filters to one status with plain column predicates rather than the
+        annotation, so the (owner, completed, due_date) index applies.
+        """
+        now = now or timezone.now()
+        if status == COMPLETED:
+            return self.filter(completed=True)
+        if status == OVERDUE:
+            return self.filter(completed=False, due_date__lt=now)
+        if status == PENDING:
+            return self.filter(completed=False, due_date__gte=now)
+        return self
+
+
+class Assignment(DirtyFieldsMixin, ChangeTrackedModel):
     """Represents a user-created task with a deadline, optionally linked to a course."""
 
     # Basic info
@@ -14,6 +118,21 @@ class Assignment(models.Model):
     due_date = models.DateTimeField()  # Deadline for completion
     completed = models.BooleanField(default=False)  # Manually toggled by user
     created_at = models.DateTimeField(auto_now_add=True)  # Auto-set on creation
+    updated_at = models.DateTimeField(auto_now=True)  # Bumped on every save; keys cached fragments
+
+    # Old completed assignments are archived (manage.py archive_assignments) and
+    # left out of the dashboard, calendar and default list
+    archived = models.BooleanField(default=False)
+
+    # Inputs to the urgency score (urgency_expression) alongside the course's weight
+    LOW, NORMAL, HIGH = 1, 2, 3
+    PRIORITIES = [(LOW, 'Low'), (NORMAL, 'Normal'), (HIGH, 'High')]
+    priority = models.PositiveSmallIntegerField(choices=PRIORITIES, default=NORMAL)
+    grade_weight = models.FloatField(
+        default=1.0,
+        validators=[MinValueValidator(0)],
+        help_text='How much this counts toward the course grade, relative to other assignments.',
+    )
 
     # Ownership and organization
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -24,11 +143,61 @@ class Assignment(models.Model):
         blank=True  # Assignment can exist outside any course ("uncategorized")
     )
 
+    # Set when this row materializes one occurrence of a recurring series
+    series = models.ForeignKey(
+        'assignments.AssignmentSeries',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='materialized',
+    )
+    occurrence_date = models.DateTimeField(null=True, blank=True)  # Original due date in the series
+
+    # Set on a student's copy of a class assignment published by the teacher
+    template = models.ForeignKey(
+        'assignments.AssignmentTemplate',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='assignments',
+    )
+
+    objects = AssignmentQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
     class Meta:
         ordering = ['due_date']  # Default sort: soonest due first
+        indexes = [
+            # Per-user due-date windows (dashboard upcoming list, calendar). Partial, so
+            # it only covers the active set and does not grow with archived history
+            models.Index(
+                fields=['owner', 'due_date'],
+                condition=models.Q(archived=False),
+                name='assignment_active_due_idx',
+            ),
+            # Status filters of the list (AssignmentQuerySet.by_status), in due-date order
+            models.Index(
+                fields=['owner', 'completed', 'due_date'],
+                condition=models.Q(archived=False),
+                name='assignment_status_due_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['series', 'occurrence_date'],
+                condition=models.Q(series__isnull=False),
+                name='unique_series_occurrence',
+            ),
+        ]
+
+    @property
+    def occurrence_timestamp(self):
+        """Unix timestamp identifying this occurrence within its series (used in URLs)."""
+        if self.occurrence_date is None:
+            return None
+        return int(self.occurrence_date.timestamp())
 
     @property
     def is_overdue(self):
@@ -46,4 +215,165 @@ class Assignment(models.Model):
         elif self.is_overdue:
             return "Overdue"
         else:
-            return "Pending"
\ No newline at end of file
+            return "Pending"
+
+
+class AssignmentSeries(models.Model):
+    """
+    A recurring assignment (RRULE-style: daily or weekly, every `interval`
+    periods, ending at `until` or after `count` occurrences).
+
+    Occurrences are not stored. They are expanded on demand within a date
+    window, and an Assignment row is only materialized once the user completes
+    or grades an occurrence.
+    """
+
+    DAILY = 'DAILY'
+    WEEKLY = 'WEEKLY'
+    FREQUENCIES = [
+        (DAILY, 'Daily'),
+        (WEEKLY, 'Weekly'),
+    ]
+
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE, null=True, blank=True)
+
+    # Recurrence rule
+    dtstart = models.DateTimeField()  # Due date of the first occurrence
+    frequency = models.CharField(max_length=10, choices=FREQUENCIES, default=WEEKLY)
+    interval = models.PositiveSmallIntegerField(default=1)  # e.g. 2 with WEEKLY = biweekly
+    until = models.DateTimeField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True, editable=False)  # Last occurrence; null = open-ended
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['dtstart']
+        indexes = [
+            models.Index(fields=['owner', 'dtstart'], name='series_owner_dtstart_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def save(self, *args, **kwargs):
+        # Occurrences are addressed by whole-second timestamps in URLs
+        self.dtstart = self.dtstart.replace(microsecond=0)
+        # Stored so window queries can skip finished series in SQL
+        self.ends_at = self._compute_ends_at()
+        super().save(*args, **kwargs)
+
+    @property
+    def step(self):
+        if self.frequency == self.DAILY:
+            return timedelta(days=self.interval)
+        return timedelta(weeks=self.interval)
+
+    @property
+    def rrule(self):
+        """The recurrence as an iCalendar RRULE value."""
+        parts = [f"FREQ={self.frequency}", f"INTERVAL={self.interval}"]
+        if self.count:
+            parts.append(f"COUNT={self.count}")
+        elif self.until:
+            parts.append(f"UNTIL={self.until.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}")
+        return ';'.join(parts)
+
+    def occurrence_at(self, index):
+        """
+        Due date of the index-th occurrence. Steps are taken in local wall-clock
+        time, so a 9:00 deadline stays at 9:00 across DST changes.
+        """
+        tz = timezone.get_current_timezone()
+        first = timezone.localtime(self.dtstart, tz).replace(tzinfo=None)
+        return timezone.make_aware(first + index * self.step, tz)
+
+    def occurrence_dates(self, start, end):
+        """Yields due dates of occurrences in [start, end), jumping straight to the window."""
+        # One step of slack absorbs DST offsets between UTC and wall-clock arithmetic
+        index = max(0, (start - self.dtstart) // self.step - 1)
+        while not (self.count and index >= self.count):
+            due = self.occurrence_at(index)
+            if due >= end or (self.until and due > self.until):
+                break
+            if due >= start:
+                yield due
+            index += 1
+
+    def is_occurrence(self, due):
+        return next(self.occurrence_dates(due, due + timedelta(seconds=1)), None) == due
+
+    def build_occurrence(self, due):
+        """An unsaved Assignment standing in for one occurrence."""
+        return Assignment(
+            title=self.title,
+            description=self.description,
+            owner_id=self.owner_id,
+            course=self.course,
+            due_date=due,
+            series=self,
+            occurrence_date=due,
+            updated_at=self.updated_at,
+        )
+
+    def materialize(self, due, **fields):
+        """Returns (assignment, created) for an occurrence, creating its row if needed."""
+        occurrence = self.build_occurrence(due)
+        defaults = {
+            'title': occurrence.title,
+            'description': occurrence.description,
+            'owner_id': self.owner_id,
+            'course_id': self.course_id,
+            'due_date': due,
+            **fields,
+        }
+        assignment, created = Assignment.objects.get_or_create(
+            series=self, occurrence_date=due, defaults=defaults,
+        )
+        if not created and fields:
+            for name, value in fields.items():
+                setattr(assignment, name, value)
+            assignment.save()
+        return assignment, created
+
+    def _compute_ends_at(self):
+        last = self.occurrence_at(self.count - 1) if self.count else None
+        if self.until and (last is None or self.until < last):
+            return self.until
+        return last
+
+
+class AssignmentTemplate(models.Model):
+    """
+    A class assignment published by the teacher (the course owner). Every
+    enrolled student gets their own Assignment copy, which they complete like
+    any other; the teacher grades the copies together in the gradebook.
+    """
+
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE, related_name='templates')
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    due_date = models.DateTimeField()
+    max_score = models.FloatField(default=100.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['due_date']
+
+    def __str__(self):
+        return self.title
+
+    def build_assignment(self, student_id):
+        """An unsaved copy of this template for one student."""
+        return Assignment(
+            title=self.title,
+            description=self.description,
+            due_date=self.due_date,
+            owner_id=student_id,
+            course=self.course,
+            template=self,
+        )
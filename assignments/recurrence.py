@@ -0,0 +1,39 @@
+# assignments/recurrence.py
+"""
+Lazy expansion of recurring assignments.
+
+Series occurrences are computed only for the requested date window and
+returned as unsaved Assignment instances, so lists, the calendar and reminders
+can treat them like regular assignments. Occurrences the user has already
+completed or graded exist as real Assignment rows and are skipped here.
+"""
+
+from django.db.models import Q
+
+from .models import Assignment, AssignmentSeries
+
+
+def expand_occurrences(user, start, end):
+    """Unmaterialized occurrences of the user's series due in [start, end), by due date."""
+    series_list = list(
+        AssignmentSeries.objects
+        .filter(owner=user, dtstart__lt=end)
+        .filter(Q(ends_at__isnull=True) | Q(ends_at__gte=start))
+        .select_related('course')
+    )
+    if not series_list:
+        return []
+
+    materialized = set(
+        Assignment.objects
+        .filter(series__in=series_list, occurrence_date__gte=start, occurrence_date__lt=end)
+        .values_list('series_id', 'occurrence_date')
+    )
+    occurrences = [
+        series.build_occurrence(due)
+        for series in series_list
+        for due in series.occurrence_dates(start, end)
+        if (series.pk, due) not in materialized
+    ]
+    occurrences.sort(key=lambda occurrence: occurrence.due_date)
+    return occurrences
@@ -1,3 +1,413 @@
-from django.test import TestCase
+import re
+from datetime import timedelta
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.factories import (
+    NETWORK_CACHE_SETTINGS, CacheClearingTestCase, make_assignment, make_course, make_grade, make_series, make_user,
+)
+from .models import COMPLETED, OVERDUE, PENDING, Assignment, AssignmentSeries
+
+
+def form_datetime(value):
+    """A datetime as posted by a datetime-local input."""
+    return timezone.localtime(value).strftime('%Y-%m-%dT%H:%M')
+
+
+class AssignmentListViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.math = make_course(cls.user, name='Mathematics')
+        cls.physics = make_course(cls.user, name='Physics')
+        for course in (cls.math, cls.physics):
+            make_grade(make_assignment(cls.user, course=course, title='Problem set', completed=True))
+            make_assignment(cls.user, course=course, title='Lab report')
+        cls.loose = make_assignment(cls.user, title='Reading')
+        make_series(cls.user, title='Weekly quiz')
+        make_assignment(make_user(), title='Not mine')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def get(self, **params):
+        return self.client.get(reverse('assignments:assignment_list'), params)
+
+    def test_lists_own_assignments(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Lab report', count=2)
+        self.assertNotContains(response, 'Not mine')
+        self.assertEqual([o.title for o in response.context['next_occurrences']], ['Weekly quiz'])
+
+    def test_search(self):
+        response = self.get(q='physics')
+
+        self.assertContains(response, 'Lab report', count=1)
+        self.assertNotContains(response, 'Reading')
+
+    def test_uncategorized_filter(self):
+        response = self.get(course='uncategorized')
+
+        self.assertContains(response, 'Reading')
+        self.assertNotContains(response, 'Lab report')
+
+    def test_archived_assignments_are_opt_in(self):
+        make_assignment(self.user, title='Old essay', completed=True, archived=True)
+
+        self.assertNotContains(self.get(), 'Old essay')
+        self.assertContains(self.get(archived='1'), 'Old essay')
+
+    def test_query_count(self):
+        # Courses and grades are joined in, so this does not grow with the list
+        # (the first two are the session and the user)
+        with self.assertNumQueries(6):
+            self.get()
+
+    def test_status_filter(self):
+        overdue = make_assignment(self.user, days=-1, title='Late lab')
+
+        response = self.get(status=OVERDUE)
+        self.assertContains(response, 'Late lab')
+        self.assertNotContains(response, 'Lab report')
+        self.assertEqual(self.card_ids(response), [overdue.pk])
+
+    def test_sorts_are_computed_in_sql(self):
+        urgent = make_assignment(self.user, days=2, title='Urgent', priority=Assignment.HIGH, course=self.physics)
+        self.get()  # Caches the course directory
+        # Each sort is one more ORDER BY (and annotation) on the same queries as the default:
+        # the session, the user and three for the page
+        for sort in ('due', 'urgency', 'status', 'grade'):
+            with self.assertNumQueries(5):
+                response = self.get(sort=sort)
+            self.assertEqual(len(self.card_ids(response)), 6)
+
+        self.assertEqual(self.card_ids(self.get(sort='urgency'))[0], urgent.pk)
+        # Graded (completed) work first by grade, then the rest by due date
+        self.assertEqual(self.card_ids(self.get(sort='grade'))[2], urgent.pk)
+
+    def test_regrading_refreshes_the_card(self):
+        grade = Assignment.objects.get(course=self.math, title='Problem set').grade
+        self.get()
+
+        # The assignment is already completed, so only the grade row changes
+        grade.score = 55
+        grade.save()
+        self.assertContains(self.get(), '55.0 / 100.0')
+
+    def test_cards_follow_the_users_timezone(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):  # Drops the cached user
+            self.user.profile.timezone = 'America/New_York'
+            self.user.profile.save()
+
+        due = timezone.localtime(self.loose.due_date, ZoneInfo('America/New_York'))
+        self.assertContains(self.get(), f'Due: <strong>{due:%Y-%m-%d %H:%M}</strong>')
+
+    def card_ids(self, response):
+        return [int(re.search(r'data-assignment-card="(\d+)"', card).group(1))
+                for card in response.context['assignment_cards']]
+
+
+class UrgencyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        heavy = make_course(cls.user, weight=3)
+        cls.overdue = make_assignment(cls.user, days=-1)
+        cls.tomorrow_heavy = make_assignment(cls.user, days=0.5, course=heavy)
+        cls.tomorrow = make_assignment(cls.user, days=0.5)
+        cls.next_week_high = make_assignment(cls.user, days=5, priority=Assignment.HIGH)
+        cls.next_month = make_assignment(cls.user, days=30)
+        cls.done = make_assignment(cls.user, days=-2, completed=True)
+        make_grade(cls.done, score=45, max_score=50)
+
+    def test_urgency_ranks_time_left_priority_and_weight(self):
+        ranked = Assignment.objects.with_urgency().order_by('-urgency', 'due_date')
+        self.assertEqual(list(ranked), [
+            self.tomorrow_heavy, self.overdue, self.tomorrow, self.next_week_high, self.next_month, self.done,
+        ])
+        self.assertEqual(ranked.get(pk=self.tomorrow_heavy.pk).urgency, 5 * 2 * 3 * 1.0)
+
+    def test_status_annotation_matches_the_python_property(self):
+        for assignment in Assignment.objects.with_status():
+            self.assertEqual(assignment.status, assignment.status_display.lower())
+
+    def test_by_status(self):
+        self.assertEqual(list(Assignment.objects.by_status(OVERDUE)), [self.overdue])
+        self.assertEqual(list(Assignment.objects.by_status(COMPLETED)), [self.done])
+        self.assertEqual(Assignment.objects.by_status(PENDING).count(), 4)
+
+    def test_grade_percentage(self):
+        graded = Assignment.objects.with_grade_percentage().get(pk=self.done.pk)
+        self.assertEqual(graded.grade_percentage, 90.0)
+        self.assertIsNone(Assignment.objects.with_grade_percentage().get(pk=self.overdue.pk).grade_percentage)
+
+    def test_admin_orders_by_urgency(self):
+        admin = make_user(is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse('admin:assignments_assignment_changelist'), {'o': '-8'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list)[0], self.tomorrow_heavy)
+
+
+class AssignmentViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.course = make_course(cls.user)
+        cls.assignment = make_assignment(cls.user, course=cls.course, title='Essay')
+        cls.other = make_assignment(make_user())
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_requires_login(self):
+        self.client.logout()
+        url = reverse('assignments:assignment_list')
+        self.assertRedirects(self.client.get(url), f"{reverse('login')}?next={url}", fetch_redirect_response=False)
+
+    def test_create(self):
+        due = timezone.now() + timedelta(days=2)
+        response = self.client.post(reverse('assignments:assignment_create'), {
+            'title': 'Lab', 'description': '', 'due_date': form_datetime(due), 'course': self.course.pk,
+        })
+
+        self.assertRedirects(response, reverse('assignments:assignment_list'), fetch_redirect_response=False)
+        self.assertTrue(Assignment.objects.filter(owner=self.user, title='Lab', course=self.course).exists())
+
+    def test_create_only_offers_own_courses(self):
+        other_course = make_course(self.other.owner)
+        response = self.client.post(reverse('assignments:assignment_create'), {
+            'title': 'Lab', 'due_date': form_datetime(timezone.now()), 'course': other_course.pk,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('course', response.context['form'].errors)
+
+    @override_settings(**NETWORK_CACHE_SETTINGS)
+    def test_course_choices_come_from_the_cached_directory(self):
+        url = reverse('assignments:assignment_create')
+        self.client.get(url)
+
+        # Session and user are cached too, so the warm page needs no queries at all
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, f'<option value="{self.course.pk}">{self.course.name}</option>', html=True)
+
+    def test_edit(self):
+        url = reverse('assignments:assignment_edit', args=[self.assignment.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.client.post(url, {'title': 'Long essay', 'due_date': form_datetime(self.assignment.due_date)})
+        self.assertEqual(Assignment.objects.get(pk=self.assignment.pk).title, 'Long essay')
+
+    def test_delete(self):
+        url = reverse('assignments:assignment_delete', args=[self.assignment.pk])
+        self.assertContains(self.client.get(url), 'Essay')
+
+        self.client.post(url)
+        self.assertFalse(Assignment.objects.filter(pk=self.assignment.pk).exists())
+
+    def test_toggle(self):
+        self.client.get(reverse('assignments:assignment_toggle', args=[self.assignment.pk]))
+        self.assertTrue(Assignment.objects.get(pk=self.assignment.pk).completed)
+
+    def test_reopening_unarchives(self):
+        archived = make_assignment(self.user, completed=True, archived=True)
+
+        self.client.get(reverse('assignments:assignment_toggle', args=[archived.pk]))
+
+        archived.refresh_from_db()
+        self.assertFalse(archived.completed or archived.archived)
+
+    def test_detail(self):
+        response = self.client.get(reverse('assignments:assignment_detail', args=[self.assignment.pk]))
+        self.assertContains(response, 'Essay')
+
+    def test_other_users_assignments_are_not_found(self):
+        for name in ('assignment_detail', 'assignment_edit', 'assignment_delete', 'assignment_toggle'):
+            with self.subTest(name):
+                response = self.client.get(reverse(f'assignments:{name}', args=[self.other.pk]))
+                self.assertEqual(response.status_code, 404)
+
+    def test_export_calendar(self):
+        series = make_series(self.user, title='Quiz')
+
+        response = self.client.get(reverse('assignments:export_calendar'))
+
+        self.assertEqual(response['Content-Type'], 'text/calendar')
+        body = response.content.decode()
+        self.assertIn(f'UID:assignment-{self.assignment.pk}@homeworktracker', body)
+        self.assertIn(f'UID:series-{series.pk}@homeworktracker', body)
+        self.assertIn('RRULE:FREQ=WEEKLY', body)
+
+
+class SeriesViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.series = make_series(cls.user, title='Quiz')
+        cls.first = cls.series.occurrence_at(0)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def occurrence_url(self, name, due=None):
+        due = due or self.first
+        return reverse(f'assignments:{name}', args=[self.series.pk, int(due.timestamp())])
+
+    def test_create(self):
+        response = self.client.post(reverse('assignments:series_create'), {
+            'title': 'Reading log',
+            'dtstart': form_datetime(timezone.now() + timedelta(days=1)),
+            'frequency': AssignmentSeries.DAILY,
+            'interval': 1,
+            'count': 5,
+        })
+
+        self.assertRedirects(response, reverse('assignments:assignment_list'), fetch_redirect_response=False)
+        self.assertEqual(AssignmentSeries.objects.get(title='Reading log').count, 5)
+
+    def test_create_rejects_both_end_conditions(self):
+        response = self.client.post(reverse('assignments:series_create'), {
+            'title': 'Reading log',
+            'dtstart': form_datetime(timezone.now()),
+            'frequency': AssignmentSeries.DAILY,
+            'interval': 1,
+            'count': 5,
+            'until': form_datetime(timezone.now() + timedelta(days=10)),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AssignmentSeries.objects.filter(title='Reading log').exists())
+
+    def test_occurrence_detail(self):
+        response = self.client.get(self.occurrence_url('occurrence_detail'))
+        self.assertContains(response, 'Quiz')
+
+    def test_not_an_occurrence_is_not_found(self):
+        response = self.client.get(self.occurrence_url('occurrence_detail', self.first + timedelta(hours=1)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_toggle_materializes_the_occurrence(self):
+        self.client.get(self.occurrence_url('occurrence_toggle'))
+
+        assignment = self.series.materialized.get()
+        self.assertTrue(assignment.completed)
+        self.assertEqual(assignment.occurrence_date, self.first)
+
+        # From now on the occurrence is a regular assignment
+        response = self.client.get(self.occurrence_url('occurrence_detail'))
+        self.assertRedirects(response, reverse('assignments:assignment_detail', args=[assignment.pk]))
+
+    def test_toggling_again_keeps_one_row(self):
+        self.client.get(self.occurrence_url('occurrence_toggle'))
+        self.client.get(self.occurrence_url('occurrence_toggle'))
+
+        self.assertEqual(self.series.materialized.count(), 1)
+
+    def test_completed_occurrence_leaves_the_upcoming_list(self):
+        second = self.series.occurrence_at(1)
+        list_url = reverse('assignments:assignment_list')
+        self.assertEqual([o.due_date for o in self.client.get(list_url).context['next_occurrences']], [self.first])
+
+        response = self.client.get(self.occurrence_url('occurrence_toggle'), follow=True)
+
+        # The next open occurrence takes its place; the completed one is a card now
+        self.assertEqual([o.due_date for o in response.context['next_occurrences']], [second])
+        self.assertContains(response, self.occurrence_url('occurrence_toggle', second))
+        self.assertNotContains(response, self.occurrence_url('occurrence_toggle'))
+        self.assertEqual(len(response.context['assignment_cards']), 1)
+
+    def test_later_occurrences_materialize_on_their_own_date(self):
+        third = self.series.occurrence_at(2)
+        self.client.get(self.occurrence_url('occurrence_toggle', third))
+
+        self.assertEqual(self.series.materialized.get().due_date, third)
+        self.assertContains(self.client.get(self.occurrence_url('occurrence_detail')), 'Quiz')
+
+    def test_other_users_series_are_not_found(self):
+        self.client.force_login(make_user())
+
+        for url in (self.occurrence_url('occurrence_detail'), self.occurrence_url('occurrence_toggle'),
+                    reverse('assignments:series_delete', args=[self.series.pk])):
+            self.assertEqual(self.client.post(url).status_code, 404)
+        self.assertTrue(AssignmentSeries.objects.exists())
+        self.assertFalse(Assignment.objects.exists())
+
+    def test_delete_asks_for_confirmation(self):
+        response = self.client.get(reverse('assignments:series_delete', args=[self.series.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(AssignmentSeries.objects.exists())
+
+    def test_delete(self):
+        self.series.materialize(self.first)
+        one_off = make_assignment(self.user)
+
+        response = self.client.post(reverse('assignments:series_delete', args=[self.series.pk]))
+
+        self.assertRedirects(response, reverse('assignments:assignment_list'), fetch_redirect_response=False)
+        self.assertFalse(AssignmentSeries.objects.exists())
+        self.assertEqual(list(Assignment.objects.all()), [one_off])
+
+
+class AssignmentSeriesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+
+    def test_count_ends_the_series(self):
+        series = make_series(self.user, frequency=AssignmentSeries.DAILY, count=3)
+
+        dates = list(series.occurrence_dates(series.dtstart, series.dtstart + timedelta(days=30)))
+        self.assertEqual(dates, [series.dtstart + timedelta(days=n) for n in range(3)])
+        self.assertEqual(series.ends_at, dates[-1])
+
+
+class ArchiveAssignmentsCommandTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.old = [make_assignment(cls.user, days=-400, completed=True) for _ in range(3)]
+        cls.old_open = make_assignment(cls.user, days=-400)
+        cls.recent = make_assignment(cls.user, days=-10, completed=True)
+
+    def test_archives_old_completed_assignments_in_batches(self):
+        self.user.profile.refresh_from_db()
+        version = self.user.profile.data_version
+        out = StringIO()
+
+        call_command('archive_assignments', older_than=365, batch_size=2, stdout=out)
+
+        self.assertIn('Archived 3 assignment(s)', out.getvalue())
+        self.assertEqual(set(Assignment.objects.filter(archived=True)), set(self.old))
+        # Archiving is a change like any other for sync and page ETags
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.data_version, version + 2)
+
+    def test_archived_assignments_leave_the_calendar_feed(self):
+        Assignment.objects.filter(pk=self.old_open.pk).update(archived=True)
+        self.client.force_login(self.user)
+
+        body = self.client.get(reverse('assignments:export_calendar')).content.decode()
+
+        self.assertNotIn(f'assignment-{self.old_open.pk}@', body)
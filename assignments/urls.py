@@ -11,4 +11,8 @@ urlpatterns = [
     path('<int:pk>/delete/', views.assignment_delete, name='assignment_delete'),
     path('<int:pk>/toggle/', views.assignment_toggle, name='assignment_toggle'),
     path('calendar/', views.export_calendar, name='export_calendar'),
+    path('series/create/', views.series_create, name='series_create'),
+    path('series/<int:pk>/delete/', views.series_delete, name='series_delete'),
+    path('series/<int:series_id>/<int:timestamp>/', views.occurrence_detail, name='occurrence_detail'),
+    path('series/<int:series_id>/<int:timestamp>/toggle/', views.occurrence_toggle, name='occurrence_toggle'),
 ]
\ No newline at end of file
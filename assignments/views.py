@@ -1,28 +1,57 @@
 # assignments/views.py
 
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from django.http import HttpResponse
-from datetime import datetime
+from django.db.models import F, Q
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from .models import Assignment
-from .forms import AssignmentForm
-from courses.models import Course
+from .models import STATUSES, Assignment, AssignmentSeries
+from .forms import AssignmentForm, AssignmentSeriesForm
+from .fragments import render_assignment_cards
+from .ical import calendar_lines
+from .recurrence import expand_occurrences
+from courses.directory import course_directory
+from core.caching import get_or_compute
+from core.conditional import user_data_condition
+from core.ratelimit import ratelimit
+
+# ?sort= choices for the assignment list: their ORDER BY (ties by due date)
+SORTS = {
+    'due': ['due_date'],
+    'urgency': [F('urgency').desc(), 'due_date'],
+    'status': ['status_rank', 'due_date'],
+    'grade': [F('grade_percentage').desc(nulls_last=True), 'due_date'],
+}
+SORT_LABELS = [('due', 'Due date'), ('urgency', 'Urgency'), ('status', 'Status'), ('grade', 'Grade')]
 
 
 @login_required
+@user_data_condition
 def assignment_list(request):
     """
     Displays a filtered and searchable list of the user's assignments.
-    Supports filtering by course (including 'uncategorized') and keyword search.
+    Supports filtering by course (including 'uncategorized'), status and
+    keyword search, and sorting by due date, urgency, status or grade; all
+    done in SQL. Archived assignments are only listed with ?archived=1.
     """
     user = request.user
     query = request.GET.get('q', '').strip()
     course_filter = request.GET.get('course', '').strip()
+    status_filter = request.GET.get('status', '')
+    sort = request.GET.get('sort', '')
+    if sort not in SORTS:
+        sort = 'due'
+    include_archived = request.GET.get('archived') == '1'
+    now = timezone.now()
 
     assignments = Assignment.objects.filter(owner=user)
+    if not include_archived:
+        assignments = assignments.active()
+    assignments = assignments.by_status(status_filter, now)
 
     # Search by title or associated course name
     if query:
@@ -36,15 +65,34 @@ def assignment_list(request):
     elif course_filter.isdigit():
         assignments = assignments.filter(course_id=int(course_filter))
 
-    # Optimize DB queries with select_related and prefetch_related
-    assignments = assignments.select_related('course').prefetch_related('grade')
-    courses = Course.objects.filter(owner=user).order_by('name')
+    if sort == 'urgency':
+        assignments = assignments.with_urgency(now)
+    elif sort == 'status':
+        assignments = assignments.with_status(now)
+    elif sort == 'grade':
+        assignments = assignments.with_grade_percentage()
+    assignments = assignments.order_by(*SORTS[sort])
+
+    # Course and grade are joined in; cards are then served from the fragment cache
+    assignments = assignments.select_related('course', 'grade')
+    courses = course_directory(user.pk)  # Cached; shared with the assignment forms
+
+    # Next open occurrence of each recurring series
+    next_occurrences = {}
+    for occurrence in expand_occurrences(user, now, now + timedelta(days=settings.RECURRENCE_WINDOW_DAYS)):
+        next_occurrences.setdefault(occurrence.series_id, occurrence)
 
     return render(request, 'assignments/list.html', {
-        'assignments': assignments,
+        'assignment_cards': render_assignment_cards(assignments, request),
+        'next_occurrences': next_occurrences.values(),
         'courses': courses,
         'search_query': query,
         'selected_course_filter': course_filter,
+        'statuses': STATUSES,
+        'selected_status': status_filter,
+        'sorts': SORT_LABELS,
+        'selected_sort': sort,
+        'include_archived': include_archived,
     })
 
 
@@ -94,60 +142,102 @@ def assignment_delete(request, pk):
 
 
 @login_required
+@ratelimit('toggle')
 def assignment_toggle(request, pk):
     """Toggles the completion status of an assignment."""
     assignment = get_object_or_404(Assignment, pk=pk, owner=request.user)
     assignment.completed = not assignment.completed
+    if not assignment.completed:
+        assignment.archived = False  # Reopened work is active again
     assignment.save()
     return redirect('assignments:assignment_list')
 
 
 @login_required
+@user_data_condition
 def assignment_detail(request, pk):
     """Shows detailed view of a single assignment."""
     assignment = get_object_or_404(Assignment, pk=pk, owner=request.user)
     return render(request, 'assignments/detail.html', {
         'assignment': assignment,
+        'attachments': assignment.attachments.all(),
+    })
+
+
+def get_occurrence(request, series_id, timestamp):
+    """
+    Resolves a series occurrence from URL parameters, returning (series, due).
+    404s unless the timestamp is an actual occurrence of one of the user's series.
+    """
+    series = get_object_or_404(AssignmentSeries.objects.select_related('course'), pk=series_id, owner=request.user)
+    due = datetime.fromtimestamp(timestamp, tz=ZoneInfo("UTC"))
+    if not series.is_occurrence(due):
+        raise Http404("No such occurrence.")
+    return series, due
+
+
+@login_required
+def series_create(request):
+    """Creates a recurring assignment series."""
+    if request.method == 'POST':
+        form = AssignmentSeriesForm(request.POST, user=request.user)
+        if form.is_valid():
+            series = form.save(commit=False)
+            series.owner = request.user
+            series.save()
+            return redirect('assignments:assignment_list')
+    else:
+        form = AssignmentSeriesForm(user=request.user)
+    return render(request, 'assignments/form.html', {
+        'form': form,
+        'title': 'Add Recurring Assignment'
     })
 
 
 @login_required
+def series_delete(request, pk):
+    """Deletes a series along with its materialized occurrences."""
+    series = get_object_or_404(AssignmentSeries, pk=pk, owner=request.user)
+    if request.method == 'POST':
+        series.delete()
+        return redirect('assignments:assignment_list')
+    return render(request, 'assignments/confirm_delete.html', {'assignment': series})
+
+
+@login_required
+def occurrence_detail(request, series_id, timestamp):
+    """Shows one occurrence of a series; materialized ones redirect to the assignment."""
+    series, due = get_occurrence(request, series_id, timestamp)
+    assignment = series.materialized.filter(occurrence_date=due).first()
+    if assignment:
+        return redirect('assignments:assignment_detail', pk=assignment.pk)
+    return render(request, 'assignments/occurrence_detail.html', {
+        'assignment': series.build_occurrence(due),
+        'series': series,
+    })
+
+
+@login_required
+@ratelimit('toggle')
+def occurrence_toggle(request, series_id, timestamp):
+    """Completes a series occurrence, materializing it as an Assignment row."""
+    series, due = get_occurrence(request, series_id, timestamp)
+    series.materialize(due, completed=True)
+    return redirect('assignments:assignment_list')
+
+
+@login_required
+@user_data_condition
 def export_calendar(request):
     """
-    Exports all incomplete assignments as an iCalendar (.ics) file.
-    Uses UTC timestamps for compatibility with calendar apps like Google Calendar.
+    Exports all incomplete assignments as an iCalendar (.ics) file; see
+    assignments.ical for how one-off and recurring assignments are encoded.
     """
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//Homework Tracker//YourApp//EN",
-        "CALSCALE:GREGORIAN",
-        "METHOD:PUBLISH",
-    ]
-
-    user_tz = ZoneInfo("UTC")  # Standardized to UTC for broad compatibility
-
-    for assignment in Assignment.objects.filter(owner=request.user, completed=False):
-        if not assignment.due_date:
-            continue
-
-        due = assignment.due_date
-        if due.tzinfo is None:
-            due = due.replace(tzinfo=user_tz)
-
-        dt_str = due.strftime("%Y%m%dT%H%M%SZ")
-        lines.extend([
-            "BEGIN:VEVENT",
-            f"UID:assignment-{assignment.id}@homeworktracker",
-            f"SUMMARY:{assignment.title}",
-            f"DESCRIPTION:{assignment.description or 'No description'}",
-            f"DTSTART:{dt_str}",
-            f"DTEND:{dt_str}",
-            f"DTSTAMP:{datetime.now(user_tz).strftime('%Y%m%dT%H%M%SZ')}",
-            "END:VEVENT"
-        ])
-
-    lines.append("END:VCALENDAR")
-    response = HttpResponse("\r\n".join(lines), content_type="text/calendar")
+    user = request.user
+    # The user's timezone, via TimezoneMiddleware
+    tzinfo = timezone.get_current_timezone()
+    body = get_or_compute('calendar', [user.pk, user.profile.data_version, timezone.get_current_timezone_name()],
+                          lambda: "\r\n".join(calendar_lines(user, tzinfo)))
+    response = HttpResponse(body, content_type="text/calendar")
     response["Content-Disposition"] = 'attachment; filename="homework_tracker.ics"'
     return response
\ No newline at end of file
@@ -0,0 +1,24 @@
+# attachments/admin.py
+from django.contrib import admin
+from .models import Attachment, Upload, Usage
+
+
+@admin.register(Attachment)
+class AttachmentAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'owner', 'assignment', 'size', 'created_at')
+    search_fields = ('filename', 'owner__username', 'assignment__title')
+    raw_id_fields = ('assignment', 'owner', 'blob')
+    readonly_fields = ('blob', 'size', 'content_type')
+
+
+@admin.register(Upload)
+class UploadAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'owner', 'received', 'size', 'updated_at')
+    raw_id_fields = ('assignment', 'owner')
+
+
+@admin.register(Usage)
+class UsageAdmin(admin.ModelAdmin):
+    list_display = ('user', 'bytes_used')
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AttachmentsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'attachments'
+
+    def ready(self):
+        import attachments.signals
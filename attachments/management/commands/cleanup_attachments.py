@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from attachments.models import Blob, Upload, get_storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Abandons uploads that have received nothing for ATTACHMENT_UPLOAD_EXPIRY_HOURS, '
+        'giving back their quota, and deletes stored files no attachment refers to any more.'
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        stale = Upload.objects.filter(updated_at__lt=now - timedelta(hours=settings.ATTACHMENT_UPLOAD_EXPIRY_HOURS))
+        uploads = 0
+        for upload in stale.iterator():
+            upload.delete()  # Releases the reservation and the partial file (attachments.signals)
+            uploads += 1
+
+        # Blobs this new may be about to be attached by an upload that is finishing
+        orphans = Blob.objects.filter(attachments__isnull=True, created_at__lt=now - timedelta(hours=1))
+        storage = get_storage()
+        blobs = 0
+        for blob in orphans.iterator():
+            storage.delete(blob.name)
+            blob.delete()
+            blobs += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Removed {uploads} stale upload(s) and {blobs} unused file(s).'))
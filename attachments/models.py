@@ -0,0 +1,88 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db import models
+
+
+def get_storage():
+    """The storage holding attachment contents (STORAGES['attachments'])."""
+    return storages['attachments']
+
+
+class Blob(models.Model):
+    """
+    File contents stored once per distinct SHA-256 and shared by every
+    attachment with those contents, whoever uploaded them. Blobs no attachment
+    refers to any more are removed by `manage.py cleanup_attachments`.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.PositiveBigIntegerField()
+    name = models.CharField(max_length=255)  # Path within the attachments storage
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
+
+    @staticmethod
+    def storage_name(sha256):
+        return f'{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+    def open(self):
+        return get_storage().open(self.name, 'rb')
+
+
+class Attachment(models.Model):
+    """A file attached to an assignment; the bytes live in a shared Blob."""
+    assignment = models.ForeignKey('assignments.Assignment', on_delete=models.CASCADE, related_name='attachments')
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)  # Charged for the size
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, related_name='attachments')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, default='application/octet-stream')
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return self.filename
+
+
+class Upload(models.Model):
+    """
+    A resumable upload in progress. The bytes received so far are in a
+    temporary file under ATTACHMENT_UPLOAD_DIR; the declared size is reserved
+    against the owner's quota until the upload completes or is abandoned.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    assignment = models.ForeignKey('assignments.Assignment', on_delete=models.CASCADE, related_name='uploads')
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, default='application/octet-stream')
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Last chunk; stale uploads expire
+
+    def __str__(self):
+        return f'{self.filename} ({self.received}/{self.size})'
+
+    @property
+    def temp_path(self):
+        return os.path.join(settings.ATTACHMENT_UPLOAD_DIR, self.id.hex)
+
+
+class Usage(models.Model):
+    """
+    Per-user attachment bytes, kept as a counter so quota checks are one
+    conditional UPDATE. Includes the bytes reserved by uploads in progress.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='attachment_usage',
+    )
+    bytes_used = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.bytes_used} bytes'
@@ -0,0 +1,30 @@
+import os
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Attachment, Upload
+from .uploads import release
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@receiver(post_delete, sender=Attachment)
+def release_attachment_quota(sender, instance, **kwargs):
+    """Also runs for attachments removed with their assignment, course or account."""
+    release(instance.owner_id, instance.size)
+
+
+@receiver(post_delete, sender=Upload)
+def discard_upload(sender, instance, **kwargs):
+    """Gives back an abandoned upload's reservation and removes its partial file."""
+    if not getattr(instance, 'finished', False):
+        release(instance.owner_id, instance.size)
+    path = instance.temp_path
+    transaction.on_commit(lambda: remove_file(path))
@@ -0,0 +1,181 @@
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.factories import CacheClearingTestCase, make_assignment, make_course, make_user
+from core.purge import delete_course, purge_course, purge_user, run
+from .models import Attachment, Blob, Upload, Usage, get_storage
+from .views import parse_range
+
+CONTENT = b'0123456789' * 10
+
+
+class AttachmentTestCase(CacheClearingTestCase):
+    """Keeps uploads and stored files in temporary directories."""
+
+    def setUp(self):
+        super().setUp()
+        upload_dir = self.enterContext(tempfile.TemporaryDirectory())
+        storage_dir = self.enterContext(tempfile.TemporaryDirectory())
+        storages = {
+            **settings.STORAGES,
+            'attachments': {'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                            'OPTIONS': {'location': storage_dir}},
+        }
+        self.enterContext(override_settings(
+            ATTACHMENT_UPLOAD_DIR=upload_dir, STORAGES=storages, ATTACHMENT_CHUNK_SIZE=40, ATTACHMENT_QUOTA=250,
+        ))
+        self.user = make_user()
+        self.assignment = make_assignment(self.user)
+        self.client.force_login(self.user)
+
+    def start(self, content=CONTENT, assignment=None):
+        assignment = assignment or self.assignment
+        return self.client.post(reverse('attachments:upload_start', args=[assignment.pk]),
+                                {'filename': 'notes.txt', 'size': len(content), 'content_type': 'text/plain'})
+
+    def put(self, url, content, start, end):
+        return self.client.put(url, content[start:end], content_type='application/octet-stream',
+                               HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(content)}')
+
+    def upload(self, content=CONTENT, assignment=None):
+        state = self.start(content, assignment).json()
+        for start in range(0, len(content), 40):
+            response = self.put(state['url'], content, start, min(start + 40, len(content)))
+        self.assertEqual(response.status_code, 201)
+        return Attachment.objects.get(pk=response.json()['attachment']['id'])
+
+    def usage(self, user=None):
+        return Usage.objects.get(user=user or self.user).bytes_used
+
+
+class UploadTests(AttachmentTestCase):
+
+    def test_chunked_upload_creates_attachment(self):
+        attachment = self.upload()
+
+        self.assertEqual(attachment.size, len(CONTENT))
+        with attachment.blob.open() as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertEqual(self.usage(), len(CONTENT))
+        self.assertFalse(Upload.objects.exists())
+
+    def test_upload_resumes_from_the_server_offset(self):
+        url = self.start().json()['url']
+        self.put(url, CONTENT, 0, 40)
+
+        # A chunk the server already has is refused with the offset to resume from
+        response = self.put(url, CONTENT, 0, 40)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 40)
+        self.assertEqual(self.client.get(url).json()['offset'], 40)
+
+        self.put(url, CONTENT, 40, 80)
+        self.assertEqual(self.put(url, CONTENT, 80, 100).status_code, 201)
+
+    def test_identical_contents_are_stored_once(self):
+        self.upload()
+        other = make_user()
+        self.client.force_login(other)
+        self.upload(assignment=make_assignment(other))
+
+        self.assertEqual(Attachment.objects.count(), 2)
+        self.assertEqual(Blob.objects.count(), 1)
+        self.assertEqual(self.usage(other), len(CONTENT))
+
+    def test_quota_is_reserved_when_an_upload_starts(self):
+        self.upload()
+        self.assertEqual(self.start().status_code, 201)  # 200 of 250 bytes reserved
+
+        response = self.start()
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('quota', response.json()['error'])
+
+    def test_abandoned_and_deleted_files_give_back_quota(self):
+        url = self.start().json()['url']
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.usage(), 0)
+
+        self.upload()
+        self.assignment.delete()
+        self.assertEqual(self.usage(), 0)
+
+        Blob.objects.update(created_at=timezone.now() - timedelta(days=1))
+        call_command('cleanup_attachments', stdout=StringIO())
+        self.assertFalse(Blob.objects.exists())
+
+    def test_purges_remove_files_in_batches(self):
+        course = make_course(self.user)
+        in_course = make_assignment(self.user, course=course)
+        self.upload(assignment=in_course)
+        self.upload(content=CONTENT[:50], assignment=in_course)
+        self.start(content=CONTENT[:30], assignment=in_course)
+        self.upload(content=CONTENT[:20])
+
+        delete_course(course)
+        totals = run(purge_course, course.pk, batch_size=1)
+
+        self.assertEqual((totals['attachments'], totals['uploads']), (2, 1))
+        self.assertEqual(self.usage(), 20)
+        self.assertEqual(run(purge_user, self.user.pk)['attachments'], 1)
+
+    def test_other_users_cannot_upload_or_download(self):
+        attachment = self.upload()
+        self.client.force_login(make_user())
+
+        self.assertEqual(self.start().status_code, 404)
+        self.assertEqual(self.client.get(reverse('attachments:download', args=[attachment.pk])).status_code, 404)
+
+
+class DownloadTests(AttachmentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('attachments:download', args=[self.upload().pk])
+
+    def test_full_download(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('attachment; filename="notes.txt"', response['Content-Disposition'])
+
+    def test_range_request(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=500-')
+        self.assertEqual(response.status_code, 416)
+
+
+class ParseRangeTests(SimpleTestCase):
+
+    def test_forms(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=50-500', 100), (50, 99))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+        self.assertIsNone(parse_range('items=0-1', 100))
+        with self.assertRaises(ValueError):
+            parse_range('bytes=100-', 100)
+
+
+class StorageTests(SimpleTestCase):
+
+    def test_files_are_not_under_the_public_media_root(self):
+        location = Path(get_storage().location).resolve()
+        self.assertNotIn(Path(settings.MEDIA_ROOT).resolve(), [location, *location.parents])
@@ -0,0 +1,166 @@
+# attachments/uploads.py
+"""
+Chunked, resumable uploads with content deduplication and per-user quotas.
+
+1. start_upload() reserves the declared size against the user's quota with a
+   single conditional UPDATE of their Usage counter, then creates an Upload.
+2. The client PUTs the file in order, one chunk per request. write_chunk()
+   streams each request body into the upload's temporary file 64 KiB at a
+   time, so neither a chunk nor the file is ever held in memory. After a
+   dropped connection, the client asks for the current offset and carries on
+   from there.
+3. Once the last byte arrives, finish_upload() hashes the file. If anyone has
+   uploaded the same contents before, their Blob is reused and the copy is
+   discarded; otherwise the file goes to the attachments storage as a new
+   Blob.
+
+The reservation becomes the attachment's share of the quota. It is given back
+when the attachment is deleted or the upload abandoned (attachments.signals).
+"""
+
+import hashlib
+import os
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.db import models, transaction
+from django.db.models.functions import Greatest
+from django.template.defaultfilters import filesizeformat
+
+from core.changes import record_change
+from core.models import Change
+
+from .models import Attachment, Blob, Upload, Usage, get_storage
+
+COPY_BUFFER = 64 * 1024
+
+
+class UploadError(Exception):
+    """A rejected upload request; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset  # Where the client should resume, for out-of-order chunks
+
+
+def reserve(user_id, size):
+    """Adds size to the user's usage if that stays within ATTACHMENT_QUOTA; returns whether it did."""
+    Usage.objects.get_or_create(user_id=user_id)
+    return bool(
+        Usage.objects.filter(user_id=user_id, bytes_used__lte=settings.ATTACHMENT_QUOTA - size)
+        .update(bytes_used=models.F('bytes_used') + size)
+    )
+
+
+def release(user_id, size):
+    Usage.objects.filter(user_id=user_id).update(
+        bytes_used=Greatest(models.F('bytes_used') - size, 0, output_field=models.PositiveBigIntegerField()),
+    )
+
+
+def start_upload(user, assignment, filename, size, content_type=''):
+    filename = os.path.basename(filename.replace('\\', '/')).strip()[:255]
+    if not filename:
+        raise UploadError('A file name is required.')
+    if size <= 0:
+        raise UploadError('Empty files cannot be attached.')
+    if size > settings.ATTACHMENT_MAX_SIZE:
+        raise UploadError(f'Files are limited to {filesizeformat(settings.ATTACHMENT_MAX_SIZE)}.', status=413)
+
+    with transaction.atomic():
+        if not reserve(user.pk, size):
+            raise UploadError(
+                f'This file would exceed your {filesizeformat(settings.ATTACHMENT_QUOTA)} storage quota.', status=413,
+            )
+        upload = Upload.objects.create(
+            assignment=assignment,
+            owner=user,
+            filename=filename,
+            content_type=content_type[:100] or 'application/octet-stream',
+            size=size,
+        )
+    os.makedirs(settings.ATTACHMENT_UPLOAD_DIR, exist_ok=True)
+    open(upload.temp_path, 'wb').close()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Appends `length` bytes read from `stream` at `offset`, which must be where
+    the upload left off. A body cut short is kept as far as it got.
+    """
+    if offset != upload.received:
+        raise UploadError('The chunk does not continue the upload.', status=409, offset=upload.received)
+    if length > settings.ATTACHMENT_CHUNK_SIZE:
+        raise UploadError(f'Chunks are limited to {filesizeformat(settings.ATTACHMENT_CHUNK_SIZE)}.', status=413)
+    if offset + length > upload.size:
+        raise UploadError('The chunk runs past the end of the file.')
+
+    written = 0
+    with open(upload.temp_path, 'r+b') as f:
+        f.seek(offset)
+        while written < length:
+            data = stream.read(min(COPY_BUFFER, length - written))
+            if not data:
+                break
+            f.write(data)
+            written += len(data)
+        f.truncate()  # Drops anything an unrecorded earlier attempt left past this point
+
+    # Of two requests racing from the same offset, only one moves it on
+    if not Upload.objects.filter(pk=upload.pk, received=offset).update(received=offset + written):
+        upload.refresh_from_db(fields=['received'])
+        raise UploadError('The chunk does not continue the upload.', status=409, offset=upload.received)
+    upload.received = offset + written
+    return upload
+
+
+def store_blob(path, sha256, size):
+    """The Blob for these contents, storing the file at path only if it is new."""
+    blob = Blob.objects.filter(sha256=sha256).first()
+    if blob is not None:
+        return blob
+
+    storage = get_storage()
+    with open(path, 'rb') as f:
+        name = storage.save(Blob.storage_name(sha256), File(f))
+    blob, created = Blob.objects.get_or_create(sha256=sha256, defaults={'size': size, 'name': name})
+    if not created:
+        storage.delete(name)  # Stored concurrently by another upload of the same contents
+    return blob
+
+
+def finish_upload(upload):
+    """Turns a fully received upload into an Attachment."""
+    digest = hashlib.sha256()
+    with open(upload.temp_path, 'rb') as f:
+        for block in iter(partial(f.read, COPY_BUFFER), b''):
+            digest.update(block)
+    blob = store_blob(upload.temp_path, digest.hexdigest(), upload.size)
+
+    with transaction.atomic():
+        attachment = Attachment.objects.create(
+            assignment_id=upload.assignment_id,
+            owner_id=upload.owner_id,
+            blob=blob,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            size=upload.size,
+        )
+        upload.finished = True  # The reserved bytes now belong to the attachment
+        upload.delete()
+        # New revision for sync clients and the assignment page's ETag
+        record_change(upload.owner_id, Change.ASSIGNMENT, upload.assignment_id)
+    return attachment
+
+
+def abort_upload(upload):
+    upload.delete()
+
+
+def delete_attachment(attachment):
+    with transaction.atomic():
+        attachment.delete()
+        record_change(attachment.owner_id, Change.ASSIGNMENT, attachment.assignment_id)
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'attachments'
+
+urlpatterns = [
+    path('assignment/<int:assignment_id>/upload/', views.upload_start, name='upload_start'),
+    path('uploads/<uuid:upload_id>/', views.upload_detail, name='upload'),
+    path('<int:pk>/', views.attachment_download, name='download'),
+    path('<int:pk>/delete/', views.attachment_delete, name='delete'),
+]
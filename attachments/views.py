@@ -0,0 +1,201 @@
+# attachments/views.py
+
+import re
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods, require_POST
+
+from assignments.models import Assignment
+from core.ratelimit import ratelimit
+
+from .models import Attachment, Upload
+from .uploads import UploadError, abort_upload, delete_attachment, finish_upload, start_upload, write_chunk
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def upload_state(upload):
+    return {
+        'id': str(upload.id),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.received,
+        'chunk_size': settings.ATTACHMENT_CHUNK_SIZE,
+        'url': reverse('attachments:upload', args=[upload.id]),
+    }
+
+
+def attachment_data(attachment):
+    return {
+        'id': attachment.pk,
+        'filename': attachment.filename,
+        'size': attachment.size,
+        'content_type': attachment.content_type,
+        'url': reverse('attachments:download', args=[attachment.pk]),
+    }
+
+
+def error_response(error):
+    data = {'error': str(error)}
+    if error.offset is not None:
+        data['offset'] = error.offset
+    return JsonResponse(data, status=error.status)
+
+
+def chunk_position(request, upload):
+    """(offset, length) of a PUT chunk, from Content-Range or ?offset= and Content-Length."""
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    if length <= 0:
+        raise UploadError('Chunks need a Content-Length.', status=411)
+
+    content_range = request.headers.get('Content-Range')
+    if content_range:
+        match = CONTENT_RANGE_RE.match(content_range)
+        if not match:
+            raise UploadError('Malformed Content-Range.')
+        start, end, total = map(int, match.groups())
+        if end - start + 1 != length or total != upload.size:
+            raise UploadError('Content-Range does not match the chunk or the file size.')
+        return start, length
+
+    try:
+        return int(request.GET.get('offset', '')), length
+    except ValueError:
+        raise UploadError('Chunks need a Content-Range header or an offset parameter.')
+
+
+@login_required
+@require_POST
+@ratelimit('bulk')
+def upload_start(request, assignment_id):
+    """Starts a resumable upload to one of the user's assignments."""
+    assignment = get_object_or_404(Assignment, pk=assignment_id, owner=request.user)
+    try:
+        size = int(request.POST.get('size', ''))
+        upload = start_upload(
+            request.user, assignment, request.POST.get('filename', ''), size, request.POST.get('content_type', ''),
+        )
+    except ValueError:
+        return JsonResponse({'error': 'A file size is required.'}, status=400)
+    except UploadError as error:
+        return error_response(error)
+    return JsonResponse(upload_state(upload), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'HEAD', 'PUT', 'DELETE'])
+def upload_detail(request, upload_id):
+    """
+    GET reports how far the upload got (to resume from), PUT appends the next
+    chunk and completes the attachment with the last one, DELETE abandons it.
+    """
+    upload = get_object_or_404(Upload, pk=upload_id, owner=request.user)
+
+    if request.method == 'DELETE':
+        abort_upload(upload)
+        return HttpResponse(status=204)
+
+    if request.method == 'PUT':
+        try:
+            offset, length = chunk_position(request, upload)
+            write_chunk(upload, offset, request, length)
+        except UploadError as error:
+            return error_response(error)
+        if upload.received == upload.size:
+            attachment = finish_upload(upload)
+            return JsonResponse({'complete': True, 'attachment': attachment_data(attachment)}, status=201)
+
+    return JsonResponse(upload_state(upload))
+
+
+class FileRange:
+    """Read-only view of `length` bytes of an open file from `start`, for FileResponse."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single 'bytes=' range, end inclusive, or None to send
+    the whole file (no, several or malformed ranges). Raises ValueError for a
+    range that lies beyond the end of the file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:  # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise ValueError('empty suffix range')
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError('range starts past the end')
+    return start, end
+
+
+@login_required
+def attachment_download(request, pk):
+    """Streams an attachment, honouring single byte-range requests for resumable downloads."""
+    attachment = get_object_or_404(Attachment.objects.select_related('blob'), pk=pk, owner=request.user)
+    size = attachment.size
+    etag = f'"{attachment.blob.sha256}"'
+
+    start, end = 0, size - 1
+    range_header = request.headers.get('Range')
+    if range_header and request.headers.get('If-Range', etag) == etag:
+        try:
+            requested = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if requested:
+            start, end = requested
+
+    length = end - start + 1
+    response = FileResponse(
+        FileRange(attachment.blob.open(), start, length),
+        as_attachment=True,
+        filename=attachment.filename,
+        content_type=attachment.content_type,
+    )
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    if length != size:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+@login_required
+@require_POST
+def attachment_delete(request, pk):
+    attachment = get_object_or_404(Attachment, pk=pk, owner=request.user)
+    delete_attachment(attachment)
+    return redirect('assignments:assignment_detail', pk=attachment.assignment_id)
@@ -0,0 +1,286 @@
+# core/caching.py
+"""
+Two-tier cache for expensive per-user results (the dashboard, course
+statistics, the calendar feed).
+
+    data = get_or_compute('dashboard', [user.pk, profile.data_version], compute)
+
+Values are looked up in two tiers:
+- a small LRU in process memory (CACHE_LOCAL_MAX_ENTRIES entries, each
+  trusted for at most CACHE_LOCAL_TIMEOUT seconds), which answers repeated
+  reads without any I/O;
+- the shared backend, CACHES[CACHE_SHARED_ALIAS], which every worker process
+  sees.
+
+Keys are versioned rather than deleted. Callers put the version of their data
+in the key parts, normally Profile.data_version, which every write bumps. That
+is read from request.user, which is loaded per request or, with a network
+cache, cached in the shared cache (accounts.backends), so a bump reaches
+every worker at once. Each
+namespace also has a version of its own in the shared cache, which
+invalidate() increments to drop everything in the namespace at once. Other
+processes see the new version within CACHE_LOCAL_TIMEOUT.
+
+Each namespace in CACHE_NAMESPACES sets how long a value is fresh
+('timeout') and how long after that it may still be served ('stale'). When a
+key is missing or stale, a lock taken with the backend's atomic add() picks
+one worker to recompute it (single flight). The others serve the stale value
+if there is one (stale-while-revalidate), and otherwise wait up to
+CACHE_LOCK_WAIT seconds for the winner's result. Stale values are refreshed in
+a background thread unless CACHE_REVALIDATE_IN_BACKGROUND is off.
+
+Hit and miss counts are kept per process and added to the shared cache every
+CACHE_METRICS_FLUSH_INTERVAL seconds. `manage.py cache_stats` reports them.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Every lookup ends in exactly one of the first four; 'wait' and 'compute' are extra
+LOOKUPS = ('local_hit', 'shared_hit', 'stale_hit', 'miss')
+EVENTS = LOOKUPS + ('wait', 'compute')
+
+
+def shared_cache():
+    return caches[settings.CACHE_SHARED_ALIAS]
+
+
+def metric_key(namespace, event):
+    return f'cache:{namespace}:metrics:{event}'
+
+
+class LocalLRU:
+    """Entries (value, fresh until, expires at) in process memory; least recently used evicted first."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= now:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, fresh_until, expires_at):
+        with self.lock:
+            self.entries[key] = (value, fresh_until, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class Metrics:
+    """Per-process event counts, periodically added to the shared totals."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.flushed_at = time.monotonic()
+
+    def record(self, namespace, event):
+        with self.lock:
+            self.counts[namespace, event] += 1
+            due = time.monotonic() - self.flushed_at >= settings.CACHE_METRICS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.flushed_at = time.monotonic()
+        backend = shared_cache()
+        for (namespace, event), count in counts.items():
+            key = metric_key(namespace, event)
+            try:
+                backend.add(key, 0, None)
+                backend.incr(key, count)
+            except Exception:
+                logger.warning('Could not record cache metrics for %s', namespace, exc_info=True)
+
+    def totals(self, namespace):
+        """{event: count} for the namespace: the shared totals plus this process's unflushed counts."""
+        stored = shared_cache().get_many([metric_key(namespace, event) for event in EVENTS])
+        with self.lock:
+            return {
+                event: stored.get(metric_key(namespace, event), 0) + self.counts[namespace, event]
+                for event in EVENTS
+            }
+
+    def reset(self, namespace):
+        shared_cache().delete_many([metric_key(namespace, event) for event in EVENTS])
+        with self.lock:
+            for event in EVENTS:
+                self.counts.pop((namespace, event), None)
+
+
+class TwoTierCache:
+
+    def __init__(self):
+        self.local = LocalLRU(settings.CACHE_LOCAL_MAX_ENTRIES)
+        self.metrics = Metrics()
+
+    def clear(self):
+        """Forgets this process's copies and unflushed counts."""
+        self.local.clear()
+        self.metrics = Metrics()
+
+    def namespace_version(self, namespace):
+        key = f'cache:{namespace}:version'
+        now = time.time()
+        entry = self.local.get(key, now)
+        if entry is not None:
+            return entry[0]
+        backend = shared_cache()
+        version = backend.get(key)
+        if version is None:
+            # add() is several queries on the database cache, so only when missing
+            backend.add(key, 1, None)
+            version = backend.get(key, 1)
+        self.local.set(key, version, now, now + settings.CACHE_LOCAL_TIMEOUT)
+        return version
+
+    def invalidate(self, namespace):
+        """Makes every value cached in the namespace unreachable, in all processes."""
+        key = f'cache:{namespace}:version'
+        backend = shared_cache()
+        backend.add(key, 1, None)
+        backend.incr(key)
+        self.local.delete(key)
+
+    def make_key(self, namespace, parts):
+        digest = hashlib.md5('|'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+        return f'cache:{namespace}:v{self.namespace_version(namespace)}:{digest}'
+
+    def get_or_compute(self, namespace, parts, compute):
+        """The cached value for `parts` in the namespace, calling compute() to fill it in."""
+        config = settings.CACHE_NAMESPACES[namespace]
+        key = self.make_key(namespace, parts)
+        now = time.time()
+
+        entry = self.local.get(key, now)
+        if entry is not None and entry[1] > now:
+            self.metrics.record(namespace, 'local_hit')
+            return entry[0]
+
+        entry = shared_cache().get(key)
+        if entry is not None:
+            value, fresh_until = entry
+            if fresh_until > now:
+                self.metrics.record(namespace, 'shared_hit')
+                self.remember(key, value, fresh_until, now)
+                return value
+            # Stale: everyone gets the old value while one worker refreshes it
+            self.metrics.record(namespace, 'stale_hit')
+            token = self.acquire(key)
+            if token:
+                if not settings.CACHE_REVALIDATE_IN_BACKGROUND:
+                    return self.compute_and_store(namespace, key, compute, config, token)
+                self.revalidate_in_background(namespace, key, compute, config, token)
+            return value
+
+        self.metrics.record(namespace, 'miss')
+        token = self.acquire(key)
+        if token:
+            return self.compute_and_store(namespace, key, compute, config, token)
+
+        # Another worker is computing it: wait for its result rather than repeat the work
+        self.metrics.record(namespace, 'wait')
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+            entry = shared_cache().get(key)
+            if entry is not None:
+                self.remember(key, entry[0], entry[1], time.time())
+                return entry[0]
+        return self.compute_and_store(namespace, key, compute, config)
+
+    def remember(self, key, value, fresh_until, now):
+        self.local.set(key, value, fresh_until, min(fresh_until, now + settings.CACHE_LOCAL_TIMEOUT))
+
+    def acquire(self, key):
+        """A token if this worker now holds the key's recompute lock, else None."""
+        token = uuid.uuid4().hex
+        if shared_cache().add(f'{key}:lock', token, settings.CACHE_LOCK_TIMEOUT):
+            return token
+        return None
+
+    def release(self, key, token):
+        # Not if the lock timed out and another worker has taken it since
+        backend = shared_cache()
+        if backend.get(f'{key}:lock') == token:
+            backend.delete(f'{key}:lock')
+
+    def compute_and_store(self, namespace, key, compute, config, token=None):
+        try:
+            value = compute()
+            self.metrics.record(namespace, 'compute')
+            now = time.time()
+            fresh_until = now + config['timeout']
+            shared_cache().set(key, (value, fresh_until), config['timeout'] + config.get('stale', 0))
+            self.remember(key, value, fresh_until, now)
+            return value
+        finally:
+            if token:
+                self.release(key, token)
+
+    def revalidate_in_background(self, namespace, key, compute, config, token):
+        # compute() may depend on the request's timezone (TimezoneMiddleware)
+        tzinfo = timezone.get_current_timezone()
+
+        def run():
+            try:
+                with timezone.override(tzinfo):
+                    self.compute_and_store(namespace, key, compute, config, token)
+            except Exception:
+                logger.exception('Refreshing %s failed', key)
+            finally:
+                connection.close()
+
+        threading.Thread(target=run, name=f'revalidate-{namespace}', daemon=True).start()
+
+
+_layer = None
+_layer_lock = threading.Lock()
+
+
+def get_layer():
+    global _layer
+    if _layer is None:
+        with _layer_lock:
+            if _layer is None:
+                _layer = TwoTierCache()
+    return _layer
+
+
+def get_or_compute(namespace, parts, compute):
+    return get_layer().get_or_compute(namespace, parts, compute)
+
+
+def invalidate(namespace):
+    get_layer().invalidate(namespace)
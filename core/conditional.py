@@ -0,0 +1,59 @@
+# core/conditional.py
+"""
+Conditional GET support for per-user HTML pages.
+
+Pages are tagged with a weak ETag derived from the user's data version stamp
+(Profile.data_version), so a matching If-None-Match is answered with 304 before
+the view runs any query or renders a template.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.middleware.csrf import CSRF_SESSION_KEY
+from django.views.decorators.http import condition
+
+
+def user_data_etag(request, *args, **kwargs):
+    """
+    Builds a weak ETag for the current user's view of the requested URL.
+
+    Returns None (no conditional handling) for anonymous users and for requests
+    that still have flash messages pending, since those must be rendered.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return None
+
+    if len(get_messages(request)):
+        return None
+
+    profile = user.profile  # Loaded with the user by ProfileModelBackend
+
+    # Pages show time-relative state (overdue badges, upcoming windows), so
+    # ETags also roll over every CONDITIONAL_GET_MAX_AGE seconds
+    time_bucket = int(time.time() // settings.CONDITIONAL_GET_MAX_AGE)
+
+    parts = [
+        user.pk,
+        profile.data_version,
+        user.username,
+        profile.avatar.name,
+        profile.timezone,
+        request.get_full_path(),
+        request.session.session_key,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        request.session.get(CSRF_SESSION_KEY, '') if settings.CSRF_USE_SESSIONS else '',
+        time_bucket,
+    ]
+    digest = hashlib.md5(
+        '|'.join(str(part) for part in parts).encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+# Decorator for read-only views whose output depends only on the user's data
+user_data_condition = condition(etag_func=user_data_etag)
@@ -0,0 +1,156 @@
+# core/events.py
+"""
+Live change notifications for Server-Sent Events (see api.views.events).
+
+Writes publish "user X is now at revision R" once their transaction commits.
+Notifications are fanned out in-process to every open event stream of that
+user; streams then read the actual changes from the change log, so a missed
+or coalesced notification never loses an event.
+
+The backend decides how notifications cross process boundaries:
+- LocalBackend: in-process only; the stand-in for single-process servers
+  and development.
+- DatabasePollingBackend: additionally polls the revisions of subscribed
+  users, so writes made by other workers reach this process's streams.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One open event stream, woken up through its own event loop."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def wake(self):
+        self.loop.call_soon_threadsafe(self.event.set)
+
+    async def wait(self, timeout):
+        """Returns True when notified, False on timeout."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+class Broker:
+    """Thread-safe in-process pub/sub keyed by user id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def user_ids(self):
+        with self._lock:
+            return list(self._subscriptions)
+
+    def notify(self, user_id):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.wake()
+
+
+class LocalBackend:
+    """Delivers notifications to streams in the current process only."""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def start(self):
+        pass
+
+    def publish(self, user_id, revision):
+        self.broker.notify(user_id)
+
+
+class DatabasePollingBackend(LocalBackend):
+    """
+    Also picks up writes from other processes by polling Profile.data_version
+    for the users with open streams (one query per interval for all of them).
+    """
+
+    def __init__(self, broker, interval=None):
+        super().__init__(broker)
+        self.interval = interval or settings.LIVE_EVENTS_POLL_INTERVAL
+        self.revisions = {}
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name='live-events-poller', daemon=True)
+        thread.start()
+
+    def _run(self):
+        stop = threading.Event()
+        while not stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Live event polling failed')
+            finally:
+                close_old_connections()
+
+    def poll(self):
+        from accounts.models import Profile
+
+        user_ids = self.broker.user_ids()
+        if not user_ids:
+            self.revisions.clear()
+            return
+
+        current = dict(
+            Profile.objects.filter(user_id__in=user_ids).values_list('user_id', 'data_version')
+        )
+        for user_id, revision in current.items():
+            previous = self.revisions.get(user_id)
+            if previous is not None and revision > previous:
+                self.broker.notify(user_id)
+        self.revisions = current
+
+
+broker = Broker()
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend = import_string(settings.LIVE_EVENTS_BACKEND)(broker)
+                backend.start()
+                _backend = backend
+    return _backend
+
+
+def publish(user_id, revision):
+    get_backend().publish(user_id, revision)
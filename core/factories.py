@@ -0,0 +1,88 @@
+# core/factories.py
+"""
+Lightweight model factories for the test suites.
+
+Plain functions: each fills in sensible defaults (unique names from a shared
+counter, a due date a few days out) so tests only spell out the fields they
+care about. Users are created with PASSWORD.
+"""
+
+import itertools
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+
+from assignments.models import Assignment, AssignmentSeries, AssignmentTemplate
+from courses.models import Course, Enrollment
+from grades.models import Grade
+
+from .caching import get_layer
+from .ratelimit import get_store
+
+PASSWORD = 'factory-pass-123'
+
+# Users and sessions cached in 'shared', as configured when it is a network
+# cache; by default (a database cache) both are read from their own tables
+NETWORK_CACHE_SETTINGS = {
+    'AUTH_USER_CACHE_TIMEOUT': 300,
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+}
+
+_sequence = itertools.count(1)
+
+
+def make_user(username=None, password=PASSWORD, **fields):
+    """A user (and, via the accounts signal, their profile)."""
+    username = username or f'user{next(_sequence)}'
+    return get_user_model().objects.create_user(username=username, password=password, **fields)
+
+
+def make_course(owner, **fields):
+    fields.setdefault('name', f'Course {next(_sequence)}')
+    return Course.objects.create(owner=owner, **fields)
+
+
+def make_assignment(owner, days=3, **fields):
+    """An assignment due `days` from now (negative for overdue)."""
+    fields.setdefault('title', f'Assignment {next(_sequence)}')
+    fields.setdefault('due_date', timezone.now() + timedelta(days=days))
+    return Assignment.objects.create(owner=owner, **fields)
+
+
+def make_grade(assignment, score=80, **fields):
+    return Grade.objects.create(assignment=assignment, score=score, **fields)
+
+
+def make_series(owner, days=1, **fields):
+    """A weekly series whose first occurrence is due `days` from now."""
+    fields.setdefault('title', f'Series {next(_sequence)}')
+    fields.setdefault('dtstart', timezone.now() + timedelta(days=days))
+    return AssignmentSeries.objects.create(owner=owner, **fields)
+
+
+def make_template(course, days=7, **fields):
+    fields.setdefault('title', f'Template {next(_sequence)}')
+    fields.setdefault('due_date', timezone.now() + timedelta(days=days))
+    return AssignmentTemplate.objects.create(course=course, **fields)
+
+
+def make_enrollment(course, student):
+    return Enrollment.objects.create(course=course, student=student)
+
+
+class CacheClearingTestCase(TestCase):
+    """
+    TestCase that starts every test with empty caches (both tiers of
+    core.caching included) and fresh rate-limit buckets. Database ids are reused between tests, so cached users, fragments
+    and ETags from one test would otherwise leak into the next.
+    """
+
+    def setUp(self):
+        super().setUp()
+        for backend in caches.all():
+            backend.clear()
+        get_layer().clear()
+        get_store().clear()
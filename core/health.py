@@ -0,0 +1,153 @@
+# core/health.py
+"""
+Health checks and startup warm-up.
+
+/healthz (liveness) only shows that the process can answer a request and
+touches nothing else. /readyz (readiness) also checks that the database
+answers, that every migration is applied and that the caches work. If any of
+these fails it returns 503 naming the failing check, so load balancers and
+orchestrators only route to workers that can actually serve.
+
+warm_up() runs from homeworktracker.wsgi/asgi before the server accepts
+traffic (WARM_UP_ON_STARTUP). It does the work a cold worker would otherwise
+do during its first user requests:
+- populating the URL resolvers;
+- compiling the project's templates into the cached loader;
+- running the readiness checks once, which also runs the migration check
+  whose result is kept for later /readyz calls.
+
+The database connections it opened are closed at the end. Servers that load
+the application before forking workers (gunicorn --preload) would otherwise
+hand every worker the same SQLite connection, which CONN_MAX_AGE keeps open.
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+_migrations_applied = False
+
+
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def check_migrations():
+    global _migrations_applied
+    if _migrations_applied:
+        return
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        raise RuntimeError(f'{len(plan)} unapplied migration(s)')
+    # Loading the migration graph is slow, and a running server never un-applies one
+    _migrations_applied = True
+
+
+def check_cache():
+    key = f'health:readyz:{os.getpid()}'
+    token = time.time_ns()
+    # The shared one too: a missing cache table only shows up when it is used
+    for alias in settings.CACHES:
+        backend = caches[alias]
+        backend.set(key, token, 10)
+        if backend.get(key) != token:
+            raise RuntimeError(f'cache {alias!r} did not return the value just written')
+
+
+CHECKS = [
+    ('database', check_database),
+    ('migrations', check_migrations),
+    ('cache', check_cache),
+]
+
+
+def run_checks():
+    """{check name: 'ok' or the error}, and whether all of them passed."""
+    results = {}
+    for name, check in CHECKS:
+        try:
+            check()
+            results[name] = 'ok'
+        except Exception as exc:
+            results[name] = f'{type(exc).__name__}: {exc}'
+    return results, all(result == 'ok' for result in results.values())
+
+
+def _prime_resolver(resolver):
+    resolver.reverse_dict  # Populates the resolver and its reverse lookups
+    for _, namespace_resolver in resolver.namespace_dict.values():
+        _prime_resolver(namespace_resolver)
+
+
+def prime_urls():
+    _prime_resolver(get_resolver())
+
+
+def compile_templates():
+    """
+    Loads every template under BASE_DIR into the cached loader and returns how
+    many were compiled. Admin templates are left for their (rare) first use.
+    Nothing is kept with DEBUG on, which reloads templates on every render.
+    """
+    if settings.DEBUG:
+        return 0
+    base = Path(settings.BASE_DIR)
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for directory in map(Path, backend.template_dirs):
+            if not directory.is_relative_to(base) or not directory.is_dir():
+                continue
+            for path in directory.rglob('*'):
+                if path.suffix not in ('.html', '.txt') or not path.is_file():
+                    continue
+                name = path.relative_to(directory).as_posix()
+                try:
+                    backend.get_template(name)
+                    compiled += 1
+                except (TemplateDoesNotExist, TemplateSyntaxError) as exc:
+                    logger.warning('Warm-up could not compile %s: %s', name, exc)
+    return compiled
+
+
+def warm_up():
+    """Runs the warm-up steps, returning each one's duration in milliseconds."""
+    timings = {}
+
+    start = time.perf_counter()
+    prime_urls()
+    timings['urls'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    compiled = compile_templates()
+    timings['templates'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    results, ready = run_checks()
+    timings['checks'] = (time.perf_counter() - start) * 1000
+
+    if not ready:
+        # Still start: /readyz reports the problem and keeps traffic away
+        logger.warning('Warm-up readiness checks failed: %s', results)
+    logger.info(
+        'Warm-up done: urls %.1f ms, %d templates %.1f ms, checks %.1f ms',
+        timings['urls'], compiled, timings['templates'], timings['checks'],
+    )
+    # Each (possibly forked) worker opens its own connection on first use
+    connections.close_all()
+    return timings
@@ -0,0 +1,80 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: loads the WSGI application (and with it the
+# warm-up, if enabled), then times the first requests through it
+SCRIPT = r'''
+import json, sys, time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+start = time.perf_counter()
+from homeworktracker.wsgi import application
+startup = (time.perf_counter() - start) * 1000
+
+
+def get(path):
+    environ = {'PATH_INFO': path, 'HTTP_HOST': 'testserver', 'wsgi.input': BytesIO()}
+    setup_testing_defaults(environ)
+    statuses = []
+    start = time.perf_counter()
+    result = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    b''.join(result)
+    result.close()
+    elapsed = (time.perf_counter() - start) * 1000
+    assert statuses[0].startswith(('200', '503')), statuses[0]
+    return elapsed
+
+
+path = sys.argv[1]
+print(json.dumps({
+    'startup': startup,
+    'first': get(path),
+    'second': get(path),
+    'first readyz': get('/readyz'),
+}))
+'''
+
+COLUMNS = ['startup', 'first', 'second', 'first readyz']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures cold-start latency: starts fresh processes that load the WSGI '
+        'application with and without the startup warm-up, and reports the median '
+        'startup time and first-request latencies. Runs with DEBUG off, so run '
+        'collectstatic first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5,
+                            help='Fresh processes per mode (default: 5).')
+        parser.add_argument('--path', default='/accounts/login/',
+                            help='Page requested first (default: /accounts/login/).')
+
+    def measure(self, warm_up, path):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'homeworktracker.settings'),
+            DJANGO_DEBUG='0',
+            DJANGO_ALLOWED_HOSTS='testserver',
+            DJANGO_WARM_UP='1' if warm_up else '0',
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', SCRIPT, path], env=env, cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        return json.loads(output.splitlines()[-1])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'ms (median)':<14}" + ''.join(f'{column:>14}' for column in COLUMNS))
+        for label, warm_up in (('cold', False), ('warmed up', True)):
+            runs = [self.measure(warm_up, options['path']) for _ in range(options['runs'])]
+            medians = [statistics.median(run[column] for run in runs) for column in COLUMNS]
+            self.stdout.write(f'{label:<14}' + ''.join(f'{value:>14.1f}' for value in medians))
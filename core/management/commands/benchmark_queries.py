@@ -0,0 +1,113 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from assignments.models import Assignment
+from courses.models import Course
+
+# "before" is the original configuration: database sessions and an uncached,
+# profile-less user lookup. The "after" modes use ProfileModelBackend with the
+# defaults for each kind of shared cache: with the database cache, sessions and
+# users are read from their tables (a cache lookup would be a query too); with a
+# network cache both are cached. LocMem stands in for Redis or Memcached, which
+# are equally invisible to the database query count.
+MODES = {
+    'before': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+        'AUTH_USER_CACHE_TIMEOUT': 0,
+    },
+    'after (database cache)': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTH_USER_CACHE_TIMEOUT': 0,
+    },
+    'after (network cache)': {
+        'CACHES': {**settings.CACHES, 'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTH_USER_CACHE_TIMEOUT': 300,
+    },
+    'after (signed_cookies)': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.signed_cookies',
+        'AUTH_USER_CACHE_TIMEOUT': 0,
+    },
+}
+
+VIEWS = ['core:dashboard', 'assignments:assignment_list']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures database queries and latency per request for the dashboard and '
+        'assignment list under each session/auth/cache configuration. Runs against a '
+        'throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assignments', type=int, default=200,
+                            help='Assignments to create for the benchmark user (default: 200).')
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Timed requests per view and mode (default: 20).')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.seed(options['assignments'])
+            rows = [self.measure(mode, overrides, options['requests'])
+                    for mode, overrides in MODES.items()]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'mode':<24}{'view':<32}{'queries':>8}{'ms/request':>12}")
+        for mode_rows in rows:
+            for mode, view, queries, ms in mode_rows:
+                self.stdout.write(f'{mode:<24}{view:<32}{queries:>8}{ms:>12.2f}')
+
+    def seed(self, count):
+        user = User.objects.create_user('benchmark', password='benchmark-password')
+        courses = [Course.objects.create(name=f'Course {i}', owner=user) for i in range(5)]
+        now = timezone.now()
+        Assignment.objects.bulk_create([
+            Assignment(
+                title=f'Assignment {i}',
+                owner=user,
+                course=courses[i % len(courses)] if i % 3 else None,
+                due_date=now + timedelta(hours=i - count // 2),
+                completed=i % 4 == 0,
+            )
+            for i in range(count)
+        ])
+
+    def measure(self, mode, overrides, repeat):
+        results = []
+        with override_settings(**overrides):
+            for cache in caches.all():
+                cache.clear()
+            client = Client()
+            client.login(username='benchmark', password='benchmark-password')
+            for view in VIEWS:
+                url = reverse(view)
+                client.get(url)  # Warm caches; steady state is what we measure
+
+                with CaptureQueriesContext(connection) as queries:
+                    client.get(url, {'_': 0})
+                # Read now: the next request_started signal resets the query log
+                query_count = len(queries)
+
+                start = time.perf_counter()
+                for i in range(repeat):
+                    client.get(url, {'_': i + 1})  # Vary the URL so no 304 short-circuits
+                elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+
+                results.append((mode, view, query_count, elapsed_ms))
+        return results
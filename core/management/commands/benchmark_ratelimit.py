@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from core import ratelimit
+
+SCOPE = 'benchmark'
+STORES = ['core.ratelimit.LocalStore', 'core.ratelimit.CacheStore']
+
+
+def view(request):
+    return HttpResponse()
+
+
+class Command(BaseCommand):
+    help = (
+        'Micro-benchmark of the rate limiter: time per call of a trivial view, '
+        'undecorated and behind @ratelimit with each bucket store.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=100000,
+                            help='Calls per measurement (default: 100000).')
+        parser.add_argument('--clients', type=int, default=1000,
+                            help='Distinct client IPs the calls are spread over (default: 1000).')
+
+    def measure(self, func, requests, calls):
+        start = time.perf_counter()
+        for i in range(calls):
+            func(requests[i % len(requests)])
+        return (time.perf_counter() - start) / calls * 1e6
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = []
+        for i in range(options['clients']):
+            request = factory.post('/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}')
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        baseline = self.measure(view, requests, options['calls'])
+        self.stdout.write(f"{'store':<32}{'us/call':>10}{'overhead':>10}")
+        self.stdout.write(f"{'(no rate limit)':<32}{baseline:>10.2f}{'':>10}")
+
+        # High enough that no call is limited: only the bookkeeping is measured
+        with override_settings(RATE_LIMITS={SCOPE: f"{options['calls']}/s"}):
+            limited = ratelimit.ratelimit(SCOPE, key='ip')(view)
+            try:
+                for store in STORES:
+                    with override_settings(RATE_LIMIT_STORE=store):
+                        ratelimit._store = None
+                        per_call = self.measure(limited, requests, options['calls'])
+                    self.stdout.write(f'{store:<32}{per_call:>10.2f}{per_call - baseline:>10.2f}')
+            finally:
+                ratelimit._store = None
+                self.delete_buckets(requests)
+
+    def delete_buckets(self, requests):
+        """Removes the benchmark's buckets from the shared cache, which may be a live one."""
+        keys = {
+            ratelimit.CacheStore.prefix + f"{SCOPE}:{ratelimit.client_ident(request, 'ip')}"
+            for request in requests
+        }
+        caches[settings.RATE_LIMIT_CACHE_ALIAS].delete_many(list(keys))
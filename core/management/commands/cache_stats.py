@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.caching import LOOKUPS, get_layer
+
+
+class Command(BaseCommand):
+    help = (
+        'Reports hits, misses and recomputes per namespace of the two-tier '
+        'cache (core.caching), summed over all processes. Counts reach the '
+        'shared cache every CACHE_METRICS_FLUSH_INTERVAL seconds.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Zero the counters after reporting them.',
+        )
+        parser.add_argument(
+            '--invalidate',
+            metavar='NAMESPACE',
+            action='append',
+            default=[],
+            help='Drop every value cached in NAMESPACE (may be repeated).',
+        )
+
+    def handle(self, *args, **options):
+        layer = get_layer()
+        for namespace in options['invalidate']:
+            if namespace not in settings.CACHE_NAMESPACES:
+                raise CommandError(f'Unknown namespace {namespace!r}.')
+            layer.invalidate(namespace)
+            self.stdout.write(f'Invalidated {namespace}.')
+
+        layer.metrics.flush()
+        self.stdout.write(
+            f'{"namespace":<14} {"lookups":>8} {"hit %":>6} {"local":>7} {"shared":>7} {"stale":>7} '
+            f'{"miss":>7} {"wait":>6} {"compute":>8}'
+        )
+        for namespace in settings.CACHE_NAMESPACES:
+            totals = layer.metrics.totals(namespace)
+            lookups = sum(totals[event] for event in LOOKUPS)
+            hits = lookups - totals['miss']
+            ratio = f'{hits / lookups * 100:.1f}' if lookups else '-'
+            self.stdout.write(
+                f'{namespace:<14} {lookups:>8} {ratio:>6} {totals["local_hit"]:>7} {totals["shared_hit"]:>7} '
+                f'{totals["stale_hit"]:>7} {totals["miss"]:>7} {totals["wait"]:>6} {totals["compute"]:>8}'
+            )
+            if options['reset']:
+                layer.metrics.reset(namespace)
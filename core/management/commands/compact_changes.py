@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts.backends import invalidate_cached_user
+from accounts.models import Profile
+from core.models import Change
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes change-log tombstones older than the retention period. Clients '
+        'whose sync cursor predates the removed tombstones are told to reset.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+            help='Age in days after which tombstones are removed '
+                 f'(default: {settings.SYNC_TOMBSTONE_RETENTION_DAYS}).',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        tombstones = Change.objects.filter(deleted=True, changed_at__lt=cutoff)
+
+        with transaction.atomic():
+            floors = tombstones.values('user_id').annotate(floor=Max('revision'))
+            for row in floors:
+                Profile.objects.filter(
+                    user_id=row['user_id'], tombstone_floor__lt=row['floor']
+                ).update(tombstone_floor=row['floor'])
+                invalidate_cached_user(row['user_id'])
+            deleted, _ = tombstones.delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {deleted} tombstone(s) for {len(floors)} user(s).'
+        ))
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+from core.purge import purge_course, purge_user, run
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        'Purges deleted courses and accounts whose background purge has not '
+        'finished, e.g. because the server restarted, reporting progress per batch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.PURGE_BATCH_SIZE,
+            help=f'Rows deleted per transaction (default: {settings.PURGE_BATCH_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        pending = [
+            (purge_user, 'Account', Profile.objects.filter(deleted_at__isnull=False).values_list('user_id', flat=True)),
+            (purge_course, 'Course', Course.all_objects.filter(deleted_at__isnull=False).values_list('pk', flat=True)),
+        ]
+        purged = 0
+        for purge, name, ids in pending:
+            for object_id in list(ids):
+                def report(label, total):
+                    self.stdout.write(f'{name} {object_id}: {total} {label} deleted')
+
+                run(purge, object_id, options['batch_size'], report=report)
+                purged += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} deleted course(s) and account(s).'))
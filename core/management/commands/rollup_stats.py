@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.rollups import rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Updates today's per-user, per-course DailyStat snapshots for users whose "
+        'assignments, courses or grades changed since the last run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute every user, e.g. from a daily cron so overdue counts stay current.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Users aggregated per query (default: 500).',
+        )
+
+    def handle(self, *args, **options):
+        processed = rollup(full=options['full'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rolled up statistics for {processed} user(s).'))
@@ -0,0 +1,78 @@
+import glob
+import json
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Summarises the slow-query log (and its rotated files) by query '
+        'fingerprint, most total time first. With --traces, reads the sampled '
+        'per-request traces instead, which include every statement.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Fingerprints to show (default: 20).',
+        )
+        parser.add_argument(
+            '--log',
+            default=str(settings.SLOW_QUERY_LOG),
+            help=f'Slow-query log to read (default: {settings.SLOW_QUERY_LOG}).',
+        )
+        parser.add_argument(
+            '--traces',
+            action='store_true',
+            help=f'Read the sampled traces in {settings.QUERY_PROFILE_DIR} instead of the log.',
+        )
+
+    def handle(self, *args, **options):
+        stats = defaultdict(lambda: {'count': 0, 'total': 0.0, 'max': 0.0, 'sql': '', 'views': Counter()})
+        records = self.read_traces() if options['traces'] else self.read_log(options['log'])
+        for record, view in records:
+            entry = stats[record['fingerprint']]
+            entry['count'] += 1
+            entry['total'] += record['duration_ms']
+            entry['max'] = max(entry['max'], record['duration_ms'])
+            entry['sql'] = record['sql']
+            entry['views'][view or '-'] += 1
+
+        if not stats:
+            self.stdout.write('No queries recorded.')
+            return
+
+        ranked = sorted(stats.items(), key=lambda item: item[1]['total'], reverse=True)
+        self.stdout.write(f'{"total ms":>10} {"count":>7} {"mean ms":>9} {"max ms":>9}  fingerprint   top view')
+        for key, entry in ranked[:options['limit']]:
+            view, _ = entry['views'].most_common(1)[0]
+            self.stdout.write(
+                f'{entry["total"]:>10.1f} {entry["count"]:>7} {entry["total"] / entry["count"]:>9.1f} '
+                f'{entry["max"]:>9.1f}  {key}  {view}'
+            )
+            self.stdout.write(f'    {entry["sql"][:200]}')
+
+    def read_log(self, path):
+        """Records from the log and its rotated backups (path.1, path.2, ...)."""
+        for name in [path] + sorted(glob.glob(f'{glob.escape(path)}.*')):
+            if not os.path.isfile(name):
+                continue
+            with open(name) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    yield record, record.get('view')
+
+    def read_traces(self):
+        for name in glob.glob(os.path.join(glob.escape(str(settings.QUERY_PROFILE_DIR)), '*.json')):
+            with open(name) as f:
+                trace = json.load(f)
+            for record in trace['queries']:
+                yield record, trace.get('view')
@@ -0,0 +1,124 @@
+# core/middleware.py
+import cProfile
+import random
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from .profiling import QueryRecorder
+
+re_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+class ResponseCompressionMiddleware:
+    """
+    Gzip-compresses HTML, JSON and calendar responses above a size threshold.
+
+    Responses that embed a CSRF token are padded with a random number of bytes
+    (the "Heal The Breach" mitigation used by Django's GZipMiddleware) so their
+    compressed length cannot be used to recover secrets via BREACH. Responses
+    without a CSRF token are compressed without padding.
+    """
+
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+        self.content_types = tuple(settings.COMPRESSION_CONTENT_TYPES)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def should_compress(self, response):
+        if response.has_header('Content-Encoding'):
+            return False
+        # Byte ranges refer to the uncompressed body (attachment downloads)
+        if response.status_code == 206 or any(
+            response.has_header(header) for header in ('Accept-Ranges', 'Content-Range')
+        ):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in self.content_types:
+            return False
+        if response.streaming:
+            return True
+        return len(response.content) >= self.min_size
+
+    def embeds_csrf_token(self, response):
+        # Streams can't be inspected up front, so they are always padded
+        return response.streaming or b'csrfmiddlewaretoken' in response.content
+
+    def process_response(self, request, response):
+        if not self.should_compress(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return response
+
+        max_random_bytes = self.max_random_bytes if self.embeds_csrf_token(response) else None
+
+        if response.streaming:
+            if response.is_async:
+                original_iterator = response.streaming_content
+
+                async def gzip_wrapper():
+                    async for chunk in original_iterator:
+                        yield compress_string(chunk, max_random_bytes=max_random_bytes)
+
+                response.streaming_content = gzip_wrapper()
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, max_random_bytes=max_random_bytes
+                )
+            del response.headers['Content-Length']
+        else:
+            compressed_content = compress_string(response.content, max_random_bytes=max_random_bytes)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # Compressed bodies differ byte-wise, so any strong ETag must become weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+
+class QueryProfilingMiddleware:
+    """
+    Records slow SQL statements for every request and full query traces for a
+    sample of them (see core.profiling). Removed from the stack when both the
+    slow-query threshold and the sample rate are off.
+    """
+
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_THRESHOLD_MS is None and not settings.QUERY_PROFILE_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.QUERY_PROFILE_SAMPLE_RATE
+        recorder = QueryRecorder(settings.SLOW_QUERY_THRESHOLD_MS, trace=sampled)
+        profiler = cProfile.Profile() if sampled and settings.QUERY_PROFILE_CPROFILE else None
+        started = time.perf_counter()
+
+        with connection.execute_wrapper(recorder):
+            if profiler is not None:
+                response = profiler.runcall(self.get_response, request)
+            else:
+                response = self.get_response(request)
+
+        recorder.log_slow(request)
+        if sampled:
+            recorder.write_trace(request, response, time.perf_counter() - started, profiler)
+        return response
@@ -1,3 +1,171 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.conf import settings
 
-# Create your models here.
+
+class DirtyFieldsMixin:
+    """
+    Remembers field values as loaded from the database, so save() writes only
+    the fields that changed (plus auto_now timestamps) and skips the UPDATE,
+    and its signals, entirely when nothing changed.
+
+    post_save receivers see the written fields as `update_fields`, which lets
+    them react only to the changes they care about. Explicit update_fields,
+    inserts and force_insert/force_update saves behave as usual.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_dirty_fields(self):
+        """Names of fields changed since loading, or None if the instance wasn't loaded."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        deferred = self.get_deferred_fields()
+        return {
+            field.name
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.attname not in deferred
+            # A field deferred at load time but assigned since counts as changed
+            and (field.attname not in loaded or getattr(self, field.attname) != loaded[field.attname])
+        }
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        tracked = not (args or self._state.adding or kwargs.get('force_insert') or kwargs.get('force_update'))
+        if tracked and update_fields is None:
+            dirty = self.get_dirty_fields()
+            if dirty is not None:
+                if not dirty:
+                    return
+                auto_now = {f.name for f in self._meta.concrete_fields if getattr(f, 'auto_now', False)}
+                update_fields = kwargs['update_fields'] = dirty | auto_now
+        super().save(*args, **kwargs)
+        self._remember_values(update_fields)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_values(kwargs.get('fields'))
+
+    def _remember_values(self, fields=None):
+        deferred = self.get_deferred_fields()
+        values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred and (fields is None or field.name in fields or field.attname in fields)
+        }
+        if fields is None:
+            self._loaded_values = values
+        elif hasattr(self, '_loaded_values'):
+            self._loaded_values.update(values)
+
+
+class ChangeTrackedModel(models.Model):
+    """
+    Abstract base for models mirrored by the delta-sync change log.
+
+    Saves run inside a transaction so the post_save receiver in core.signals
+    writes the Change row atomically with the row itself. Deletes, including
+    cascades, are already wrapped in a transaction by Django's collector.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class Change(models.Model):
+    """
+    Latest change to one synced object, stamped with the owner's revision.
+
+    There is one row per object: saves and deletes upsert it with a new
+    revision, and deletes leave a tombstone (deleted=True) so offline clients
+    learn about removals. Old tombstones are removed by `compact_changes`.
+    """
+
+    ASSIGNMENT = 'assignment'
+    COURSE = 'course'
+    GRADE = 'grade'
+    OBJECT_TYPES = [
+        (ASSIGNMENT, 'Assignment'),
+        (COURSE, 'Course'),
+        (GRADE, 'Grade'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    object_type = models.CharField(max_length=20, choices=OBJECT_TYPES)
+    object_id = models.BigIntegerField()
+    revision = models.PositiveBigIntegerField()  # Owner's Profile.data_version after the change
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'object_type', 'object_id'],
+                name='unique_change_per_object',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'revision'], name='change_user_revision_idx'),
+        ]
+
+    def __str__(self):
+        action = 'deleted' if self.deleted else 'changed'
+        return f'{self.object_type} {self.object_id} {action} at r{self.revision}'
+
+
+class DailyStat(models.Model):
+    """
+    Daily per-user, per-course snapshot of assignment progress.
+
+    Maintained by `manage.py rollup_stats`; course=None holds uncategorized
+    assignments. Trend charts read these rows instead of aggregating raw data.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE, null=True, blank=True)
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    overdue = models.PositiveIntegerField(default=0)
+    average_grade = models.FloatField(null=True, blank=True)  # Mean percentage of graded assignments
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'course', 'date'],
+                condition=models.Q(course__isnull=False),
+                name='unique_daily_stat_per_course',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'date'],
+                condition=models.Q(course__isnull=True),
+                name='unique_daily_stat_uncategorized',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date'], name='daily_stat_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.date}: {self.completed}/{self.total}'
+
+
+class RollupWatermark(models.Model):
+    """Point in time up to which a rollup job has processed changes."""
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.name} @ {self.value.isoformat()}'
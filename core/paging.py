@@ -0,0 +1,21 @@
+# core/paging.py
+
+
+def keyset_pages(queryset, page_size, pk=lambda row: row.pk):
+    """
+    Yields the queryset's rows as lists of up to page_size, in primary key
+    order, each fetched with its own `pk > last` query.
+
+    Unlike .iterator(), no database cursor stays open between pages. A
+    consumer that yields to a slow client, such as a streamed download, would
+    otherwise hold SQLite's read lock and block writers for as long as it runs.
+    `pk` reads the key from a row; pass e.g. itemgetter(0) for values_list rows
+    that start with 'pk'.
+    """
+    queryset = queryset.order_by('pk')
+    page = list(queryset[:page_size])
+    while page:
+        yield page
+        if len(page) < page_size:
+            return
+        page = list(queryset.filter(pk__gt=pk(page[-1]))[:page_size])
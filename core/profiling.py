@@ -0,0 +1,128 @@
+# core/profiling.py
+"""
+SQL profiling for production (see core.middleware.QueryProfilingMiddleware).
+
+Every statement runs through a QueryRecorder installed with
+connection.execute_wrapper(). Statements slower than SLOW_QUERY_THRESHOLD_MS
+are written, once the request is done, as one JSON line each to the
+'core.slow_queries' logger, which settings.LOGGING sends to a rotating file.
+Each line has the statement's fingerprint, its duration, the view name and
+the user id.
+
+A QUERY_PROFILE_SAMPLE_RATE fraction of requests is traced in full: every
+statement and its duration go to a JSON file in QUERY_PROFILE_DIR, together
+with a cProfile dump (.prof) if QUERY_PROFILE_CPROFILE is set.
+
+Fingerprints are the SQL with literals and placeholders replaced by '?' and
+IN lists collapsed, so the same query from different requests groups
+together. Parameters are never recorded. `manage.py top_queries` sums them up.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import empty
+
+logger = logging.getLogger('core.slow_queries')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \(\?(?:, ?\?)*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """SQL with literals and placeholders as '?' and IN (?, ?, ...) as IN (...)."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """(short id, normalized SQL) identifying a query shape."""
+    normalized = normalize(sql)
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+def request_user_id(request):
+    """The user's id if the request already loaded the user; never triggers a lookup."""
+    user = getattr(request, 'user', None)
+    if user is None or getattr(user, '_wrapped', None) is empty:
+        return None
+    return user.pk
+
+
+class QueryRecorder:
+    """execute_wrapper that times statements, keeping slow ones (and all, if tracing)."""
+
+    def __init__(self, threshold_ms, trace=False):
+        self.threshold = threshold_ms / 1000 if threshold_ms is not None else None
+        self.trace = trace
+        self.slow = []
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if self.trace:
+                self.queries.append((sql, duration))
+            if self.threshold is not None and duration >= self.threshold:
+                self.slow.append((sql, duration))
+
+    def context(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'view': match.view_name if match else None,
+            'user_id': request_user_id(request),
+            'method': request.method,
+            'path': request.path,
+        }
+
+    def log_slow(self, request):
+        if not self.slow:
+            return
+        context = self.context(request)
+        for sql, duration in self.slow:
+            key, normalized = fingerprint(sql)
+            logger.info(json.dumps({
+                'ts': timezone.now().isoformat(),
+                'fingerprint': key,
+                'sql': normalized[:settings.SLOW_QUERY_MAX_SQL_LENGTH],
+                'duration_ms': round(duration * 1000, 3),
+                **context,
+            }))
+
+    def write_trace(self, request, response, elapsed, profiler=None):
+        """Writes the request's full query trace (and cProfile stats) to QUERY_PROFILE_DIR."""
+        context = self.context(request)
+        os.makedirs(settings.QUERY_PROFILE_DIR, exist_ok=True)
+        view = (context['view'] or 'unresolved').replace(':', '.')
+        base = os.path.join(settings.QUERY_PROFILE_DIR, f'{time.time_ns()}-{view}')
+
+        queries = []
+        for sql, duration in self.queries:
+            key, normalized = fingerprint(sql)
+            queries.append({'fingerprint': key, 'sql': normalized, 'duration_ms': round(duration * 1000, 3)})
+        with open(f'{base}.json', 'w') as f:
+            json.dump({
+                'ts': timezone.now().isoformat(),
+                **context,
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 3),
+                'query_count': len(queries),
+                'query_ms': round(sum(q['duration_ms'] for q in queries), 3),
+                'queries': queries,
+            }, f, indent=1)
+        if profiler is not None:
+            profiler.dump_stats(f'{base}.prof')
@@ -0,0 +1,166 @@
+# core/purge.py
+"""
+Deleting courses and accounts without deleting them inside the request.
+
+delete_course() and delete_account() only mark the row (Course.deleted_at,
+Profile.deleted_at), which hides it at once, and leave sync tombstones. The
+rows it owns are then removed by purge_course() / purge_user(): children
+first, PURGE_BATCH_SIZE rows at a time, each batch in its own short
+transaction. No step loads a whole cascade into memory or holds a long write
+lock, and the final delete() of the course or user finds nothing left to
+cascade to.
+
+Purges are generators yielding (label, rows deleted) after every batch, so
+callers can report progress. start() runs one in a daemon thread once the
+deleting transaction commits; `manage.py purge_deleted` finishes anything an
+interrupted process left behind.
+"""
+
+import logging
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import Profile
+from assignments.models import Assignment, AssignmentSeries, AssignmentTemplate
+from attachments.models import Attachment, Upload
+from courses.directory import invalidate_course_directory
+from courses.models import Course, Enrollment
+from grades.models import Grade
+
+from .changes import record_bulk_changes, record_changes
+from .models import Change, DailyStat
+
+logger = logging.getLogger(__name__)
+
+
+def delete_course(course):
+    """Hides the course and schedules its purge."""
+    with transaction.atomic():
+        Course.all_objects.filter(pk=course.pk).update(deleted_at=timezone.now())
+        invalidate_course_directory(course.owner_id)
+        # Sync clients drop the course now rather than when the purge finishes
+        record_changes(course.owner_id, Change.COURSE, [course.pk], deleted=True)
+        start(purge_course, course.pk)
+
+
+def delete_account(user):
+    """Deactivates the user, which signs them out everywhere, and schedules the purge."""
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        Profile.objects.filter(user=user).update(deleted_at=timezone.now())
+        start(purge_user, user.pk)
+
+
+def delete_in_batches(queryset, batch_size, object_type=None, owner_field=None):
+    """
+    Deletes the queryset's rows batch_size at a time and yields each batch's
+    size. With object_type, tombstones are logged for every batch in bulk,
+    keyed by the owner found through owner_field.
+    """
+    model = queryset.model
+    while True:
+        with transaction.atomic():
+            if object_type:
+                rows = list(queryset.values_list('pk', owner_field)[:batch_size])
+            else:
+                rows = [(pk, None) for pk in queryset.values_list('pk', flat=True)[:batch_size]]
+            if not rows:
+                return
+            batch = model._base_manager.filter(pk__in=[pk for pk, _ in rows])
+            batch.change_logged = True  # Skips the per-row tombstones in core.signals
+            batch.delete()
+            if object_type:
+                record_bulk_changes(
+                    [(owner_id, object_type, pk) for pk, owner_id in rows], deleted=True
+                )
+        yield len(rows)
+
+
+def purge_course(course_id, batch_size=None):
+    """Removes a deleted course and everything in it. Yields (label, rows deleted)."""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    steps = [
+        # Students' copies of class assignments have tombstones for the students
+        ('grades', Grade.objects.filter(assignment__course_id=course_id), Change.GRADE, 'assignment__owner_id'),
+        # Batched here rather than cascaded from each assignment; their signals give back the quota
+        ('attachments', Attachment.objects.filter(assignment__course_id=course_id), None, None),
+        ('uploads', Upload.objects.filter(assignment__course_id=course_id), None, None),
+        ('assignments', Assignment.objects.filter(course_id=course_id), Change.ASSIGNMENT, 'owner_id'),
+        ('series', AssignmentSeries.objects.filter(course_id=course_id), None, None),
+        ('templates', AssignmentTemplate.objects.filter(course_id=course_id), None, None),
+        ('enrollments', Enrollment.objects.filter(course_id=course_id), None, None),
+        ('daily stats', DailyStat.objects.filter(course_id=course_id), None, None),
+    ]
+    for label, queryset, object_type, owner_field in steps:
+        for count in delete_in_batches(queryset, batch_size, object_type, owner_field):
+            yield label, count
+
+    course = Course.all_objects.filter(pk=course_id).first()
+    if course is not None:
+        course.delete()
+        yield 'courses', 1
+
+
+def purge_user(user_id, batch_size=None):
+    """Removes a deleted account and everything it owns. Yields (label, rows deleted)."""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    for course_id in Course.all_objects.filter(owner_id=user_id).values_list('pk', flat=True):
+        yield from purge_course(course_id, batch_size)
+
+    # The rest belongs to the user alone, who has nobody left to sync with
+    steps = [
+        ('grades', Grade.objects.filter(assignment__owner_id=user_id)),
+        ('attachments', Attachment.objects.filter(assignment__owner_id=user_id)),
+        ('uploads', Upload.objects.filter(assignment__owner_id=user_id)),
+        ('assignments', Assignment.objects.filter(owner_id=user_id)),
+        ('series', AssignmentSeries.objects.filter(owner_id=user_id)),
+        ('enrollments', Enrollment.objects.filter(student_id=user_id)),
+        ('daily stats', DailyStat.objects.filter(user_id=user_id)),
+        ('changes', Change.objects.filter(user_id=user_id)),
+    ]
+    for label, queryset in steps:
+        for count in delete_in_batches(queryset, batch_size):
+            yield label, count
+
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is not None:
+        user.delete()
+        yield 'users', 1
+
+
+def run(purge, object_id, batch_size=None, report=None):
+    """Runs a purge to completion, passing progress to report(label, total so far)."""
+    totals = {}
+    for label, count in purge(object_id, batch_size):
+        totals[label] = totals.get(label, 0) + count
+        if report:
+            report(label, totals[label])
+    return totals
+
+
+def _run_in_thread(purge, object_id):
+    def report(label, total):
+        logger.info('%s(%s): %d %s deleted', purge.__name__, object_id, total, label)
+
+    try:
+        run(purge, object_id, report=report)
+    except Exception:
+        # Left for `manage.py purge_deleted` to retry
+        logger.exception('%s(%s) failed', purge.__name__, object_id)
+    finally:
+        connection.close()  # The thread's own connection
+
+
+def start(purge, object_id):
+    """Runs the purge in a background thread once the current transaction commits."""
+    if not settings.PURGE_IN_BACKGROUND:
+        return
+    transaction.on_commit(lambda: threading.Thread(
+        target=partial(_run_in_thread, purge, object_id), name=f'purge-{object_id}', daemon=True,
+    ).start())
@@ -0,0 +1,151 @@
+# core/ratelimit.py
+"""
+Per-view rate limiting with token buckets.
+
+    @ratelimit('login', key='ip', methods=['POST'])
+    def view(request): ...
+
+The scope name ('login') looks up its rate in settings.RATE_LIMITS, e.g.
+'10/m': buckets hold up to 10 tokens and refill at 10 per minute, so short
+bursts pass and sustained traffic is held to the rate. Buckets are kept per
+client IP (key='ip'), per signed-in user, falling back to the IP
+(key='user'), or per username posted in the request, falling back to the IP
+(key='username'), which holds attempts on one account from many addresses.
+Requests over the limit get a 429 with a Retry-After header.
+
+Bucket state lives in a pluggable store (RATE_LIMIT_STORE):
+- LocalStore: an in-process dict with LRU eviction; no I/O, but each process
+  has its own buckets.
+- CacheStore: CACHES[RATE_LIMIT_CACHE_ALIAS] (the shared cache by
+  default), seen by all processes. The read-modify-write is not atomic, so
+  racing requests may overdraw a bucket slightly, which is fine for abuse
+  protection.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'10/m' -> (capacity 10, refill rate in tokens per second)."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period]
+
+
+def take_token(state, capacity, refill_rate, now):
+    """
+    Refills the bucket (tokens, last update) for the time elapsed and takes a
+    token. Returns (new state, seconds to wait), the wait being 0 if allowed.
+    Times are wall-clock seconds, so processes sharing a CacheStore agree.
+    """
+    tokens, updated = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill_rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / refill_rate
+
+
+class LocalStore:
+    """Buckets in process memory; the least recently used are evicted past max_keys."""
+
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys or settings.RATE_LIMIT_LOCAL_MAX_KEYS
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now):
+        with self.lock:
+            state, wait = take_token(self.buckets.pop(key, None), capacity, refill_rate, now)
+            self.buckets[key] = state
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheStore:
+    """Buckets in the Django cache, shared between processes."""
+
+    prefix = 'ratelimit:'
+
+    def __init__(self, alias=None):
+        self.alias = alias or settings.RATE_LIMIT_CACHE_ALIAS
+
+    def take(self, key, capacity, refill_rate, now):
+        cache = caches[self.alias]
+        key = self.prefix + key
+        state, wait = take_token(cache.get(key), capacity, refill_rate, now)
+        # A bucket left alone until it is full again is the same as no bucket
+        cache.set(key, state, math.ceil(capacity / refill_rate))
+        return wait
+
+    def clear(self):
+        pass  # Entries expire once their bucket would be full
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.RATE_LIMIT_STORE)()
+    return _store
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_ident(request, key):
+    if key == 'user' and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if key == 'username':
+        username = request.POST.get('username', '').strip().lower()
+        if username:
+            # Hashed: usernames may hold characters some cache backends reject in keys
+            return 'username:' + hashlib.md5(username.encode(), usedforsecurity=False).hexdigest()
+    return f'ip:{client_ip(request)}'
+
+
+def ratelimit(scope, key='user', methods=None):
+    """
+    Limits a view to the rate configured for `scope` in settings.RATE_LIMITS,
+    per user ('user', falling back to the IP when signed out), per IP ('ip')
+    or per posted username ('username', falling back to the IP). Only
+    requests with the given methods count; by default all do.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = settings.RATE_LIMITS.get(scope)
+            if rate and (methods is None or request.method in methods):
+                capacity, refill_rate = parse_rate(rate)
+                wait = get_store().take(f'{scope}:{client_ident(request, key)}', capacity, refill_rate, time.time())
+                if wait:
+                    response = HttpResponse('Too many requests. Please try again later.', status=429,
+                                            content_type='text/plain')
+                    response['Retry-After'] = str(math.ceil(wait))
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
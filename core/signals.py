@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import Profile
+from assignments.models import Assignment, AssignmentSeries
+from courses.models import Course
+from grades.models import Grade
+
+from .changes import record_change
+from .models import Change
+
+OBJECT_TYPES = {
+    Assignment: Change.ASSIGNMENT,
+    Course: Change.COURSE,
+    Grade: Change.GRADE,
+}
+
+
+def _owner_id(instance, origin=None):
+    if not isinstance(instance, Grade):
+        return instance.owner_id
+    # Grades carry no owner column; avoid a lookup when the assignment is at hand
+    if Grade.assignment.is_cached(instance):
+        return instance.assignment.owner_id
+    if isinstance(origin, Assignment) and origin.pk == instance.assignment_id:
+        return origin.owner_id
+    return Assignment.objects.filter(pk=instance.assignment_id).values_list('owner_id', flat=True).first()
+
+
+@receiver(post_save, sender=Assignment)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Grade)
+def record_save(sender, instance, raw=False, **kwargs):
+    """Logs the change and bumps the owner's revision (and with it, their page ETags)."""
+    if raw:
+        return
+    record_change(_owner_id(instance), OBJECT_TYPES[sender], instance.pk)
+
+
+@receiver(post_delete, sender=Assignment)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Grade)
+def record_delete(sender, instance, origin=None, **kwargs):
+    """Leaves a tombstone, including for rows removed by a cascade."""
+    # The whole account is going away; there is nobody left to sync with
+    if isinstance(origin, get_user_model()):
+        return
+    # Batched purges log their tombstones in bulk (core.purge)
+    if getattr(origin, 'change_logged', False):
+        return
+    owner_id = _owner_id(instance, origin)
+    if owner_id is not None:
+        record_change(owner_id, OBJECT_TYPES[sender], instance.pk, deleted=True)
+
+
+@receiver(post_save, sender=AssignmentSeries)
+@receiver(post_delete, sender=AssignmentSeries)
+def bump_for_series(sender, instance, raw=False, origin=None, **kwargs):
+    """
+    Series are not part of the sync change log, but their occurrences appear on
+    pages, so a change still has to move the owner's page ETags.
+    """
+    if raw or isinstance(origin, get_user_model()) or getattr(origin, 'change_logged', False):
+        return
+    Profile.bump_data_version(instance.owner_id)
@@ -1,3 +1,833 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_save
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import compress_sequence, compress_string
+
+from accounts.models import Profile
+from assignments.models import Assignment
+from courses.models import Course, Enrollment
+from grades.models import Grade
+
+from .factories import (
+    NETWORK_CACHE_SETTINGS, CacheClearingTestCase, make_assignment, make_course, make_enrollment, make_grade,
+    make_series, make_template, make_user,
+)
+from . import health
+from .caching import TwoTierCache, get_layer, shared_cache
+from .changes import changes_since, record_bulk_changes
+from .events import Broker, DatabasePollingBackend, LocalBackend
+from .middleware import ResponseCompressionMiddleware
+from .models import Change, DailyStat, RollupWatermark
+from .profiling import fingerprint
+from .purge import delete_account, delete_course, purge_course, purge_user, run
+from .ratelimit import CacheStore, LocalStore, ratelimit, take_token
+from .rollups import WATERMARK_OVERLAP, daily_totals, rollup
+
+
+class DashboardViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        for _ in range(3):
+            course = make_course(cls.user)
+            make_assignment(cls.user, course=course, days=2)
+            make_grade(make_assignment(cls.user, course=course, days=-2, completed=True))
+            make_assignment(cls.user, course=course, days=-1)
+        cls.series = make_series(cls.user, course=course)
+        make_assignment(make_user())  # Someone else's
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertRedirects(response, f"{reverse('login')}?next=/", fetch_redirect_response=False)
+
+    def test_stats(self):
+        response = self.client.get(reverse('core:dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_assignments'], 9)
+        self.assertEqual(response.context['completed_assignments'], 3)
+        self.assertEqual(response.context['overdue_assignments'], 3)
+        self.assertEqual(len(response.context['course_chart_data']), 3)
+
+    def test_calendar_includes_series_occurrences(self):
+        response = self.client.get(reverse('core:dashboard'))
+
+        events = json.loads(response.context['calendar_events_json'])
+        occurrences = [event for event in events if event['id'] is None]
+        self.assertTrue(occurrences)
+        self.assertEqual({e['extendedProps']['series_id'] for e in occurrences}, {self.series.pk})
+
+    def test_query_count(self):
+        # Fixed regardless of the number of courses, assignments and grades
+        # (the first two are the session and the user)
+        with self.assertNumQueries(12):
+            self.client.get(reverse('core:dashboard'))
+
+    @override_settings(**NETWORK_CACHE_SETTINGS)
+    def test_served_from_the_cache_until_the_data_changes(self):
+        self.client.get(reverse('core:dashboard'))
+        with self.assertNumQueries(0):  # The session and user come from the cache too
+            response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.context['total_assignments'], 9)
+
+        with self.captureOnCommitCallbacks(execute=True):  # Drops the cached user
+            make_assignment(self.user)
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.context['total_assignments'], 10)
+
+    def test_unchanged_page_is_not_modified(self):
+        etag = self.client.get(reverse('core:dashboard'))['ETag']
+
+        response = self.client.get(reverse('core:dashboard'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class DirtyFieldsMixinTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('student')
+        created = Assignment.objects.create(title='Essay', owner=self.user, due_date=timezone.now())
+        self.assignment = Assignment.objects.get(pk=created.pk)
+
+    def test_unchanged_save_skips_the_update(self):
+        with self.assertNumQueries(0):
+            self.assignment.save()
+
+    def test_save_writes_only_changed_fields(self):
+        saved = []
+
+        def receiver(sender, update_fields=None, **kwargs):
+            saved.append(update_fields)
+
+        post_save.connect(receiver, sender=Assignment)
+        self.addCleanup(post_save.disconnect, receiver, sender=Assignment)
+
+        self.assignment.completed = True
+        self.assignment.save()
+
+        self.assertEqual(saved, [frozenset({'completed', 'updated_at'})])
+        self.assertEqual(self.assignment.get_dirty_fields(), set())
+
+    def test_field_assigned_after_deferred_load_is_saved(self):
+        assignment = Assignment.objects.only('title').get(pk=self.assignment.pk)
+        assignment.completed = True
+        assignment.save()
+
+        self.assertTrue(Assignment.objects.get(pk=self.assignment.pk).completed)
+
+    def test_auto_now_only_moves_on_real_changes(self):
+        grade = Grade.objects.get(pk=Grade.objects.create(assignment=self.assignment, score=5).pk)
+        graded_at = grade.graded_at
+
+        grade.save()
+        grade.refresh_from_db()
+        self.assertEqual(grade.graded_at, graded_at)
+
+        grade.score = 7
+        grade.save()
+        grade.refresh_from_db()
+        self.assertGreater(grade.graded_at, graded_at)
+
+    def test_unsaved_instances_save_normally(self):
+        course = Course(name='Physics', owner=self.user)
+        course.save()
+        course.name = 'Chemistry'
+        course.save()
+
+        self.assertEqual(Course.objects.get(pk=course.pk).name, 'Chemistry')
+
+
+class ChangeLogTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+
+    def revision(self):
+        return Profile.objects.get(user=self.user).data_version
+
+    def test_changes_come_in_revision_order(self):
+        first = make_assignment(self.user)
+        course = make_course(self.user)
+        first.title = 'Renamed'
+        first.save()
+
+        changes, has_more = changes_since(self.user, 0, 10)
+
+        self.assertFalse(has_more)
+        # One row per object, stamped with its latest revision
+        self.assertEqual([(c.object_type, c.object_id) for c in changes],
+                         [(Change.COURSE, course.pk), (Change.ASSIGNMENT, first.pk)])
+        self.assertEqual(changes[-1].revision, self.revision())
+        self.assertEqual(changes_since(self.user, self.revision(), 10), ([], False))
+
+    def test_delete_leaves_a_tombstone(self):
+        assignment = make_assignment(self.user)
+        pk = assignment.pk
+        assignment.delete()
+
+        change = Change.objects.get(object_type=Change.ASSIGNMENT, object_id=pk)
+        self.assertTrue(change.deleted)
+        self.assertEqual(change.revision, self.revision())
+
+    def test_pages_do_not_split_a_revision(self):
+        single = make_assignment(self.user)
+        bulk = [make_assignment(self.user) for _ in range(3)]
+        record_bulk_changes([(self.user.pk, Change.ASSIGNMENT, a.pk) for a in bulk])
+
+        changes, has_more = changes_since(self.user, 0, 2)
+        self.assertEqual([c.object_id for c in changes], [single.pk])
+        self.assertTrue(has_more)
+
+        # A revision bigger than the page comes back whole
+        changes, has_more = changes_since(self.user, changes[-1].revision, 2)
+        self.assertEqual([c.object_id for c in changes], [a.pk for a in bulk])
+        self.assertEqual(changes_since(self.user, changes[-1].revision, 2), ([], False))
+
+    def test_compaction_raises_the_tombstone_floor(self):
+        old, recent = make_assignment(self.user), make_assignment(self.user)
+        old_pk, recent_pk = old.pk, recent.pk
+        old.delete()
+        recent.delete()
+        tombstone = Change.objects.filter(object_id=old_pk)
+        tombstone.update(changed_at=timezone.now() - timedelta(days=90))
+        old_revision = tombstone.get().revision
+
+        out = StringIO()
+        call_command('compact_changes', older_than=30, stdout=out)
+
+        self.assertIn('Removed 1 tombstone(s) for 1 user(s).', out.getvalue())
+        self.assertEqual(list(Change.objects.values_list('object_id', flat=True)), [recent_pk])
+        self.assertEqual(Profile.objects.get(user=self.user).tombstone_floor, old_revision)
+
+
+class LiveEventTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+
+    def test_broker_wakes_only_the_users_streams(self):
+        async def scenario():
+            broker = Broker()
+            mine, theirs = broker.subscribe(1), broker.subscribe(2)
+            LocalBackend(broker).publish(1, revision=5)
+            woken = await mine.wait(1), await theirs.wait(0.01)
+            broker.unsubscribe(mine)
+            broker.unsubscribe(theirs)
+            return woken, broker.user_ids()
+
+        self.assertEqual(asyncio.run(scenario()), ((True, False), []))
+
+    def test_notifications_coalesce(self):
+        async def scenario():
+            broker = Broker()
+            subscription = broker.subscribe(1)
+            broker.notify(1)
+            broker.notify(1)
+            return await subscription.wait(1), await subscription.wait(0.01)
+
+        self.assertEqual(asyncio.run(scenario()), (True, False))
+
+    def test_polling_picks_up_writes_from_other_processes(self):
+        backend = DatabasePollingBackend(Broker(), interval=1)
+
+        @async_to_sync
+        async def scenario():
+            subscription = backend.broker.subscribe(self.user.pk)
+            await sync_to_async(backend.poll)()  # Learns the current revision
+            await sync_to_async(backend.poll)()
+            unchanged = await subscription.wait(0.01)
+            # As if written by another worker: nothing is published in this one
+            await sync_to_async(Profile.bump_data_version)(self.user.pk)
+            await sync_to_async(backend.poll)()
+            return unchanged, await subscription.wait(1)
+
+        self.assertEqual(scenario(), (False, True))
+
+
+class RollupTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.course = make_course(cls.user)
+        make_assignment(cls.user, course=cls.course, completed=True)
+        make_assignment(cls.user, course=cls.course, days=-1)
+        make_assignment(cls.user)
+        cls.other = make_user()
+        make_assignment(cls.other)
+
+    def snapshot(self, user, course=None):
+        return DailyStat.objects.get(user=user, course=course, date=timezone.localdate())
+
+    def test_full_rollup_snapshots_every_course(self):
+        self.assertEqual(rollup(full=True), 2)
+
+        stat = self.snapshot(self.user, self.course)
+        self.assertEqual((stat.total, stat.completed, stat.overdue), (2, 1, 1))
+        self.assertEqual(self.snapshot(self.user).total, 1)
+
+        rollup(full=True)  # Replaces today's rows rather than adding to them
+        self.assertEqual(DailyStat.objects.count(), 3)
+
+    def test_incremental_rollup_only_recomputes_changed_users(self):
+        start = timezone.now()
+        rollup(now=start)
+        Change.objects.update(changed_at=start - WATERMARK_OVERLAP - timedelta(minutes=1))
+
+        make_assignment(self.other)
+        self.assertEqual(rollup(now=start + timedelta(minutes=5)), 1)
+        self.assertEqual(self.snapshot(self.other).total, 2)
+        self.assertEqual(RollupWatermark.objects.get().value, start + timedelta(minutes=5))
+
+    def test_changes_committed_after_a_run_are_not_missed(self):
+        start = timezone.now()
+        rollup(now=start)
+        Change.objects.update(changed_at=start - WATERMARK_OVERLAP - timedelta(minutes=1))
+
+        # Stamped before the run started, but committed after it read the log
+        assignment = make_assignment(self.other)
+        Change.objects.filter(object_id=assignment.pk).update(changed_at=start - timedelta(seconds=30))
+
+        self.assertEqual(rollup(now=start + timedelta(minutes=5)), 1)
+        self.assertEqual(self.snapshot(self.other).total, 2)
+
+    def test_archived_assignments_are_left_out(self):
+        Assignment.objects.filter(owner=self.user, completed=True).update(archived=True)
+        rollup(full=True)
+
+        stat = self.snapshot(self.user, self.course)
+        self.assertEqual((stat.total, stat.completed, stat.overdue), (1, 0, 1))
+
+    def test_unchanged_days_repeat_the_last_snapshot(self):
+        today = timezone.localdate()
+        DailyStat.objects.create(user=self.user, date=today - timedelta(days=40), total=1, completed=0)
+        DailyStat.objects.create(user=self.user, date=today - timedelta(days=3), total=4, completed=1)
+        DailyStat.objects.create(user=self.user, course=self.course, date=today - timedelta(days=3), total=4,
+                                 completed=3)
+        DailyStat.objects.create(user=self.user, date=today - timedelta(days=1), total=8, completed=8)
+
+        days = daily_totals(self.user, today - timedelta(days=4), today)
+
+        self.assertEqual([day['date'] for day in days], [today - timedelta(days=n) for n in range(4, -1, -1)])
+        self.assertEqual([(day['total'], day['completed']) for day in days],
+                         [(1, 0), (8, 4), (8, 4), (8, 8), (8, 8)])
+
+    def test_days_before_the_first_snapshot_are_left_out(self):
+        today = timezone.localdate()
+        DailyStat.objects.create(user=self.user, date=today - timedelta(days=1), total=2, completed=1)
+
+        days = daily_totals(self.user, today - timedelta(days=6), today)
+        self.assertEqual([day['date'] for day in days], [today - timedelta(days=1), today])
+        self.assertEqual(daily_totals(self.other, today - timedelta(days=6), today), [])
+
+    def test_dashboard_trend_has_no_gaps(self):
+        rollup(full=True, now=timezone.now() - timedelta(days=2))
+        self.client.force_login(self.user)
+
+        trend = self.client.get(reverse('core:dashboard')).context['completion_trend']
+
+        self.assertEqual(len(trend), 3)
+        self.assertEqual(trend[-1]['date'], timezone.localdate().isoformat())
+        self.assertEqual({day['completion_rate'] for day in trend}, {33.3})
+
+
+class PurgeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = make_user()
+        cls.course = make_course(cls.teacher)
+        for _ in range(5):
+            make_grade(make_assignment(cls.teacher, course=cls.course))
+        make_series(cls.teacher, course=cls.course)
+        cls.student = make_user()
+        make_enrollment(cls.course, cls.student)
+        make_template(cls.course)
+        cls.student_copy = make_assignment(cls.student, course=cls.course)
+        cls.kept = make_assignment(cls.teacher)
+
+    def test_course_is_hidden_then_purged_in_batches(self):
+        delete_course(self.course)
+        self.assertFalse(Course.objects.filter(pk=self.course.pk).exists())
+
+        progress = []
+        totals = run(purge_course, self.course.pk, batch_size=2, report=lambda *args: progress.append(args))
+
+        self.assertEqual(totals['assignments'], 6)
+        self.assertEqual(progress[:3], [('grades', 2), ('grades', 4), ('grades', 5)])
+        self.assertFalse(Course.all_objects.filter(pk=self.course.pk).exists())
+        self.assertEqual(list(Assignment.objects.all()), [self.kept])
+        self.assertFalse(Enrollment.objects.exists())
+
+    @override_settings(PURGE_IN_BACKGROUND=True)
+    def test_background_purge_starts_after_commit(self):
+        with mock.patch('core.purge.threading.Thread') as thread:
+            with self.captureOnCommitCallbacks() as callbacks:
+                delete_course(self.course)
+            thread.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(thread.call_args.kwargs['name'], f'purge-{self.course.pk}')
+        thread.return_value.start.assert_called_once_with()
+
+    def test_purge_leaves_tombstones_for_students(self):
+        run(purge_course, self.course.pk)
+
+        self.assertTrue(Change.objects.filter(
+            user=self.student, object_type=Change.ASSIGNMENT, object_id=self.student_copy.pk, deleted=True,
+        ).exists())
+
+    def test_account_is_deactivated_then_purged(self):
+        delete_account(self.teacher)
+        self.assertIsNotNone(Profile.objects.get(user=self.teacher).deleted_at)
+        self.assertFalse(User.objects.get(pk=self.teacher.pk).is_active)
+
+        run(purge_user, self.teacher.pk)
+
+        self.assertFalse(User.objects.filter(pk=self.teacher.pk).exists())
+        self.assertEqual(list(Assignment.objects.all()), [])
+        self.assertEqual(Course.all_objects.count(), 0)
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def test_bursts_up_to_capacity_then_refills(self):
+        state = None
+        for _ in range(3):
+            state, wait = take_token(state, 3, 1.0, now=100)
+            self.assertEqual(wait, 0)
+
+        state, wait = take_token(state, 3, 1.0, now=100.25)
+        self.assertAlmostEqual(wait, 0.75)
+
+        state, wait = take_token(state, 3, 1.0, now=101)
+        self.assertEqual(wait, 0)
+
+    def test_local_store_evicts_least_recently_used(self):
+        store = LocalStore(max_keys=2)
+        for key in ('a', 'b', 'a', 'c'):
+            store.take(key, 1, 1.0, now=0)
+
+        self.assertEqual(list(store.buckets), ['a', 'c'])
+
+
+@override_settings(RATE_LIMITS={'test': '2/m', 'login': '2/m'})
+class RateLimitTests(CacheClearingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.view = ratelimit('test', key='ip')(lambda request: HttpResponse('ok'))
+
+    def request(self, ip='10.0.0.1'):
+        request = RequestFactory().get('/', REMOTE_ADDR=ip)
+        request.user = AnonymousUser()
+        return request
+
+    def test_limits_per_client_with_retry_after(self):
+        self.assertEqual([self.view(self.request()).status_code for _ in range(2)], [200, 200])
+
+        response = self.view(self.request())
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.view(self.request('10.0.0.2')).status_code, 200)
+
+    def test_only_counts_the_given_methods(self):
+        view = ratelimit('test', methods=['POST'])(lambda request: HttpResponse('ok'))
+        self.assertTrue(all(view(self.request()).status_code == 200 for _ in range(5)))
+
+    def test_login_attempts_are_limited(self):
+        make_user('alice')
+        for _ in range(2):
+            self.client.post(reverse('login'), {'username': 'alice', 'password': 'wrong'})
+
+        response = self.client.post(reverse('login'), {'username': 'alice', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 429)
+
+
+    @override_settings(RATE_LIMITS={'login': '100/m', 'login_account': '2/m'})
+    def test_login_attempts_are_limited_per_account_across_ips(self):
+        make_user('alice')
+        for n in range(2):
+            self.client.post(reverse('login'), {'username': 'alice', 'password': 'wrong'}, REMOTE_ADDR=f'10.0.1.{n}')
+
+        response = self.client.post(reverse('login'), {'username': 'Alice', 'password': 'x'}, REMOTE_ADDR='10.0.1.9')
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(reverse('login'), {'username': 'bob', 'password': 'x'}, REMOTE_ADDR='10.0.1.9')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_store_uses_the_shared_cache(self):
+        CacheStore().take('test:ip:10.0.0.1', 2, 1.0, now=0)
+        self.assertIsNotNone(caches[settings.CACHE_SHARED_ALIAS].get('ratelimit:test:ip:10.0.0.1'))
+
+
+class ResponseCompressionTests(SimpleTestCase):
+    BODY = b'<p>Homework</p>' * 100
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding='gzip, deflate, br'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return ResponseCompressionMiddleware(lambda request: response)(request)
+
+    def test_compresses_allowed_types_above_the_threshold(self):
+        for content_type in settings.COMPRESSION_CONTENT_TYPES:
+            with self.subTest(content_type=content_type):
+                response = self.process(HttpResponse(self.BODY, content_type=content_type + '; charset=utf-8'))
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(response['Content-Length'], str(len(response.content)))
+                self.assertEqual(gzip.decompress(response.content), self.BODY)
+
+    def test_leaves_small_and_other_responses_alone(self):
+        small = b'x' * (settings.COMPRESSION_MIN_SIZE - 1)
+        incompressible = os.urandom(settings.COMPRESSION_MIN_SIZE * 2)
+        partial = HttpResponse(self.BODY, status=206)
+        encoded = HttpResponse(self.BODY)
+        encoded['Content-Encoding'] = 'br'
+        ranged = HttpResponse(self.BODY)
+        ranged['Accept-Ranges'] = 'bytes'
+        content_range = HttpResponse(self.BODY)
+        content_range['Content-Range'] = 'bytes 0-99/1500'
+        for label, response, body in (
+            ('small', HttpResponse(small), small),
+            ('css', HttpResponse(self.BODY, content_type='text/css'), self.BODY),
+            ('incompressible', HttpResponse(incompressible, content_type='application/json'), incompressible),
+            ('partial', partial, self.BODY),
+            ('encoded', encoded, self.BODY),
+            ('accept-ranges', ranged, self.BODY),
+            ('content-range', content_range, self.BODY),
+        ):
+            with self.subTest(label):
+                response = self.process(response)
+                self.assertEqual(response.content, body)
+                self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+
+    def test_clients_without_gzip_get_the_plain_body(self):
+        for accept_encoding in ('', 'br', 'identity'):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.process(HttpResponse(self.BODY), accept_encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(response.content, self.BODY)
+
+    def test_only_pages_with_a_csrf_token_are_padded(self):
+        with mock.patch('core.middleware.compress_string', wraps=compress_string) as compress:
+            self.process(HttpResponse(self.BODY))
+            self.process(HttpResponse(self.BODY + b'<input name="csrfmiddlewaretoken" value="secret">'))
+        self.assertEqual(
+            [call.kwargs['max_random_bytes'] for call in compress.call_args_list],
+            [None, ResponseCompressionMiddleware.max_random_bytes],
+        )
+
+    def test_streaming_responses_are_compressed_and_padded(self):
+        chunks = [b'<tr><td>row</td></tr>' * 50] * 4
+        response = StreamingHttpResponse(iter(chunks), content_type='application/json')
+        response['Content-Length'] = str(sum(map(len, chunks)))
+        with mock.patch('core.middleware.compress_sequence', wraps=compress_sequence) as compress:
+            response = self.process(response)
+
+        self.assertEqual(compress.call_args.kwargs['max_random_bytes'], ResponseCompressionMiddleware.max_random_bytes)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+    def test_async_streaming_responses_are_compressed(self):
+        chunks = [b'<tr><td>row</td></tr>' * 50] * 4
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        async def collect(response):
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        response = self.process(StreamingHttpResponse(stream(), content_type='text/html'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(async_to_sync(collect)(response)), b''.join(chunks))
+
+    def test_strong_etags_become_weak(self):
+        for etag, expected in (('"abc"', 'W/"abc"'), ('W/"abc"', 'W/"abc"')):
+            with self.subTest(etag=etag):
+                response = HttpResponse(self.BODY)
+                response['ETag'] = etag
+                self.assertEqual(self.process(response)['ETag'], expected)
+
+        # An uncompressed response keeps its strong validator
+        response = HttpResponse(self.BODY)
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.process(response, accept_encoding='')['ETag'], '"abc"')
+
+
+class QueryProfilingTests(CacheClearingTestCase):
+
+    def test_fingerprint_ignores_literals_and_in_list_length(self):
+        first = fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND name = 'a' LIMIT 21")
+        second = fingerprint("SELECT *  FROM t WHERE id IN (%s) AND name = 'b''c' LIMIT 5")
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], 'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?')
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_are_logged_with_view_and_user(self):
+        user = make_user()
+        self.client.force_login(user)
+
+        with self.assertLogs('core.slow_queries', 'INFO') as logs:
+            self.client.get(reverse('assignments:assignment_list'))
+
+        records = [json.loads(line.split(':', 2)[2]) for line in logs.output]
+        self.assertTrue(records)
+        self.assertEqual(records[-1]['view'], 'assignments:assignment_list')
+        self.assertEqual(records[-1]['user_id'], user.pk)
+        self.assertIn('fingerprint', records[-1])
+
+    def test_sampled_requests_write_a_trace_and_profile(self):
+        self.client.force_login(make_user())
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(QUERY_PROFILE_SAMPLE_RATE=1.0, QUERY_PROFILE_CPROFILE=True,
+                                   QUERY_PROFILE_DIR=directory):
+                self.client.get(reverse('assignments:assignment_list'))
+
+                names = sorted(os.listdir(directory))
+                self.assertEqual([os.path.splitext(name)[1] for name in names], ['.json', '.prof'])
+                with open(os.path.join(directory, names[0])) as f:
+                    trace = json.load(f)
+                self.assertEqual(trace['view'], 'assignments:assignment_list')
+                self.assertEqual(trace['query_count'], len(trace['queries']))
+                self.assertGreater(trace['query_count'], 0)
+
+                out = StringIO()
+                call_command('top_queries', traces=True, stdout=out)
+                self.assertIn('assignment_list', out.getvalue())
+
+    def test_top_queries_ranks_fingerprints_by_total_time(self):
+        lines = [
+            {'fingerprint': 'aaa', 'sql': 'SELECT a', 'duration_ms': 150, 'view': 'dashboard'},
+            {'fingerprint': 'bbb', 'sql': 'SELECT b', 'duration_ms': 120, 'view': 'gradebook'},
+            {'fingerprint': 'bbb', 'sql': 'SELECT b', 'duration_ms': 110, 'view': 'gradebook'},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow.log')
+            with open(path, 'w') as f:
+                f.write(json.dumps(lines[0]) + '\n' + json.dumps(lines[1]) + '\n')
+            with open(path + '.1', 'w') as f:
+                f.write(json.dumps(lines[2]) + '\n')
+
+            out = StringIO()
+            call_command('top_queries', log=path, stdout=out)
+
+        output = out.getvalue()
+        self.assertLess(output.index('bbb'), output.index('aaa'))
+        self.assertIn('230.0', output)
+
+
+class HealthTests(CacheClearingTestCase):
+
+    def test_healthz_answers_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('core:healthz'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_readyz_reports_each_check(self):
+        response = self.client.get(reverse('core:readyz'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'ready': True, 'checks': {'database': 'ok', 'migrations': 'ok', 'cache': 'ok'},
+        })
+
+    def test_readyz_fails_when_a_check_fails(self):
+        def broken():
+            raise RuntimeError('unreachable')
+
+        with mock.patch.object(health, 'CHECKS', health.CHECKS[:2] + [('cache', broken)]):
+            response = self.client.get(reverse('core:readyz'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['cache'], 'RuntimeError: unreachable')
+
+    def test_warm_up_compiles_the_project_templates(self):
+        self.assertGreater(health.compile_templates(), 10)
+        # The test database connection must stay open, so only check that it would close
+        with mock.patch.object(health.connections, 'close_all') as close_all:
+            self.assertEqual(set(health.warm_up()), {'urls', 'templates', 'checks'})
+        close_all.assert_called_once_with()
+
+
+@override_settings(CACHE_REVALIDATE_IN_BACKGROUND=False, CACHE_LOCK_WAIT=2, CACHE_LOCK_POLL_INTERVAL=0.01)
+class TwoTierCacheTests(CacheClearingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.layer = TwoTierCache()
+        self.calls = []
+
+    def compute(self, value='fresh', delay=0):
+        def compute():
+            self.calls.append(value)
+            time.sleep(delay)
+            return value
+        return compute
+
+    def test_local_then_shared_tier(self):
+        self.assertEqual(self.layer.get_or_compute('dashboard', [1], self.compute()), 'fresh')
+        self.layer.get_or_compute('dashboard', [1], self.compute())
+        self.layer.local.clear()  # As seen from another process
+        self.layer.get_or_compute('dashboard', [1], self.compute())
+
+        self.assertEqual(self.calls, ['fresh'])
+        totals = self.layer.metrics.totals('dashboard')
+        self.assertEqual((totals['miss'], totals['local_hit'], totals['shared_hit']), (1, 1, 1))
+
+    def test_new_versions_miss(self):
+        self.layer.get_or_compute('dashboard', [1, 'v1'], self.compute('a'))
+        self.assertEqual(self.layer.get_or_compute('dashboard', [1, 'v2'], self.compute('b')), 'b')
+
+        self.layer.invalidate('dashboard')
+        self.assertEqual(self.layer.get_or_compute('dashboard', [1, 'v2'], self.compute('c')), 'c')
+
+    def test_concurrent_misses_compute_once(self):
+        results = []
+
+        def lookup():
+            results.append(TwoTierCache().get_or_compute('dashboard', [1], self.compute(delay=0.2)))
+
+        threads = [threading.Thread(target=lookup) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['fresh'] * 5)
+        self.assertEqual(self.calls, ['fresh'])
+
+    def test_stale_value_is_served_while_another_worker_refreshes(self):
+        key = self.layer.make_key('dashboard', [1])
+        shared_cache().set(key, ('old', time.time() - 1), 60)
+
+        shared_cache().add(f'{key}:lock', 'other worker', 30)
+        self.assertEqual(self.layer.get_or_compute('dashboard', [1], self.compute()), 'old')
+        self.assertEqual(self.calls, [])
+
+        shared_cache().delete(f'{key}:lock')
+        self.assertEqual(self.layer.get_or_compute('dashboard', [1], self.compute()), 'fresh')
+
+    @override_settings(CACHE_REVALIDATE_IN_BACKGROUND=True)
+    def test_stale_value_is_refreshed_in_the_background(self):
+        key = self.layer.make_key('dashboard', [1])
+        shared_cache().set(key, ('old', time.time() - 1), 60)
+
+        self.assertEqual(self.layer.get_or_compute('dashboard', [1], self.compute(delay=0.05)), 'old')
+        for _ in range(100):
+            if shared_cache().get(key)[0] == 'fresh':
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.layer.get_or_compute('dashboard', [1], self.compute()), 'fresh')
+        self.assertEqual(self.calls, ['fresh'])
+
+    def test_cache_stats_reports_hit_ratio(self):
+        user = make_user()
+        self.client.force_login(user)
+        self.client.get(reverse('core:dashboard'))
+        self.client.get(reverse('core:dashboard'))
+
+        out = StringIO()
+        call_command('cache_stats', '--reset', stdout=out)
+        self.assertRegex(out.getvalue(), r'dashboard\s+2\s+50\.0\s+1\s+0\s+0\s+1\s+0\s+1')
+
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        self.assertRegex(out.getvalue(), r'dashboard\s+0\s+-')
+
+
+class DatabaseCacheTests(CacheClearingTestCase):
+    """The two-tier cache on the database cache, the shared backend outside tests."""
+
+    def setUp(self):
+        super().setUp()
+        shared = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_shared_cache'}
+        self.enterContext(override_settings(CACHES={**settings.CACHES, 'shared': shared}))
+        call_command('createcachetable', 'test_shared_cache', verbosity=0)
+        self.layer = TwoTierCache()
+
+    def test_recompute_lock_is_exclusive(self):
+        token = self.layer.acquire('cache:dashboard:v1:key')
+        self.assertTrue(token)
+        self.assertIsNone(self.layer.acquire('cache:dashboard:v1:key'))
+
+        self.layer.release('cache:dashboard:v1:key', token)
+        self.assertTrue(self.layer.acquire('cache:dashboard:v1:key'))
+
+    def test_values_are_shared_between_processes(self):
+        self.assertEqual(self.layer.get_or_compute('calendar', [1], lambda: 'feed'), 'feed')
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM test_shared_cache')
+            self.assertGreater(cursor.fetchone()[0], 0)
+
+        other_process = TwoTierCache()
+        self.assertEqual(other_process.get_or_compute('calendar', [1], self.fail), 'feed')
+        self.assertEqual(other_process.metrics.totals('calendar')['shared_hit'], 1)
+
+    def test_repeat_requests_with_the_configured_settings(self):
+        # A database shared cache leaves users and sessions in their own tables
+        self.assertEqual(settings.AUTH_USER_CACHE_TIMEOUT, 0)
+        self.assertEqual(settings.SESSION_ENGINE, 'django.contrib.sessions.backends.db')
+        user = make_user()
+        make_assignment(user)
+        self.client.force_login(user)
+        self.client.get(reverse('core:dashboard'))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('core:dashboard'))
+        # The session and the user; the dashboard is this process's copy
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('test_shared_cache' in query['sql'] for query in queries))
+
+        get_layer().local.clear()  # Expired here, so read from the shared cache
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('core:dashboard'))
+        # The namespace version and the value: one SELECT each
+        self.assertEqual(sum('test_shared_cache' in query['sql'] for query in queries), 2)
+
+    def test_dashboard(self):
+        user = make_user()
+        make_assignment(user)
+        self.client.force_login(user)
+
+        self.client.get(reverse('core:dashboard'))
+        get_layer().local.clear()  # As seen from another process
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.context['total_assignments'], 1)
+        self.assertEqual(get_layer().metrics.totals('dashboard')['shared_hit'], 1)
@@ -1,15 +1,29 @@
 # core/views.py
 
 import json
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.cache import never_cache
 from django.utils import timezone
 from django.db.models import Count, Q
 from assignments.models import Assignment
-from datetime import timedelta
+from assignments.recurrence import expand_occurrences
+from .rollups import daily_totals
+from .caching import get_or_compute
+from .conditional import user_data_condition
+from .health import run_checks
+from datetime import datetime, time, timedelta
+
+
+def local_day_start(day):
+    """Aware datetime for local midnight on `day` in the active (user's) timezone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
 
 
 @login_required
+@user_data_condition
 def dashboard(request):
     """
     Renders the user's personalized dashboard with:
@@ -19,7 +33,20 @@ def dashboard(request):
     - Calendar and reminder data in JSON format
     """
     user = request.user
-    assignments = Assignment.objects.filter(owner=user)
+    # Any write bumps data_version, so a cached dashboard is never older than the
+    # user's data, only than the clock (see CACHE_NAMESPACES['dashboard'])
+    parts = [user.pk, user.profile.data_version, timezone.get_current_timezone_name(), timezone.localdate()]
+    context = get_or_compute('dashboard', parts, lambda: dashboard_data(user))
+    return render(request, 'core/dashboard.html', {
+        **context,
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    })
+
+
+def dashboard_data(user):
+    """The dashboard's template context, computed in the active (user's) timezone."""
+    # Archived history is left out of every query on this page
+    assignments = Assignment.objects.active().filter(owner=user)
 
     # Overall assignment statistics
     total = assignments.count()
@@ -49,14 +76,32 @@ def dashboard(request):
             'completion_rate': rate,
         })
 
+    # Date windows are computed once, in the user's timezone, as UTC ranges on
+    # due_date: plain range predicates can use the (owner, due_date) index,
+    # unlike due_date__date, which converts every row
+    now = timezone.now()
+    today = timezone.localdate(now)
+    week_start = local_day_start(today)
+    week_end = local_day_start(today + timedelta(days=7))
+    first_of_last_month = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+    # Recurring-series occurrences, expanded only for the window shown on this page:
+    # from the start of last month (calendar) to RECURRENCE_WINDOW_DAYS ahead
+    occurrences = expand_occurrences(
+        user, local_day_start(first_of_last_month), now + timedelta(days=settings.RECURRENCE_WINDOW_DAYS)
+    )
+
     # Upcoming assignments: next 7 days (including today)
-    today = timezone.now().date()
-    seven_days_later = today + timedelta(days=6)
     upcoming_assignments = assignments.filter(
         completed=False,
-        due_date__date__gte=today,
-        due_date__date__lte=seven_days_later
-    ).order_by('due_date')[:10]
+        due_date__gte=week_start,
+        due_date__lt=week_end
+    ).select_related('course').order_by('due_date')[:10]
+    upcoming_occurrences = [o for o in occurrences if week_start <= o.due_date < week_end]
+    if upcoming_occurrences:
+        upcoming_assignments = sorted(
+            [*upcoming_assignments, *upcoming_occurrences], key=lambda a: a.due_date
+        )[:10]
 
     # Prepare JSON data for frontend calendar and reminders (with local time)
     upcoming_json = [
@@ -69,10 +114,9 @@ def dashboard(request):
     ]
 
     # All future incomplete assignments for browser-based reminders
-    upcoming_for_reminder = Assignment.objects.filter(
-        owner=user,
+    upcoming_for_reminder = assignments.filter(
         completed=False,
-        due_date__gt=timezone.now()
+        due_date__gt=now
     ).values('title', 'due_date')
 
     upcoming_for_reminder_list = [
@@ -81,23 +125,55 @@ def dashboard(request):
             "due_date": timezone.localtime(item['due_date']).isoformat(),
         }
         for item in upcoming_for_reminder
+    ] + [
+        {
+            "title": o.title,
+            "due_date": timezone.localtime(o.due_date).isoformat(),
+        }
+        for o in occurrences
+        if o.due_date > now
     ]
 
     # Full calendar event data (for FullCalendar.js or similar)
     calendar_events = []
-    for assignment in assignments.filter(due_date__isnull=False):
+    for assignment in assignments.filter(due_date__isnull=False).select_related('course'):
         calendar_events.append({
+            'id': assignment.id,
             'title': assignment.title,
             'start': assignment.due_date.isoformat(),  # Keep as UTC for calendar consistency
             'extendedProps': {
                 'completed': assignment.completed,
                 'is_overdue': assignment.is_overdue,
-                'course': assignment.course.name if assignment.course else 'No Course'
+                'course': assignment.course.name if assignment.course else 'No Course',
+                'course_id': assignment.course_id,
+            }
+        })
+    for occurrence in occurrences:
+        calendar_events.append({
+            'id': None,
+            'title': occurrence.title,
+            'start': occurrence.due_date.isoformat(),
+            'extendedProps': {
+                'completed': False,
+                'is_overdue': occurrence.is_overdue,
+                'course': occurrence.course.name if occurrence.course else 'No Course',
+                'course_id': occurrence.course_id,
+                'series_id': occurrence.series_id,
             }
         })
 
-    # Build context for template
-    context = {
+    # Completion trend from the pre-aggregated daily snapshots (see rollup_stats)
+    trend_start = today - timedelta(days=settings.DASHBOARD_TREND_DAYS - 1)
+    completion_trend = [
+        {
+            'date': day['date'].isoformat(),
+            'completion_rate': round(day['completed'] / day['total'] * 100, 1) if day['total'] else 0,
+            'overdue': day['overdue'],
+        }
+        for day in daily_totals(user, trend_start, today)
+    ]
+
+    return {
         'total_assignments': total,
         'completed_assignments': completed,
         'overdue_assignments': overdue,
@@ -106,7 +182,19 @@ def dashboard(request):
         'calendar_events_json': json.dumps(calendar_events),
         'upcoming_json': json.dumps(upcoming_json),
         'upcoming_assignments_for_reminder_json': upcoming_for_reminder_list,
-        'upcoming_assignments': upcoming_assignments,
+        'upcoming_assignments': list(upcoming_assignments),
+        'completion_trend': completion_trend,
     }
 
-    return render(request, 'core/dashboard.html', context)
\ No newline at end of file
+
+@never_cache
+def healthz(request):
+    """Liveness probe: the process is up and serving. Touches nothing else."""
+    return HttpResponse('ok', content_type='text/plain')
+
+
+@never_cache
+def readyz(request):
+    """Readiness probe: database, migrations and cache; 503 if any check fails."""
+    results, ready = run_checks()
+    return JsonResponse({'ready': ready, 'checks': results}, status=200 if ready else 503)
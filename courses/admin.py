@@ -1,6 +1,7 @@
 # courses/admin.py
 from django.contrib import admin
-from .models import Course
+from core.purge import delete_course
+from .models import Course, Enrollment
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
@@ -11,4 +12,19 @@ class CourseAdmin(admin.ModelAdmin):
 
     def assignment_count(self, obj):
         return obj.assignment_set.count()
-    assignment_count.short_description = 'Assignments'
\ No newline at end of file
+    assignment_count.short_description = 'Assignments'
+
+    # Deletes hide the course and purge it in the background (core.purge)
+    def delete_model(self, request, obj):
+        delete_course(obj)
+
+    def delete_queryset(self, request, queryset):
+        for course in queryset:
+            delete_course(course)
+
+
+@admin.register(Enrollment)
+class EnrollmentAdmin(admin.ModelAdmin):
+    list_display = ('student', 'course', 'enrolled_at')
+    list_filter = ('course',)
+    search_fields = ('student__username', 'course__name')
@@ -0,0 +1,60 @@
+# courses/directory.py
+"""
+Per-user course directory: the (id, name, code) of each of a user's courses,
+sorted by name, cached as one small list.
+
+Course selects and filters (assignments.forms, the assignment list) read it
+instead of querying Course on every request; choices, validation and the list
+filter all share one cache lookup. The entry is dropped whenever one of the
+user's courses is saved or deleted (courses.signals).
+
+Forms trust the directory in place of the foreign key check, so it lives in
+the shared cache (CACHE_SHARED_ALIAS): a rename or delete in one worker
+reaches the others at once instead of when their copies expire.
+"""
+
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Course
+
+
+class CourseEntry(namedtuple('CourseEntry', ['id', 'name', 'code'])):
+    __slots__ = ()
+
+    def __str__(self):
+        """Matches Course.__str__."""
+        return f'{self.name} ({self.code})' if self.code else self.name
+
+
+def directory_cache():
+    return caches[settings.CACHE_SHARED_ALIAS]
+
+
+def directory_cache_key(user_id):
+    return f'courses:directory:{user_id}'
+
+
+def course_directory(user_id):
+    """The user's courses as CourseEntry tuples, by name."""
+    key = directory_cache_key(user_id)
+    rows = directory_cache().get(key)
+    if rows is None:
+        rows = list(Course.objects.filter(owner_id=user_id).order_by('name').values_list('id', 'name', 'code'))
+        directory_cache().set(key, rows, settings.COURSE_DIRECTORY_CACHE_TIMEOUT)
+    return [CourseEntry(*row) for row in rows]
+
+
+def invalidate_course_directory(user_id):
+    """Drops the cached directory once the current transaction commits."""
+    transaction.on_commit(lambda: directory_cache().delete(directory_cache_key(user_id)))
+
+
+def entry_to_course(entry, owner_id):
+    """A Course instance built from a directory entry, without a query."""
+    return Course.from_db(
+        Course.objects.db, ['id', 'name', 'code', 'owner_id'], [entry.id, entry.name, entry.code, owner_id]
+    )
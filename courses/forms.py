@@ -1,7 +1,72 @@
 from django import forms
+from .directory import course_directory, entry_to_course
 from .models import Course
 
 class CourseForm(forms.ModelForm):
     class Meta:
         model = Course
-        fields = ['name', 'code']
\ No newline at end of file
+        fields = ['name', 'code', 'weight']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['weight'].required = False
+
+    def clean_weight(self):
+        """An omitted weight keeps the current one."""
+        weight = self.cleaned_data['weight']
+        return self.instance.weight if weight is None else weight
+
+
+class EnrollStudentsForm(forms.Form):
+    """Adds students to a class by username, one per line or comma-separated."""
+
+    usernames = forms.CharField(
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'One username per line'}),
+        help_text='Students need an account before they can be enrolled.',
+    )
+
+    def clean_usernames(self):
+        raw = self.cleaned_data['usernames'].replace(',', '\n')
+        usernames = {name.strip() for name in raw.splitlines() if name.strip()}
+        if not usernames:
+            raise forms.ValidationError('Enter at least one username.')
+        return usernames
+
+
+class CourseChoiceField(forms.ChoiceField):
+    """
+    Select of the user's courses, served from their cached course directory
+    (courses.directory) rather than a queryset. Cleans to a Course instance,
+    like a ModelChoiceField, without querying the database.
+    """
+
+    def __init__(self, *, empty_label='---------', **kwargs):
+        super().__init__(**kwargs)
+        self.empty_label = empty_label
+        self.set_owner(None)
+
+    def set_owner(self, user):
+        """Offers the given user's courses (none without a user)."""
+        self.owner_id = user.pk if user else None
+        self.entries = {entry.id: entry for entry in course_directory(user.pk)} if user else {}
+        self.choices = [('', self.empty_label)] + [(entry.id, str(entry)) for entry in self.entries.values()]
+
+    def prepare_value(self, value):
+        return value.pk if isinstance(value, Course) else value
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            entry = self.entries[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value},
+            )
+        return entry_to_course(entry, self.owner_id)
+
+    def validate(self, value):
+        forms.Field.validate(self, value)  # Membership was checked by to_python
+
+    def has_changed(self, initial, data):
+        return str(self.prepare_value(initial) or '') != str(data or '')
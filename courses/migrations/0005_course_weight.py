@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='weight',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+    ]
@@ -1,8 +1,17 @@
 from django.db import models
 from django.conf import settings
 
+from core.models import ChangeTrackedModel, DirtyFieldsMixin
 
-class Course(models.Model):
+
+class CourseManager(models.Manager):
+    """Default manager; leaves out deleted courses waiting to be purged (core.purge)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class Course(DirtyFieldsMixin, ChangeTrackedModel):
     """Represents a user-owned course, optionally identified by a short code (e.g., CS101)."""
 
     name = models.CharField(max_length=100)  # Full course title (e.g., "Introduction to Programming")
@@ -14,9 +23,42 @@ class Course(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE  # Courses are deleted when the user is removed
     )
+    updated_at = models.DateTimeField(auto_now=True)  # Used for API delta sync (?updated_since=)
+
+    # Relative importance (e.g. credit hours); scales its assignments' urgency
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    # Set when the course is deleted; its rows are then removed in the background
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = CourseManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         """Displays course as 'Name (Code)' if code exists; otherwise just 'Name'."""
         if self.code:
             return f"{self.name} ({self.code})"
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+class Enrollment(models.Model):
+    """
+    A student enrolled in a class. The course owner acts as the teacher: they
+    publish assignment templates to the class and grade them in the gradebook.
+    """
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='enrollments'
+    )
+    enrolled_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'student'], name='unique_enrollment'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} in {self.course}"
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .directory import invalidate_course_directory
+from .models import Course
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_directory(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Renames, code changes, new and deleted courses all change the directory."""
+    if raw:
+        return
+    if update_fields is not None and not {'name', 'code', 'owner', 'deleted_at'} & set(update_fields):
+        return
+    invalidate_course_directory(instance.owner_id)
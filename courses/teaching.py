@@ -0,0 +1,63 @@
+# courses/teaching.py
+"""
+Class (teacher) mode: enrolling students and fanning assignment templates out
+to them.
+
+Everything here works in bulk. Rows are inserted with bulk_create and the
+change log is written with core.changes.record_bulk_changes, so the number of
+queries stays the same whether a class has 5 students or 500.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from assignments.models import Assignment
+from core.changes import record_bulk_changes
+from core.models import Change
+
+from .models import Enrollment
+
+
+def fan_out(templates, student_ids):
+    """Creates each student's copy of each template and logs them for sync."""
+    assignments = [
+        template.build_assignment(student_id)
+        for template in templates
+        for student_id in student_ids
+    ]
+    if not assignments:
+        return []
+    Assignment.objects.bulk_create(assignments)
+    record_bulk_changes(
+        (assignment.owner_id, Change.ASSIGNMENT, assignment.pk) for assignment in assignments
+    )
+    return assignments
+
+
+@transaction.atomic
+def enroll_students(course, usernames):
+    """
+    Enrolls the users with the given usernames (skipping the teacher and
+    students already enrolled) and gives them copies of the class's existing
+    templates. Returns (enrolled users, unknown usernames).
+    """
+    usernames = set(usernames)
+    found = list(get_user_model().objects.filter(username__in=usernames))
+    enrolled = set(course.enrollments.values_list('student_id', flat=True))
+    users = [user for user in found if user.pk != course.owner_id and user.pk not in enrolled]
+    unknown = usernames - {user.username for user in found}
+
+    Enrollment.objects.bulk_create(
+        [Enrollment(course=course, student=user) for user in users],
+        ignore_conflicts=True,
+    )
+    fan_out(course.templates.all(), [user.pk for user in users])
+    return users, sorted(unknown)
+
+
+@transaction.atomic
+def publish_template(template):
+    """Saves a new template and gives every enrolled student a copy."""
+    template.save()
+    student_ids = list(template.course.enrollments.values_list('student_id', flat=True))
+    return fan_out([template], student_ids)
@@ -1,3 +1,227 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from assignments.forms import AssignmentForm
+from assignments.models import Assignment, AssignmentTemplate
+from core.factories import (
+    CacheClearingTestCase, make_assignment, make_course, make_enrollment, make_template, make_user,
+)
+from core.purge import delete_course
+from .directory import course_directory, directory_cache_key
+from .models import Course, Enrollment
+from .teaching import enroll_students, publish_template
+
+
+class CourseListViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        for name in ('Biology', 'Chemistry', 'History'):
+            course = make_course(cls.user, name=name)
+            make_assignment(cls.user, course=course)
+            make_assignment(cls.user, course=course)
+        teacher = make_user()
+        for name in ('Art', 'Music'):
+            make_enrollment(make_course(teacher, name=name), cls.user)
+        make_course(teacher, name='Drama')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_lists_own_and_enrolled_courses(self):
+        response = self.client.get(reverse('courses:course_list'))
+
+        self.assertContains(response, '2 assignments', count=3)
+        self.assertEqual([c.name for c in response.context['enrolled_courses']], ['Art', 'Music'])
+        self.assertNotContains(response, 'Drama')
+
+    def test_query_count(self):
+        # Assignment counts and teachers are fetched with the courses, not per course
+        # (the first two are the session and the user)
+        with self.assertNumQueries(4):
+            self.client.get(reverse('courses:course_list'))
+
+
+class CourseViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.course = make_course(cls.user, name='Physics')
+        cls.other = make_course(make_user())
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_create(self):
+        response = self.client.post(reverse('courses:course_create'), {'name': 'Algebra', 'code': 'MATH101'})
+
+        self.assertRedirects(response, reverse('courses:course_list'), fetch_redirect_response=False)
+        self.assertEqual(Course.objects.get(code='MATH101').owner, self.user)
+
+    def test_edit(self):
+        url = reverse('courses:course_edit', args=[self.course.pk])
+        self.assertContains(self.client.get(url), 'Physics')
+
+        self.client.post(url, {'name': 'Physics II', 'code': ''})
+        self.assertEqual(Course.objects.get(pk=self.course.pk).name, 'Physics II')
+
+    def test_delete(self):
+        url = reverse('courses:course_delete', args=[self.course.pk])
+        self.assertContains(self.client.get(url), 'Physics')
+
+        self.client.post(url)
+        # Hidden at once; the rows are purged in the background (core.purge)
+        self.assertFalse(Course.objects.filter(pk=self.course.pk).exists())
+        self.assertIsNotNone(Course.all_objects.get(pk=self.course.pk).deleted_at)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_other_users_courses_are_not_found(self):
+        for name in ('course_edit', 'course_delete', 'course_roster'):
+            with self.subTest(name):
+                response = self.client.get(reverse(f'courses:{name}', args=[self.other.pk]))
+                self.assertEqual(response.status_code, 404)
+
+
+class RosterViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = make_user()
+        cls.course = make_course(cls.teacher)
+        cls.students = [make_user(f'student{n}') for n in range(3)]
+        for student in cls.students:
+            make_enrollment(cls.course, student)
+        make_template(cls.course, title='Essay')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.teacher)
+        self.url = reverse('courses:course_roster', args=[self.course.pk])
+
+    def test_roster(self):
+        response = self.client.get(self.url)
+
+        self.assertContains(response, 'student2')
+        self.assertContains(response, 'Essay')
+
+    def test_query_count(self):
+        # The session, the user and three for the roster
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
+
+    def test_enroll(self):
+        make_user('newcomer')
+
+        response = self.client.post(self.url, {'action': 'enroll', 'usernames': 'newcomer, nobody'}, follow=True)
+
+        self.assertTrue(Enrollment.objects.filter(course=self.course, student__username='newcomer').exists())
+        self.assertContains(response, 'nobody')
+
+    def test_publish(self):
+        self.client.post(self.url, {
+            'action': 'template', 'title': 'Lab', 'description': '',
+            'due_date': '2030-01-01T09:00', 'max_score': 10,
+        })
+
+        self.assertEqual(Assignment.objects.filter(template__title='Lab').count(), 3)
+
+
+class TeachingTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = make_user()
+        cls.course = make_course(cls.teacher)
+        make_template(cls.course)
+
+    def test_enrolling_copies_existing_templates(self):
+        students = [make_user() for _ in range(2)]
+
+        enrolled, unknown = enroll_students(self.course, [s.username for s in students] + [self.teacher.username])
+
+        self.assertEqual(set(enrolled), set(students))  # The teacher is skipped
+        self.assertEqual(unknown, [])
+        self.assertEqual(Assignment.objects.filter(owner__in=students).count(), 2)
+
+    def test_student_can_edit_their_copy(self):
+        student = make_user()
+        enroll_students(self.course, [student.username])
+        copy = Assignment.objects.get(owner=student)
+        self.client.force_login(student)
+
+        response = self.client.post(reverse('assignments:assignment_edit', args=[copy.pk]), {
+            'title': 'My essay', 'description': 'Draft',
+            'due_date': timezone.localtime(copy.due_date).strftime('%Y-%m-%dT%H:%M'),
+        })
+        self.assertRedirects(response, reverse('assignments:assignment_list'))
+
+        response = self.client.patch(reverse('api:v1:assignment_detail', args=[copy.pk]),
+                                     {'completed': True}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        copy.refresh_from_db()
+        self.assertEqual((copy.title, copy.completed, copy.course_id), ('My essay', True, self.course.pk))
+
+    def test_publish_query_count_is_independent_of_class_size(self):
+        counts = []
+        for size in (2, 10):
+            enroll_students(self.course, [make_user().username for _ in range(size)])
+            template = AssignmentTemplate(course=self.course, title='Quiz', due_date=timezone.now())
+            with CaptureQueriesContext(connection) as queries:
+                publish_template(template)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+
+class CourseDirectoryTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.physics = make_course(cls.user, name='Physics', code='PHY1')
+        make_course(cls.user, name='Art')
+        make_course(make_user(), name='Not mine')
+
+    def test_lists_own_courses_by_name_from_the_cache(self):
+        self.assertEqual([str(entry) for entry in course_directory(self.user.pk)], ['Art', 'Physics (PHY1)'])
+        with self.assertNumQueries(0):
+            course_directory(self.user.pk)
+
+    def test_course_changes_invalidate_it(self):
+        course_directory(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.physics.name = 'Astronomy'
+            self.physics.save()
+            make_course(self.user, name='Biology')
+
+        self.assertEqual([entry.name for entry in course_directory(self.user.pk)], ['Art', 'Astronomy', 'Biology'])
+
+    def test_deleted_courses_leave_it(self):
+        course_directory(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_course(self.physics)
+
+        self.assertEqual([entry.name for entry in course_directory(self.user.pk)], ['Art'])
+
+    def test_forms_see_deletes_from_other_workers(self):
+        data = {'title': 'Lab', 'due_date': '2030-01-01T10:00', 'course': self.physics.pk}
+        self.assertTrue(AssignmentForm(data, user=self.user).is_valid())
+        # Kept where every worker reads it, not in this process's memory
+        caches['default'].clear()
+        self.assertIsNotNone(caches[settings.CACHE_SHARED_ALIAS].get(directory_cache_key(self.user.pk)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_course(self.physics)
+
+        self.assertIn('course', AssignmentForm(data, user=self.user).errors)
@@ -8,4 +8,5 @@ urlpatterns = [
     path('create/', views.course_create, name='course_create'),
     path('<int:pk>/edit/', views.course_edit, name='course_edit'),
     path('<int:pk>/delete/', views.course_delete, name='course_delete'),
+    path('<int:pk>/roster/', views.course_roster, name='course_roster'),
 ]
\ No newline at end of file
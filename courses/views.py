@@ -1,17 +1,36 @@
 # courses/views.py
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db.models import Count
 
+from assignments.forms import AssignmentTemplateForm
 from .models import Course
-from .forms import CourseForm
+from .forms import CourseForm, EnrollStudentsForm
+from .teaching import enroll_students, publish_template
+from core.caching import get_or_compute
+from core.conditional import user_data_condition
+from core.purge import delete_course
+from core.ratelimit import ratelimit
 
 
 @login_required
+@user_data_condition
 def course_list(request):
-    """Displays all courses owned by the current user."""
-    courses = Course.objects.filter(owner=request.user)
-    return render(request, 'courses/list.html', {'courses': courses})
+    """Displays all courses owned by the current user, plus classes they are enrolled in."""
+    user = request.user
+    # Counted in the same query rather than once per course. Counts include
+    # enrolled students' copies, whose changes do not bump the teacher's
+    # data_version, so those show up once the cached value expires
+    courses = get_or_compute('course_stats', [user.pk, user.profile.data_version], lambda: list(
+        Course.objects.filter(owner=user).annotate(assignment_count=Count('assignment'))
+    ))
+    enrolled_courses = Course.objects.filter(enrollments__student=request.user).select_related('owner')
+    return render(request, 'courses/list.html', {
+        'courses': courses,
+        'enrolled_courses': enrolled_courses,
+    })
 
 
 @login_required
@@ -45,9 +64,51 @@ def course_edit(request, pk):
 
 @login_required
 def course_delete(request, pk):
-    """Deletes a course after confirmation; only allowed for the owner."""
+    """
+    Deletes a course after confirmation; only allowed for the owner.
+    The course disappears at once; its assignments and grades are purged in
+    the background (core.purge).
+    """
     course = get_object_or_404(Course, pk=pk, owner=request.user)
     if request.method == 'POST':
-        course.delete()
+        delete_course(course)
         return redirect('courses:course_list')
-    return render(request, 'courses/confirm_delete.html', {'course': course})
\ No newline at end of file
+    return render(request, 'courses/confirm_delete.html', {'course': course})
+
+
+@login_required
+@ratelimit('bulk', methods=['POST'])
+def course_roster(request, pk):
+    """
+    Class management for the course owner (teacher): enroll students and
+    publish assignments that are copied to every enrolled student.
+    """
+    course = get_object_or_404(Course, pk=pk, owner=request.user)
+    enroll_form = EnrollStudentsForm()
+    template_form = AssignmentTemplateForm()
+
+    if request.method == 'POST':
+        if request.POST.get('action') == 'enroll':
+            enroll_form = EnrollStudentsForm(request.POST)
+            if enroll_form.is_valid():
+                enrolled, unknown = enroll_students(course, enroll_form.cleaned_data['usernames'])
+                messages.success(request, f'Enrolled {len(enrolled)} student{"s" if len(enrolled) != 1 else ""}.')
+                if unknown:
+                    messages.warning(request, f'No account found for: {", ".join(unknown)}')
+                return redirect('courses:course_roster', pk=course.pk)
+        else:
+            template_form = AssignmentTemplateForm(request.POST)
+            if template_form.is_valid():
+                template = template_form.save(commit=False)
+                template.course = course
+                copies = publish_template(template)
+                messages.success(request, f'Published "{template.title}" to {len(copies)} student(s).')
+                return redirect('courses:course_roster', pk=course.pk)
+
+    return render(request, 'courses/roster.html', {
+        'course': course,
+        'enrollments': course.enrollments.select_related('student').order_by('student__username'),
+        'templates': course.templates.all(),
+        'enroll_form': enroll_form,
+        'template_form': template_form,
+    })
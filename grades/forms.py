@@ -1,7 +1,17 @@
+import uuid
+
 from django import forms
 from .models import Grade
 
 class GradeForm(forms.ModelForm):
+    # One-time id rendered into the form so duplicate submits are ignored (grades.services)
+    submission_id = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.is_bound:
+            self.initial['submission_id'] = uuid.uuid4()
+
     class Meta:
         model = Grade
         fields = ['score', 'max_score', 'comment']
@@ -12,4 +22,34 @@ class GradeForm(forms.ModelForm):
             'score': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1'}),
             'max_score': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1'}),
             'comment': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
-        }
\ No newline at end of file
+        }
+
+
+class GradebookForm(forms.Form):
+    """
+    One optional score field per student assignment in a class gradebook,
+    named `score-<assignment id>`. Empty cells are left ungraded.
+    """
+
+    def __init__(self, *args, assignments=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for assignment in assignments:
+            initial = assignment.grade.score if hasattr(assignment, 'grade') else None
+            self.fields[self.field_name(assignment)] = forms.FloatField(
+                required=False,
+                min_value=0,
+                initial=initial,
+                widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': '0.1'}),
+            )
+
+    @staticmethod
+    def field_name(assignment):
+        return f'score-{assignment.pk}'
+
+    def scores(self):
+        """{assignment_id: score} for the filled-in cells."""
+        return {
+            int(name.split('-', 1)[1]): value
+            for name, value in self.cleaned_data.items()
+            if value is not None
+        }
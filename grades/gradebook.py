@@ -0,0 +1,73 @@
+# grades/gradebook.py
+"""
+Bulk grading for class courses (see courses.teaching).
+
+A gradebook submission covers every student/template cell of a class. All
+grades are written with one bulk_create and one bulk_update, the graded
+assignments are marked completed with a single UPDATE, and the change log is
+written in bulk, so saving takes a fixed number of queries at any class size.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from assignments.models import Assignment
+from core.changes import record_bulk_changes
+from core.models import Change
+
+from .models import Grade
+
+
+def gradebook_assignments(course):
+    """The students' copies of every class template, with grades, in one query."""
+    return list(
+        Assignment.objects
+        .filter(template__course=course)
+        .select_related('template', 'grade')
+    )
+
+
+@transaction.atomic
+def save_gradebook(assignments, scores):
+    """
+    Applies {assignment_id: score} to the given assignments (as loaded by
+    gradebook_assignments). Cells without a score, or whose score is unchanged,
+    are left alone. Returns the number of grades created and updated.
+    """
+    now = timezone.now()
+    to_create, to_update, graded = [], [], []
+
+    for assignment in assignments:
+        score = scores.get(assignment.pk)
+        if score is None:
+            continue
+        max_score = assignment.template.max_score
+        if hasattr(assignment, 'grade'):
+            grade = assignment.grade
+            if grade.score == score and grade.max_score == max_score:
+                continue
+            grade.score = score
+            grade.max_score = max_score
+            grade.graded_at = now  # auto_now is not applied by bulk_update
+            to_update.append(grade)
+        else:
+            to_create.append(Grade(assignment=assignment, score=score, max_score=max_score))
+        graded.append(assignment)
+
+    if not graded:
+        return 0, 0
+
+    Grade.objects.bulk_create(to_create)
+    Grade.objects.bulk_update(to_update, ['score', 'max_score', 'graded_at'])
+
+    # Grading marks the assignment completed, as in grades.views.record_grade
+    Assignment.objects.filter(pk__in=[a.pk for a in graded]).update(completed=True, updated_at=now)
+    for assignment in graded:
+        assignment.completed = True
+        assignment.updated_at = now
+
+    record_bulk_changes(
+        [(a.owner_id, Change.ASSIGNMENT, a.pk) for a in graded]
+        + [(grade.assignment.owner_id, Change.GRADE, grade.pk) for grade in to_create + to_update]
+    )
+    return len(to_create), len(to_update)
@@ -1,9 +1,10 @@
 from django.db import models
 from django.conf import settings
+from core.models import ChangeTrackedModel, DirtyFieldsMixin
 from assignments.models import Assignment
 
 
-class Grade(models.Model):
+class Grade(DirtyFieldsMixin, ChangeTrackedModel):
     """
     Stores grading details for a single assignment.
     Each assignment can have at most one grade (one-to-one relationship).
@@ -0,0 +1,61 @@
+# grades/services.py
+"""
+Grade recording as a single transactional operation.
+
+The transaction starts by completing the assignment, an UPDATE of just the
+changed columns. That takes the write lock first, so concurrent submits for
+one assignment queue behind each other instead of deadlocking: it locks the
+assignment row on PostgreSQL/MySQL, and takes the database write lock on
+SQLite before any read. update_or_create() then locks or inserts the grade,
+and it still recovers from the OneToOne IntegrityError if another writer gets
+in first.
+
+Form submissions carry a one-time submission id; a repeat of the same id
+(double click, resubmitted POST) is recognized with an atomic add() to the
+shared cache, which every worker sees, and ignored instead of being applied
+twice.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Grade
+
+
+def submission_key(submission_id):
+    return f'grades:submission:{submission_id}'
+
+
+def mark_completed(assignment):
+    """Grading completes the assignment; writes only the changed columns."""
+    assignment.completed = True
+    # updated_at keys the cached assignment cards, which show the grade
+    assignment.save(update_fields=['completed', 'updated_at'])
+
+
+def record_grade(assignment, *, score, max_score, comment=None, submission_id=None):
+    """
+    Creates or updates the assignment's grade and marks the assignment
+    completed, atomically. Returns (grade, created); grade is None when the
+    submission id was already used, in which case nothing is written.
+    """
+    # A retry can land on any worker, so the ids must be in the cache they all share
+    cache = caches[settings.CACHE_SHARED_ALIAS]
+    key = submission_key(submission_id) if submission_id else None
+    if key and not cache.add(key, assignment.pk, settings.GRADE_SUBMISSION_TIMEOUT):
+        return None, False
+
+    try:
+        with transaction.atomic():
+            mark_completed(assignment)
+            grade, created = Grade.objects.update_or_create(
+                assignment=assignment,
+                defaults={'score': score, 'max_score': max_score, 'comment': comment},
+            )
+    except Exception:
+        # The submission never happened; let a retry with the same id through
+        if key:
+            cache.delete(key)
+        raise
+    return grade, created
@@ -1,3 +1,222 @@
-from django.test import TestCase
+import threading
+import uuid
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import IntegrityError, connection
+from unittest import skipIf
+
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from assignments.models import Assignment
+from core.factories import (
+    CacheClearingTestCase, make_assignment, make_course, make_enrollment, make_grade, make_series,
+    make_template, make_user,
+)
+from courses.teaching import fan_out
+from .models import Grade
+from . import services
+
+
+def run_concurrently(target, count):
+    """Runs target(index) in `count` threads released at the same moment."""
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def worker(index):
+        try:
+            barrier.wait()
+            target(index)
+        except Exception as exc:  # Surface failures from worker threads in the test
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class RecordGradeServiceTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.assignment = make_assignment(cls.user, title='Essay')
+
+    def test_creates_grade_and_completes_assignment(self):
+        grade, created = services.record_grade(self.assignment, score=8, max_score=10)
+
+        self.assertTrue(created)
+        self.assertEqual(grade.percentage, 80)
+        self.assignment.refresh_from_db()
+        self.assertTrue(self.assignment.completed)
+
+    def test_updates_existing_grade(self):
+        services.record_grade(self.assignment, score=5, max_score=10)
+        grade, created = services.record_grade(self.assignment, score=9, max_score=10, comment='Better')
+
+        self.assertFalse(created)
+        self.assertEqual(Grade.objects.get().score, 9)
+        self.assertEqual(grade.comment, 'Better')
+
+    def test_duplicate_submission_is_ignored(self):
+        submission_id = uuid.uuid4()
+        services.record_grade(self.assignment, score=5, max_score=10, submission_id=submission_id)
+        caches['default'].clear()  # As on another worker, which has its own default cache
+        grade, created = services.record_grade(self.assignment, score=7, max_score=10, submission_id=submission_id)
+
+        self.assertIsNone(grade)
+        self.assertFalse(created)
+        self.assertEqual(Grade.objects.get().score, 5)
+
+    def test_failed_submission_can_be_retried(self):
+        submission_id = uuid.uuid4()
+        with self.assertRaises(IntegrityError):
+            services.record_grade(self.assignment, score=None, max_score=10, submission_id=submission_id)
+
+        grade, created = services.record_grade(self.assignment, score=6, max_score=10, submission_id=submission_id)
+        self.assertTrue(created)
+
+    def test_view_records_grade(self):
+        self.client.force_login(self.user)
+        url = reverse('grades:record_grade', args=[self.assignment.pk])
+        data = {'score': 7, 'max_score': 10, 'comment': '', 'submission_id': str(uuid.uuid4())}
+
+        response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('assignments:assignment_detail', args=[self.assignment.pk]))
+        # A resubmitted form (same submission id) changes nothing
+        self.client.post(url, {**data, 'score': 3})
+        self.assertEqual(Grade.objects.get().score, 7)
+
+
+class RecordGradeViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.assignment = make_assignment(cls.user, title='Essay')
+        cls.series = make_series(cls.user, title='Quiz')
+        cls.timestamp = int(cls.series.occurrence_at(0).timestamp())
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_form_shows_existing_grade(self):
+        make_grade(self.assignment, score=42)
+
+        response = self.client.get(reverse('grades:record_grade', args=[self.assignment.pk]))
+
+        self.assertEqual(response.context['form'].initial['score'], 42)
+
+    def test_other_users_assignments_are_not_found(self):
+        other = make_assignment(make_user())
+        response = self.client.get(reverse('grades:record_grade', args=[other.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_occurrence_is_materialized_only_when_graded(self):
+        url = reverse('grades:record_occurrence_grade', args=[self.series.pk, self.timestamp])
+
+        self.assertContains(self.client.get(url), 'Quiz')
+        self.assertFalse(self.series.materialized.exists())
+
+        self.client.post(url, {'score': 9, 'max_score': 10, 'comment': ''})
+        assignment = self.series.materialized.get()
+        self.assertTrue(assignment.completed)
+        self.assertEqual(assignment.grade.score, 9)
+
+        # Graded occurrences are regular assignments from then on
+        self.assertRedirects(
+            self.client.get(url), reverse('grades:record_grade', args=[assignment.pk]),
+            fetch_redirect_response=False,
+        )
+
+
+class GradebookViewTests(CacheClearingTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = make_user()
+        cls.course = make_course(cls.teacher)
+        cls.students = [make_user() for _ in range(3)]
+        for student in cls.students:
+            make_enrollment(cls.course, student)
+        cls.templates = [make_template(cls.course, max_score=10) for _ in range(2)]
+        fan_out(cls.templates, [student.pk for student in cls.students])
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.teacher)
+        self.url = reverse('grades:gradebook', args=[self.course.pk])
+
+    def test_grid(self):
+        response = self.client.get(self.url)
+
+        rows = list(response.context['rows'])
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(all(len(cells) == 2 for _, cells in rows))
+
+    def test_query_count(self):
+        # Fixed for any number of students and templates (the first two are the session and the user)
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+
+    def test_save(self):
+        assignments = Assignment.objects.filter(template__course=self.course)
+        data = {f'score-{assignment.pk}': 7 for assignment in assignments}
+
+        self.client.post(self.url, data)
+
+        self.assertEqual(Grade.objects.filter(assignment__in=assignments, score=7).count(), 6)
+        self.assertFalse(assignments.filter(completed=False).exists())
+
+    def test_only_the_teacher_can_open_it(self):
+        self.client.force_login(self.students[0])
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+@skipIf(
+    connection.vendor == 'sqlite' and connection.is_in_memory_db(),
+    "threads can't share an in-memory SQLite test database",
+)
+class RecordGradeConcurrencyTests(TransactionTestCase):
+    """Hammers record_grade from several threads, each with its own connection."""
+
+    threads = 8
+
+    def setUp(self):
+        self.user = make_user()
+        self.assignment = make_assignment(self.user, title='Essay')
+
+    def test_concurrent_submissions_leave_one_grade(self):
+        def submit(index):
+            assignment = Assignment.objects.get(pk=self.assignment.pk)
+            services.record_grade(assignment, score=index, max_score=10)
+
+        errors = run_concurrently(submit, self.threads)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Grade.objects.filter(assignment=self.assignment).count(), 1)
+        self.assertIn(Grade.objects.get().score, range(self.threads))
+        self.assignment.refresh_from_db()
+        self.assertTrue(self.assignment.completed)
+
+    def test_concurrent_duplicate_submits_apply_once(self):
+        submission_id = uuid.uuid4()
+        results = []
+
+        def submit(index):
+            assignment = Assignment.objects.get(pk=self.assignment.pk)
+            results.append(services.record_grade(
+                assignment, score=index, max_score=10, submission_id=submission_id
+            ))
+
+        errors = run_concurrently(submit, self.threads)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len([grade for grade, _ in results if grade is not None]), 1)
+        self.assertEqual(Grade.objects.count(), 1)
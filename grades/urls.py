@@ -5,4 +5,6 @@ app_name = 'grades'
 
 urlpatterns = [
     path('record/<int:assignment_id>/', views.record_grade, name='record_grade'),
+    path('gradebook/<int:course_id>/', views.gradebook, name='gradebook'),
+    path('record/series/<int:series_id>/<int:timestamp>/', views.record_occurrence_grade, name='record_occurrence_grade'),
 ]
\ No newline at end of file
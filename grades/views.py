@@ -1,11 +1,18 @@
 # grades/views.py
 
 from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 
+from django.db import transaction
+
 from assignments.models import Assignment
-from .models import Grade
-from .forms import GradeForm
+from assignments.views import get_occurrence
+from core.ratelimit import ratelimit
+from courses.models import Course
+from . import services
+from .forms import GradeForm, GradebookForm
+from .gradebook import gradebook_assignments, save_gradebook
 
 
 @login_required
@@ -14,22 +21,16 @@ def record_grade(request, assignment_id):
     Allows the course owner to record or update a grade for a specific assignment.
     Automatically marks the assignment as completed upon successful grading.
     """
-    assignment = get_object_or_404(Assignment, id=assignment_id, owner=request.user)
-
-    # Fetch existing grade if it exists; otherwise, create a new one
-    grade = Grade.objects.filter(assignment=assignment).first()
+    # The existing grade (if any) is joined in rather than fetched separately
+    assignment = get_object_or_404(
+        Assignment.objects.select_related('grade'), id=assignment_id, owner=request.user
+    )
+    grade = getattr(assignment, 'grade', None)
 
     if request.method == 'POST':
         form = GradeForm(request.POST, instance=grade)
         if form.is_valid():
-            saved_grade = form.save(commit=False)
-            saved_grade.assignment = assignment
-            saved_grade.save()
-
-            # Mark assignment as completed once a grade is recorded
-            assignment.completed = True
-            assignment.save()
-
+            services.record_grade(assignment, **grade_values(form))
             return redirect('assignments:assignment_detail', pk=assignment.id)
     else:
         form = GradeForm(instance=grade)
@@ -37,4 +38,77 @@ def record_grade(request, assignment_id):
     return render(request, 'grades/record_grade.html', {
         'form': form,
         'assignment': assignment,
-    })
\ No newline at end of file
+        'grade': grade,
+    })
+
+
+def grade_values(form):
+    """Keyword arguments for services.record_grade from a valid GradeForm."""
+    data = form.cleaned_data
+    return {
+        'score': data['score'],
+        'max_score': data['max_score'],
+        'comment': data['comment'],
+        'submission_id': data['submission_id'],
+    }
+
+
+@login_required
+def record_occurrence_grade(request, series_id, timestamp):
+    """
+    Records a grade for an occurrence of a recurring series. The occurrence is
+    only materialized (as a completed Assignment) once a valid grade is posted.
+    """
+    series, due = get_occurrence(request, series_id, timestamp)
+    assignment = series.materialized.filter(occurrence_date=due).first()
+    if assignment:
+        return redirect('grades:record_grade', assignment_id=assignment.id)
+
+    if request.method == 'POST':
+        form = GradeForm(request.POST)
+        if form.is_valid():
+            with transaction.atomic():
+                assignment, _ = series.materialize(due)
+                services.record_grade(assignment, **grade_values(form))
+            return redirect('assignments:assignment_detail', pk=assignment.id)
+    else:
+        form = GradeForm()
+
+    return render(request, 'grades/record_grade.html', {
+        'form': form,
+        'assignment': series.build_occurrence(due),
+    })
+
+
+@login_required
+@ratelimit('bulk', methods=['POST'])
+def gradebook(request, course_id):
+    """
+    Grid of enrolled students x class assignments for the course owner.
+    The whole grid is submitted at once and saved in bulk (see grades.gradebook),
+    so the query count does not depend on the class size.
+    """
+    course = get_object_or_404(Course, pk=course_id, owner=request.user)
+    assignments = gradebook_assignments(course)
+    form = GradebookForm(request.POST or None, assignments=assignments)
+
+    if request.method == 'POST' and form.is_valid():
+        created, updated = save_gradebook(assignments, form.scores())
+        messages.success(request, f'Saved {created + updated} grade(s).')
+        return redirect('grades:gradebook', course_id=course.pk)
+
+    # Lay the cells out as rows of students and columns of templates
+    templates = list(course.templates.all())
+    column = {template.pk: index for index, template in enumerate(templates)}
+    enrollments = course.enrollments.select_related('student').order_by('student__username')
+    rows = {e.student_id: (e.student, [None] * len(templates)) for e in enrollments}
+    for assignment in assignments:
+        if assignment.owner_id in rows:
+            rows[assignment.owner_id][1][column[assignment.template_id]] = form[GradebookForm.field_name(assignment)]
+
+    return render(request, 'grades/gradebook.html', {
+        'course': course,
+        'templates': templates,
+        'rows': rows.values(),
+        'form': form,
+    })
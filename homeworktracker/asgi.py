@@ -9,8 +9,16 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'homeworktracker.settings')
 
 application = get_asgi_application()
+
+# Sync views run in a worker thread with its own database connection, so here
+# the warm-up mainly saves the URL resolver and template compilation
+if settings.WARM_UP_ON_STARTUP:
+    from core.health import warm_up
+
+    warm_up()
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,9 +25,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-lw4q%g(l@dwccf^-ssup=_q^665fu&%b^+8rghen-bd-#m+msj'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') != '0'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -36,6 +38,8 @@ INSTALLED_APPS = [
     'courses',
     'assignments',
     'grades',
+    'attachments',
+    'api',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -46,22 +50,34 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.QueryProfilingMiddleware',
+    'core.middleware.ResponseCompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.TimezoneMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'homeworktracker.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept in memory outside of development
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -74,6 +90,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'homeworktracker.wsgi.application'
 
+# Prime URL resolvers, compile templates and run the readiness checks before
+# serving (core.health.warm_up); DJANGO_WARM_UP=0 turns it off
+WARM_UP_ON_STARTUP = os.environ.get('DJANGO_WARM_UP', '1') != '0'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -82,6 +102,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep each worker's connection between requests instead of opening
+        # one per request. The startup warm-up (core.health) closes its own
+        # connection, so a worker opens this one on its first request
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        # File-backed (not in-memory) so threaded tests get independent connections
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -104,13 +131,18 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# `manage.py test` hashes every factory-made user's password; a fast hasher
+# keeps that from dominating the suite's run time
+if 'test' in sys.argv[1:2]:
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
 LANGUAGE_CODE = 'en-us'
 
-TIME_ZONE = 'Asia/Shanghai'
+TIME_ZONE = 'Asia/Shanghai'  # Default for new profiles and anonymous requests
 
 USE_I18N = True
 
@@ -124,14 +156,241 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / "static",  # 开发时额外静态文件目录
 ]
+STATIC_ROOT = BASE_DIR / 'staticfiles'  # collectstatic output, served by homeworktracker.static
+
+# Production uses hashed filenames plus pre-compressed .gz/.br variants;
+# run `python manage.py collectstatic` before starting with DJANGO_DEBUG=0.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'homeworktracker.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+    # Assignment attachments, stored once per SHA-256 (attachments.models.Blob).
+    # Served only through the permission-checked download view, so kept out of
+    # MEDIA_ROOT, which is served to anyone under MEDIA_URL
+    'attachments': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': BASE_DIR / 'private' / 'attachments'},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Resolves request.user together with its profile in a single query
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileModelBackend',
+]
+
+# 'default' is per process and only holds entries that are safe to keep per
+# worker, such as rendered fragments keyed by what they show. 'shared' is seen
+# by every worker process and holds anything another worker may invalidate:
+# the two-tier cache in core.caching, rate limits and, on a network cache,
+# users and sessions. Its add() must be atomic across processes for
+# single-flight locking, which holds for the database cache as well as Redis
+# and Memcached.
+#
+# DJANGO_SHARED_CACHE_URL selects a network cache (redis://host:6379/0, which
+# needs the `redis` package, or memcached://host:11211, which needs
+# `pymemcache`). Without it 'shared' is a table in the database (create it
+# with `manage.py createcachetable`).
+SHARED_CACHE_URL = os.environ.get('DJANGO_SHARED_CACHE_URL', '')
+if SHARED_CACHE_URL.startswith(('redis://', 'rediss://')):
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': SHARED_CACHE_URL}
+elif SHARED_CACHE_URL.startswith('memcached://'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': SHARED_CACHE_URL.removeprefix('memcached://'),
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'shared_cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+# A cache lookup in the same database costs the same round trip as the row it
+# would save, plus writes on every invalidation, so users and sessions are only
+# cached when 'shared' is a network cache
+SHARED_CACHE_IN_DATABASE = SHARED_CACHE['BACKEND'].endswith('.DatabaseCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': SHARED_CACHE,
+}
+if 'test' in sys.argv[1:2]:
+    # Keeps the query-count guards about the views' own queries. Users and
+    # sessions still follow the configured cache (SHARED_CACHE_IN_DATABASE);
+    # core.tests.DatabaseCacheTests runs against the real database cache.
+    CACHES['shared'] = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'}
+
+# Two-tier cache (core.caching): values are fresh for 'timeout' seconds, then
+# served while being refreshed for up to 'stale' more
+CACHE_SHARED_ALIAS = 'shared'
+CACHE_NAMESPACES = {
+    'dashboard': {'timeout': 60, 'stale': 5 * 60},
+    'course_stats': {'timeout': 60, 'stale': 5 * 60},
+    'calendar': {'timeout': 60 * 60, 'stale': 24 * 60 * 60},
+}
+CACHE_LOCAL_MAX_ENTRIES = 1000
+CACHE_LOCAL_TIMEOUT = 5  # seconds a process trusts its own copy
+CACHE_LOCK_TIMEOUT = 30  # a recompute lock left by a crashed worker expires after this
+CACHE_LOCK_WAIT = 5  # seconds a worker waits for another's recompute before doing it itself
+CACHE_LOCK_POLL_INTERVAL = 0.05
+CACHE_REVALIDATE_IN_BACKGROUND = True
+CACHE_METRICS_FLUSH_INTERVAL = 10
+
+# Seconds the authenticated User+Profile is cached between requests (0 disables)
+AUTH_USER_CACHE_TIMEOUT = 0 if SHARED_CACHE_IN_DATABASE else 300
+# Must be shared by every worker: an invalidation only reaches the cache it is made in
+AUTH_USER_CACHE_ALIAS = CACHE_SHARED_ALIAS
+
+# Session storage: 'cached_db' reads sessions from the cache and only falls
+# back to the database on a miss (the default with a network cache); 'db' is
+# Django's plain database engine (the default otherwise); 'signed_cookies'
+# needs no server-side storage at all.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[
+    os.environ.get('DJANGO_SESSION_ENGINE', 'db' if SHARED_CACHE_IN_DATABASE else 'cached_db')
+]
+# A logout or password change must end the session in every worker
+SESSION_CACHE_ALIAS = CACHE_SHARED_ALIAS
+
+# Response compression (core.middleware.ResponseCompressionMiddleware)
+COMPRESSION_MIN_SIZE = 1024  # bytes; smaller responses are sent as-is
+COMPRESSION_CONTENT_TYPES = [
+    'text/html',
+    'application/json',
+    'text/calendar',
+]
+
+# Rendered assignment cards are cached per (id, updated_at); see assignments.fragments
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Each user's (id, name, code) course list for selects and filters; see courses.directory
+COURSE_DIRECTORY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds a grade form's submission id is remembered to ignore duplicate submits
+GRADE_SUBMISSION_TIMEOUT = 60 * 60
+
+# How far ahead recurring assignments are expanded for the dashboard and list
+RECURRENCE_WINDOW_DAYS = 90
+
+# Days of DailyStat history shown in the dashboard trend chart
+DASHBOARD_TREND_DAYS = 30
+
+# Completed assignments due longer ago than this are archived by `manage.py archive_assignments`
+ASSIGNMENT_ARCHIVE_AFTER_DAYS = 180
+
+# Deleted courses and accounts are purged in batches of this many rows (core.purge),
+# in a background thread unless disabled; `manage.py purge_deleted` finishes leftovers
+PURGE_BATCH_SIZE = 500
+PURGE_IN_BACKGROUND = True
+
+if 'test' in sys.argv[1:2]:
+    # No purge threads outliving a test; tests run purges with core.purge.run()
+    PURGE_IN_BACKGROUND = False
+
+# Per-user page ETags (core.conditional) also expire after this many seconds
+# so time-relative state such as overdue badges is refreshed
+CONDITIONAL_GET_MAX_AGE = 60
+
+# JSON API (api app)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+API_MAX_BATCH_SIZE = 100
+# Seconds between updates of an API token's last_used_at
+API_TOKEN_TOUCH_INTERVAL = 60 * 60
+
+# Delta sync: tombstones older than this are removed by `manage.py compact_changes`
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Live updates over Server-Sent Events (/api/v1/events/, see core.events).
+# LocalBackend only reaches streams in the same process; use
+# 'core.events.DatabasePollingBackend' when running several workers.
+LIVE_EVENTS_BACKEND = 'core.events.LocalBackend'
+LIVE_EVENTS_POLL_INTERVAL = 1.0  # seconds, DatabasePollingBackend only
+LIVE_EVENTS_HEARTBEAT = 15  # seconds between keep-alive comments
+LIVE_EVENTS_RETRY_MS = 3000  # client reconnect delay; also the WSGI polling interval
+
+# Token-bucket rate limits per scope (core.ratelimit), as '<requests>/<s|m|h|d>';
+# a scope left out is not limited
+RATE_LIMITS = {
+    'login': '10/m',     # per IP, failed and successful attempts alike
+    'login_account': '20/h',  # per username posted, from any IP
+    'register': '5/h',   # per IP
+    'toggle': '60/m',    # per user
+    'bulk': '30/m',      # per user: API writes, gradebook and roster submissions
+    'export': '5/h',     # per user: account data exports
+}
+# LocalStore keeps buckets per process; use 'core.ratelimit.CacheStore' when
+# running several workers, which keeps them in RATE_LIMIT_CACHE_ALIAS
+RATE_LIMIT_STORE = 'core.ratelimit.LocalStore'
+RATE_LIMIT_CACHE_ALIAS = CACHE_SHARED_ALIAS
+RATE_LIMIT_LOCAL_MAX_KEYS = 10000
+
+# SQL profiling (core.profiling). Statements slower than the threshold are
+# logged as JSON lines to SLOW_QUERY_LOG (None disables); `manage.py
+# top_queries` summarises them. A sampled fraction of requests additionally
+# gets its full query trace, and optionally a cProfile dump, written to
+# QUERY_PROFILE_DIR.
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_MAX_SQL_LENGTH = 2000
+SLOW_QUERY_LOG = BASE_DIR / 'slow_queries.log'
+QUERY_PROFILE_SAMPLE_RATE = 0.0  # e.g. 0.01 traces one request in a hundred
+QUERY_PROFILE_CPROFILE = False
+QUERY_PROFILE_DIR = BASE_DIR / 'profiles'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'core.slow_queries': {'handlers': ['slow_queries'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Assignment attachments (attachments app). Uploads arrive in chunks of at most
+# ATTACHMENT_CHUNK_SIZE into ATTACHMENT_UPLOAD_DIR and count against the
+# owner's ATTACHMENT_QUOTA from the moment they start; uploads idle for
+# ATTACHMENT_UPLOAD_EXPIRY_HOURS are dropped by `manage.py cleanup_attachments`
+ATTACHMENT_MAX_SIZE = 50 * 1024 * 1024
+ATTACHMENT_QUOTA = 200 * 1024 * 1024
+ATTACHMENT_CHUNK_SIZE = 4 * 1024 * 1024
+ATTACHMENT_UPLOAD_DIR = BASE_DIR / 'uploads'
+ATTACHMENT_UPLOAD_EXPIRY_HOURS = 24
+
+# Account data export (accounts.export): rows read and written per step while
+# the ZIP is streamed; bounds the export's memory use
+EXPORT_CHUNK_SIZE = 1000
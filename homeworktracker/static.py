@@ -0,0 +1,150 @@
+"""
+WSGI wrapper that serves collected static files in production.
+
+Files are indexed once from STATIC_ROOT at startup. Requests are answered with
+the best pre-compressed variant the client accepts (highest ``q``, then ``.br``
+before ``.gz``) and
+with far-future immutable cache headers for manifest-hashed names, so browsers
+never re-validate Bootstrap or Chart.js between deployments.
+"""
+
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.utils.http import parse_http_date_safe
+
+
+# Hashed names produced by ManifestStaticFilesStorage, e.g. main.3f2a1b9c8d7e.js
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=60'
+
+# Preferred order when the client accepts several encodings equally
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def parse_accept_encoding(header):
+    """
+    Returns {coding: q} for an Accept-Encoding header. A coding listed with
+    q=0, or only matched by a ``*;q=0`` entry, is refused.
+    """
+    qualities = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value.strip())
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+class StaticFile:
+    """An indexed static file and its pre-compressed variants."""
+
+    def __init__(self, path, url_path):
+        self.path = path
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type in (
+            'application/javascript', 'application/json', 'image/svg+xml'
+        ):
+            self.content_type += '; charset=utf-8'
+        self.cache_control = (
+            IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.search(url_path) else DEFAULT_CACHE_CONTROL
+        )
+        self.variants = {
+            encoding: path + suffix
+            for encoding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        }
+
+    def select(self, accept_encoding):
+        """Returns (path, content_encoding) for the preferred acceptable variant."""
+        qualities = parse_accept_encoding(accept_encoding)
+        default = qualities.get('*', 0.0)
+        best = None
+        for encoding, _ in ENCODINGS:
+            if encoding not in self.variants:
+                continue
+            quality = qualities.get(encoding, default)
+            if quality > 0 and (best is None or quality > best[0]):
+                best = (quality, encoding)
+        if best is None:
+            return self.path, None
+        return self.variants[best[1]], best[1]
+
+
+class CompressedStaticFiles:
+    """
+    Serves STATIC_URL requests from STATIC_ROOT and passes everything else
+    through to the wrapped Django application.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = str(root or settings.STATIC_ROOT or '')
+        self.prefix = '/' + (prefix or settings.STATIC_URL).strip('/') + '/'
+        self.files = self._build_index() if self.root and os.path.isdir(self.root) else {}
+
+    def _build_index(self):
+        files = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(dirpath, filename)
+                url_path = os.path.relpath(path, self.root).replace(os.sep, '/')
+                files[self.prefix + url_path] = StaticFile(path, url_path)
+        return files
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith(self.prefix):
+            return self.application(environ, start_response)
+
+        static_file = self.files.get(path)
+        method = environ.get('REQUEST_METHOD')
+        if static_file is None or method not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+
+        return self.serve(static_file, environ, start_response, head=(method == 'HEAD'))
+
+    def serve(self, static_file, environ, start_response, head=False):
+        file_path, encoding = static_file.select(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        stat = os.stat(file_path)
+
+        # Unhashed files are short-lived in caches, so honour re-validation
+        if_modified_since = parse_http_date_safe(environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if if_modified_since is not None and int(stat.st_mtime) <= if_modified_since:
+            start_response('304 Not Modified', [('Cache-Control', static_file.cache_control)])
+            return []
+
+        headers = [
+            ('Content-Type', static_file.content_type),
+            ('Content-Length', str(stat.st_size)),
+            ('Cache-Control', static_file.cache_control),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+        ]
+        if static_file.variants:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+
+        start_response('200 OK', headers)
+        if head:
+            return []
+
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(file_path, 'rb'), 8192)
@@ -0,0 +1,173 @@
+import gzip
+import os
+import tempfile
+import time
+
+import brotli
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from .static import DEFAULT_CACHE_CONTROL, IMMUTABLE_CACHE_CONTROL, CompressedStaticFiles
+from .storage import MIN_COMPRESS_SIZE
+
+
+STORAGE_SETTINGS = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'homeworktracker.storage.CompressedManifestStaticFilesStorage'},
+}
+
+
+class CompressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        source = tempfile.TemporaryDirectory()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(root.cleanup)
+        self.source, self.root = source.name, root.name
+
+    def write(self, name, content):
+        with open(os.path.join(self.source, name), 'w') as f:
+            f.write(content)
+
+    def collect(self):
+        with override_settings(
+            STATICFILES_DIRS=[self.source], STATIC_ROOT=self.root, STORAGES=STORAGE_SETTINGS,
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        return sorted(os.listdir(self.root))
+
+    def hashed(self, files, prefix, extension):
+        return next(
+            name for name in files
+            if name.startswith(prefix + '.') and name.endswith(extension) and len(name.split('.')) == 3
+        )
+
+    def test_large_text_files_get_gzip_and_brotli_variants(self):
+        body = 'body { color: #123456; }\n' * 100
+        self.write('site.css', body)
+        files = self.collect()
+
+        name = self.hashed(files, 'site', '.css')
+        self.assertIn(name + '.gz', files)
+        self.assertIn(name + '.br', files)
+        with open(os.path.join(self.root, name + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()).decode(), body)
+        with open(os.path.join(self.root, name + '.br'), 'rb') as f:
+            self.assertEqual(brotli.decompress(f.read()).decode(), body)
+
+    def test_small_and_binary_files_are_not_compressed(self):
+        self.write('tiny.js', 'x = 1;' * (MIN_COMPRESS_SIZE // 10))
+        self.write('image.png', 'p' * 4096)
+        files = self.collect()
+
+        self.assertFalse([name for name in files if name.endswith(('.gz', '.br'))])
+
+    def test_incompressible_output_is_not_kept(self):
+        # Random bytes do not shrink, so neither variant is smaller than the original
+        with open(os.path.join(self.source, 'noise.txt'), 'w', encoding='latin-1') as f:
+            f.write(os.urandom(4096).decode('latin-1'))
+        files = self.collect()
+
+        self.assertFalse([name for name in files if name.endswith(('.gz', '.br'))])
+
+
+class CompressedStaticFilesTests(SimpleTestCase):
+    HASHED = 'app.0123456789ab.js'
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        for name, content in (
+            (self.HASHED, b'original'),
+            (self.HASHED + '.gz', b'gzipped'),
+            (self.HASHED + '.br', b'brotli'),
+            ('robots.txt', b'plain'),
+        ):
+            with open(os.path.join(self.root, name), 'wb') as f:
+                f.write(content)
+
+        self.passed_through = []
+        self.app = CompressedStaticFiles(self.application, root=self.root, prefix='/static/')
+
+    def application(self, environ, start_response):
+        self.passed_through.append(environ['PATH_INFO'])
+        start_response('200 OK', [('Content-Type', 'text/html')])
+        return [b'django']
+
+    def request(self, path, method='GET', **headers):
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': method}
+        environ.update({'HTTP_' + name: value for name, value in headers.items()})
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_encoding_selection(self):
+        cases = (
+            ('', None, b'original'),
+            ('gzip, deflate, br', 'br', b'brotli'),
+            ('gzip', 'gzip', b'gzipped'),
+            ('br;q=0, gzip', 'gzip', b'gzipped'),
+            ('gzip;q=0, br;q=0', None, b'original'),
+            ('gzip;q=1.0, br;q=0.5', 'gzip', b'gzipped'),
+            ('*', 'br', b'brotli'),
+            ('*;q=0', None, b'original'),
+            ('br;q=0, *', 'gzip', b'gzipped'),
+            ('identity', None, b'original'),
+        )
+        for accept, encoding, content in cases:
+            with self.subTest(accept=accept):
+                status, headers, body = self.request(
+                    '/static/' + self.HASHED, ACCEPT_ENCODING=accept,
+                )
+                self.assertEqual(status, '200 OK')
+                self.assertEqual(headers.get('Content-Encoding'), encoding)
+                self.assertEqual(headers['Vary'], 'Accept-Encoding')
+                self.assertEqual(headers['Content-Length'], str(len(content)))
+                self.assertEqual(body, content)
+
+    def test_cache_control_depends_on_hashed_names(self):
+        _, headers, _ = self.request('/static/' + self.HASHED)
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+
+        _, headers, body = self.request('/static/robots.txt', ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(headers['Cache-Control'], DEFAULT_CACHE_CONTROL)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertNotIn('Vary', headers)
+        self.assertEqual(body, b'plain')
+
+    def test_not_modified(self):
+        status, headers, body = self.request(
+            '/static/robots.txt', IF_MODIFIED_SINCE=http_date(time.time() + 60),
+        )
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(headers['Cache-Control'], DEFAULT_CACHE_CONTROL)
+        self.assertEqual(body, b'')
+
+        status, _, body = self.request('/static/robots.txt', IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, b'plain')
+
+    def test_head_sends_headers_without_a_body(self):
+        status, headers, body = self.request('/static/' + self.HASHED, method='HEAD', ACCEPT_ENCODING='br')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'br')
+        self.assertEqual(headers['Content-Length'], str(len(b'brotli')))
+        self.assertEqual(body, b'')
+
+    def test_other_requests_pass_through(self):
+        for path, method in (
+            ('/dashboard/', 'GET'),
+            ('/static/missing.js', 'GET'),
+            ('/static/' + self.HASHED, 'POST'),
+        ):
+            with self.subTest(path=path, method=method):
+                status, _, body = self.request(path, method=method)
+                self.assertEqual(body, b'django')
+        self.assertEqual(len(self.passed_through), 3)
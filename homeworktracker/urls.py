@@ -26,6 +26,8 @@ urlpatterns = [
     path('courses/', include('courses.urls')),
     path('assignments/', include('assignments.urls')),
     path('grades/', include('grades.urls')),
+    path('attachments/', include('attachments.urls')),
+    path('api/', include('api.urls')),
 ]
 
 if settings.DEBUG:
@@ -9,8 +9,21 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'homeworktracker.settings')
 
 application = get_wsgi_application()
+
+# Pay the cold-start costs here rather than in the first user requests
+if settings.WARM_UP_ON_STARTUP:
+    from core.health import warm_up
+
+    warm_up()
+
+# Serve collected (hashed, pre-compressed) static files directly in production
+if not settings.DEBUG:
+    from homeworktracker.static import CompressedStaticFiles
+
+    application = CompressedStaticFiles(application)
@@ -22,7 +22,13 @@ document.addEventListener('DOMContentLoaded', function () {
  */
 function toggleUIState(button) {
     const isCurrentlyCompleted = button.classList.contains('btn-warning');
-    const isNowCompleted = !isCurrentlyCompleted;
+    setCompletedState(button, !isCurrentlyCompleted);
+}
+
+/**
+ * Render the toggle button and status badge for the given completion state
+ */
+function setCompletedState(button, isNowCompleted) {
     const assignmentId = button.dataset.assignmentId;
 
     // Update button appearance
@@ -45,6 +51,58 @@ function toggleUIState(button) {
     }
 }
 
+/**
+ * Patch a card in place when the assignment changes in another tab or device
+ * (changes arrive as `live:change` events from live_updates.js)
+ */
+document.addEventListener('live:change', function (e) {
+    const change = e.detail;
+
+    if (change.type === 'grade' && change.data) {
+        const grade = document.querySelector(`[data-assignment-grade="${change.data.assignment}"]`);
+        if (grade) grade.textContent = `${change.data.score} / ${change.data.max_score}`;
+        return;
+    }
+    if (change.type !== 'assignment') return;
+
+    const card = document.querySelector(`[data-assignment-card="${change.id}"]`);
+    if (change.deleted) {
+        card?.remove();
+        return;
+    }
+    if (!card) {
+        showNewAssignmentsNotice();
+        return;
+    }
+
+    const title = card.querySelector(`[data-assignment-title="${change.id}"]`);
+    if (title) title.textContent = change.data.title;
+
+    const button = card.querySelector('.toggle-complete');
+    if (button && button.classList.contains('btn-warning') !== change.data.completed) {
+        setCompletedState(button, change.data.completed);
+    }
+});
+
+// Changes were missed and can't be replayed, so offer a refresh
+document.addEventListener('live:reset', () => showNewAssignmentsNotice('This list is out of date.'));
+
+/**
+ * New assignments need server-rendered cards, so offer a refresh instead
+ */
+function showNewAssignmentsNotice(message = 'New assignments were added.') {
+    if (document.getElementById('newAssignmentsNotice')) return;
+    const list = document.querySelector('.list-group');
+    if (!list) return;
+
+    const notice = document.createElement('div');
+    notice.id = 'newAssignmentsNotice';
+    notice.className = 'alert alert-info d-flex justify-content-between align-items-center';
+    notice.innerHTML = `<span><i class="fas fa-info-circle me-2"></i>${message}</span>` +
+        '<a href="" class="btn btn-sm btn-outline-primary">Refresh</a>';
+    list.before(notice);
+}
+
 /**
  * Send POST request to toggle completion status (fire-and-forget)
  */
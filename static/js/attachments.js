@@ -0,0 +1,87 @@
+// static/js/attachments.js
+// Uploads assignment attachments in chunks. Each chunk is a PUT with a
+// Content-Range; an interrupted upload (closed tab, dropped connection) resumes
+// from the server's offset when the same file is picked again.
+
+(function () {
+    const section = document.getElementById('attachments');
+    const input = document.getElementById('attachment-file');
+    if (!section || !input) return;
+
+    const progress = document.getElementById('attachment-progress');
+    const bar = progress.querySelector('.progress-bar');
+    const error = document.getElementById('attachment-error');
+    const csrfToken = getCookie('csrftoken');
+
+    input.addEventListener('change', async () => {
+        const file = input.files[0];
+        if (!file) return;
+        input.disabled = true;
+        error.textContent = '';
+        progress.classList.remove('d-none');
+        try {
+            await upload(file);
+            window.location.reload();
+        } catch (err) {
+            error.textContent = err.message;
+            input.disabled = false;
+        }
+    });
+
+    async function upload(file) {
+        // Same file, same assignment: continue the earlier upload if the server still has it
+        const key = `upload:${section.dataset.uploadUrl}:${file.name}:${file.size}:${file.lastModified}`;
+        let state = null;
+        const previous = localStorage.getItem(key);
+        if (previous) {
+            const response = await fetch(previous, { headers: { 'Accept': 'application/json' } });
+            if (response.ok) state = await response.json();
+        }
+        if (!state) {
+            const form = new FormData();
+            form.append('filename', file.name);
+            form.append('size', file.size);
+            form.append('content_type', file.type);
+            state = await request(section.dataset.uploadUrl, { method: 'POST', body: form });
+            localStorage.setItem(key, state.url);
+        }
+
+        let offset = state.offset;
+        while (offset < file.size) {
+            const end = Math.min(offset + state.chunk_size, file.size);
+            showProgress(offset, file.size);
+            const result = await request(state.url, {
+                method: 'PUT',
+                body: file.slice(offset, end),
+                headers: {
+                    'Content-Type': 'application/octet-stream',
+                    'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`,
+                },
+            }, true);
+            if (result.complete) break;
+            offset = result.offset;
+        }
+        showProgress(file.size, file.size);
+        localStorage.removeItem(key);
+    }
+
+    async function request(url, options, allowConflict = false) {
+        options.headers = { ...(options.headers || {}), 'X-CSRFToken': csrfToken, 'Accept': 'application/json' };
+        const response = await fetch(url, options);
+        const data = await response.json().catch(() => ({}));
+        // 409: the server is at a different offset (e.g. a retried chunk); carry on from there
+        if (response.ok || (allowConflict && response.status === 409 && data.offset !== undefined)) {
+            return data;
+        }
+        throw new Error(data.error || `Upload failed (${response.status}).`);
+    }
+
+    function showProgress(done, total) {
+        bar.style.width = `${Math.round((done / total) * 100)}%`;
+    }
+
+    function getCookie(name) {
+        const match = document.cookie.match(new RegExp(`(?:^|; )${name}=([^;]*)`));
+        return match ? decodeURIComponent(match[1]) : null;
+    }
+})();
@@ -223,6 +223,10 @@ function initCalendar() {
         if (dataEl?.dataset.events) {
             const events = JSON.parse(dataEl.dataset.events);
             assignments = events.map(e => ({
+                id: e.id,
+                course_id: e.extendedProps?.course_id ?? null,
+                series_id: e.extendedProps?.series_id ?? null,
+                occurrence: e.id === null,  // Expanded from a recurring series, not a saved row
                 title: e.title,
                 due_date: new Date(e.start),
                 completed: e.extendedProps?.completed || false,
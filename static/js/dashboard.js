@@ -14,7 +14,10 @@ class DashboardCharts {
         if (this.initialized) return;
 
         this.initProgressBars();
-        this.initCompletionChart();
+        if (typeof Chart !== 'undefined') {
+            this.initCompletionChart();
+            this.initTrendChart();
+        }
 
         this.initialized = true;
         console.log('Dashboard charts initialized');
@@ -106,6 +109,66 @@ class DashboardCharts {
         console.log('Course completion chart rendered successfully');
     }
 
+    /**
+     * Render the daily completion-rate trend from `#completion-trend-data`
+     */
+    initTrendChart() {
+        const canvas = document.getElementById('trendChart');
+        const dataEl = document.getElementById('completion-trend-data');
+        if (!canvas || !dataEl) return;
+
+        let trend = [];
+        try {
+            trend = JSON.parse(dataEl.textContent);
+        } catch (err) {
+            console.error('Failed to parse completion trend data:', err);
+            return;
+        }
+        if (trend.length === 0) return;
+
+        this.charts.trendChart = new Chart(canvas, {
+            type: 'line',
+            data: {
+                labels: trend.map(day => day.date),
+                datasets: [
+                    {
+                        label: 'Completion Rate %',
+                        data: trend.map(day => day.completion_rate),
+                        borderColor: '#4361ee',
+                        backgroundColor: 'rgba(67, 97, 238, 0.1)',
+                        fill: true,
+                        tension: 0.3,
+                        yAxisID: 'y'
+                    },
+                    {
+                        label: 'Overdue',
+                        data: trend.map(day => day.overdue),
+                        borderColor: '#f72585',
+                        tension: 0.3,
+                        yAxisID: 'y1'
+                    }
+                ]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                scales: {
+                    y: {
+                        beginAtZero: true,
+                        max: 100,
+                        ticks: { callback: (value) => `${value}%` }
+                    },
+                    y1: {
+                        beginAtZero: true,
+                        position: 'right',
+                        grid: { drawOnChartArea: false },
+                        ticks: { precision: 0 }
+                    }
+                }
+            }
+        });
+    }
+
     /**
      * Extract chart data from global variable `window.courseChartData`
      */
@@ -205,8 +268,9 @@ function initDashboard() {
                        window.location.pathname.includes('dashboard');
     if (!isDashboard) return;
 
-    // Ensure Chart.js is loaded
-    if (typeof Chart === 'undefined') {
+    // Chart.js is only included when there is course data to plot
+    const chartCanvas = document.getElementById('completionChart');
+    if (chartCanvas && typeof Chart === 'undefined') {
         console.error('Chart.js is required but not loaded');
         const container = document.querySelector('.chart-container');
         if (container) {
@@ -274,6 +338,119 @@ function checkDeadlineReminders() {
     }
 }
 
+/**
+ * Apply a live change (see live_updates.js) without reloading the page:
+ * the calendar's assignment list is the client-side source of truth, and
+ * KPIs, the course chart and the upcoming list are recomputed from it.
+ */
+function applyLiveChange(change) {
+    const calendar = window.calendar;
+    if (!calendar) return;
+
+    if (change.type === 'course') {
+        if (!change.deleted) {
+            calendar.assignments
+                .filter(a => a.course_id === change.id)
+                .forEach(a => { a.course = change.data.name; });
+        }
+    } else if (change.type === 'assignment') {
+        const index = calendar.assignments.findIndex(a => a.id === change.id);
+        // Archived assignments leave the dashboard like deleted ones
+        if (change.deleted || change.data.archived) {
+            if (index !== -1) calendar.assignments.splice(index, 1);
+            removeUpcomingItem(change.id);
+        } else {
+            const data = change.data;
+            const due = new Date(data.due_date);
+            const previous = index !== -1 ? calendar.assignments[index] : null;
+            const known = calendar.assignments.find(a => a.course_id === data.course);
+            const updated = {
+                id: data.id,
+                title: data.title,
+                due_date: due,
+                completed: data.completed,
+                is_overdue: !data.completed && due < new Date(),
+                course_id: data.course,
+                course: data.course === null ? 'No Course' :
+                        (previous?.course_id === data.course ? previous.course : known?.course || 'Course')
+            };
+            if (index !== -1) {
+                calendar.assignments[index] = updated;
+            } else {
+                calendar.assignments.push(updated);
+            }
+            if (updated.completed) removeUpcomingItem(updated.id);
+            if (data.series !== null && data.series !== undefined) {
+                // A series occurrence was materialized; drop its expanded placeholder
+                const occurredAt = new Date(data.occurrence_date).getTime();
+                calendar.assignments = calendar.assignments.filter(a =>
+                    !(a.occurrence && a.series_id === data.series && new Date(a.due_date).getTime() === occurredAt));
+                document.querySelector(
+                    `.upcoming-list [data-occurrence="${data.series}-${Math.floor(occurredAt / 1000)}"]`
+                )?.remove();
+            }
+        }
+    } else {
+        return;  // Grades don't affect the dashboard; grading also sends an assignment change
+    }
+
+    calendar.setAssignments(calendar.assignments);
+    updateDashboardStats(calendar.assignments);
+}
+
+function removeUpcomingItem(assignmentId) {
+    document.querySelector(`.upcoming-list [data-assignment-id="${assignmentId}"]`)?.remove();
+}
+
+function updateDashboardStats(allAssignments) {
+    // KPIs count saved assignments only, like the server-rendered ones
+    const assignments = allAssignments.filter(a => !a.occurrence);
+    const total = assignments.length;
+    const completed = assignments.filter(a => a.completed).length;
+    const overdue = assignments.filter(a => !a.completed && new Date(a.due_date) < new Date()).length;
+    const rate = total > 0 ? Math.round(completed / total * 1000) / 10 : 0;
+
+    const setText = (id, text) => {
+        const el = document.getElementById(id);
+        if (el) el.textContent = text;
+    };
+    setText('kpiTotal', total);
+    setText('kpiCompleted', completed);
+    setText('kpiOverdue', overdue);
+    setText('completionSummary', `${completed} of ${total} assignments completed`);
+
+    const bar = document.getElementById('completionBar');
+    if (bar) {
+        bar.style.width = `${rate}%`;
+        bar.dataset.width = rate;
+        bar.textContent = `${rate}%`;
+    }
+
+    // Course chart: completion rate per course, uncategorized excluded
+    const chart = window.dashboardCharts?.charts.completionChart;
+    if (chart) {
+        const byCourse = new Map();
+        assignments.filter(a => a.course_id !== null).forEach(a => {
+            const stat = byCourse.get(a.course) || { total: 0, completed: 0 };
+            stat.total += 1;
+            if (a.completed) stat.completed += 1;
+            byCourse.set(a.course, stat);
+        });
+        const labels = [...byCourse.keys()].sort();
+        chart.data.labels = labels;
+        chart.data.datasets[0].data = labels.map(name => {
+            const stat = byCourse.get(name);
+            return Math.round(stat.completed / stat.total * 1000) / 10;
+        });
+        chart.data.datasets[0].backgroundColor = window.dashboardCharts.generateColors(labels.length);
+        chart.update();
+    }
+}
+
+document.addEventListener('live:change', (e) => applyLiveChange(e.detail));
+// Changes were missed and can't be replayed; the server renders the current state
+document.addEventListener('live:reset', () => window.location.reload());
+
 // Auto-initialize when DOM is ready
 if (document.readyState === 'loading') {
     document.addEventListener('DOMContentLoaded', initDashboard);
@@ -0,0 +1,29 @@
+// static/js/live_updates.js
+// Subscribes to the server's change stream (Server-Sent Events) and re-dispatches
+// each change as a `live:change` DOM event so page scripts can patch themselves.
+// A `live:reset` event means the page fell too far behind to be patched and
+// must reload its data.
+
+(function () {
+    const script = document.currentScript;
+    const url = script?.dataset.eventsUrl;
+    if (!url || typeof EventSource === 'undefined') return;
+
+    // EventSource reconnects on its own and resumes via Last-Event-ID
+    const source = new EventSource(url);
+
+    source.addEventListener('change', (e) => {
+        try {
+            const change = JSON.parse(e.data);
+            document.dispatchEvent(new CustomEvent('live:change', { detail: change }));
+        } catch (err) {
+            console.error('Invalid live update payload:', err);
+        }
+    });
+
+    source.addEventListener('reset', () => {
+        document.dispatchEvent(new CustomEvent('live:reset'));
+    });
+
+    window.addEventListener('beforeunload', () => source.close());
+})();